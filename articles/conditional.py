@@ -0,0 +1,51 @@
+"""ETags and conditional GET for article list responses.
+
+ETags are derived from what a list renders without serializing it: each
+article's id and content version plus the requesting user's like state.
+Articles are ``WikipediaArticle.objects.listing_rows()`` dicts.
+"""
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+
+def article_version(row):
+    """Content version of an article: its updated_at, maintained by the database"""
+    return row['updated_at'].timestamp()
+
+
+def list_etag(rows, liked_ids, *extra):
+    """Strong ETag for a rendered list of article ``rows``"""
+    digest = hashlib.blake2b(digest_size=16)
+    for value in extra:
+        digest.update(f"{value};".encode())
+    for row in rows:
+        digest.update(f"{row['id']}:{article_version(row)}:{int(row['id'] in liked_ids)};".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request, etag):
+    """True when the request's If-None-Match names ``etag``.
+
+    Uses weak comparison: compressed responses carry the weakened W/ form.
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(candidate.strip().removeprefix('W/') == etag for candidate in header.split(','))
+
+
+def finalize(response, etag, cache_control):
+    """Attach the ETag and per-endpoint caching headers to a 200 or 304 response"""
+    response['ETag'] = etag
+    patch_cache_control(response, **cache_control)
+    # Bodies depend on who is asking (is_liked, recommendations)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def not_modified(etag, cache_control):
+    return finalize(HttpResponseNotModified(), etag, cache_control)
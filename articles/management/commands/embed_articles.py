@@ -0,0 +1,156 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from articles.models import WikipediaArticle
+from articles.services.embeddings import article_text, encode_embedding, get_embedder
+from articles.services.vector_index import export_index
+
+_worker_embedder = None
+
+
+def _init_worker(embedder_path, dim):
+    global _worker_embedder
+    _worker_embedder = get_embedder(embedder_path, dim)
+
+
+def _embed_texts(texts):
+    return _worker_embedder.embed(texts)
+
+
+class Command(BaseCommand):
+    help = "Compute embeddings for stored articles that do not have one yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help="Rows fetched, embedded and written per batch")
+        parser.add_argument('--workers', type=int, default=0,
+                            help="Processes used for embedding (0 embeds in this process)")
+        parser.add_argument('--embedder', default=None,
+                            help="Dotted path to an embedder class (defaults to ARTICLES_EMBEDDER)")
+        parser.add_argument('--dim', type=int, default=None,
+                            help="Embedding dimension (defaults to ARTICLES_EMBEDDING_DIM)")
+        parser.add_argument('--checkpoint', default=os.path.join(settings.BASE_DIR, '.embed_articles.checkpoint'),
+                            help="File recording the last article id written by an unfinished run")
+        parser.add_argument('--reset', action='store_true',
+                            help="Ignore any existing checkpoint and scan from the first article")
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Stop after embedding this many articles")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        embedder_path = options['embedder'] or settings.ARTICLES_EMBEDDER
+        dim = options['dim'] or settings.ARTICLES_EMBEDDING_DIM
+        checkpoint_path = options['checkpoint']
+
+        last_id = 0 if options['reset'] else self._read_checkpoint(checkpoint_path, embedder_path, dim)
+        if last_id:
+            self.stdout.write(f"Resuming after article id {last_id}")
+
+        rows = (
+            WikipediaArticle.objects
+            .filter(embedding__isnull=True, id__gt=last_id)
+            .order_by('id')
+            .only('id', 'title', 'summary')
+        )
+        if options['limit']:
+            rows = rows[:options['limit']]
+
+        if options['workers'] > 0:
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                initializer=_init_worker,
+                initargs=(embedder_path, dim),
+            )
+        else:
+            executor = None
+            _init_worker(embedder_path, dim)
+
+        # Keep at most two batches per worker in flight so memory stays bounded
+        window = max(1, options['workers'] * 2)
+        pending = deque()
+        written = 0
+        started = time.monotonic()
+
+        def flush_one():
+            nonlocal written
+            batch, result = pending.popleft()
+            vectors = result.result() if executor else result
+            for article, vector in zip(batch, vectors):
+                article.embedding = encode_embedding(vector)
+            WikipediaArticle.objects.bulk_update(batch, ['embedding'])
+            written += len(batch)
+            self._write_checkpoint(checkpoint_path, batch[-1].id, embedder_path, dim)
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"Embedded {written} articles ({written / elapsed:.0f} rows/sec)")
+
+        try:
+            for batch in self._batches(rows.iterator(chunk_size=chunk_size), chunk_size):
+                texts = [article_text(article.title, article.summary) for article in batch]
+                if executor:
+                    pending.append((batch, executor.submit(_embed_texts, texts)))
+                else:
+                    pending.append((batch, _embed_texts(texts)))
+                if len(pending) >= window:
+                    flush_one()
+            while pending:
+                flush_one()
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+        if not options['limit'] or written < options['limit']:
+            # The scan reached the end: the next run starts from the first id again,
+            # picking up rows embedded before but cleared since (e.g. by a refresh)
+            self._clear_checkpoint(checkpoint_path)
+
+        elapsed = time.monotonic() - started
+        rate = written / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: embedded {written} articles in {elapsed:.1f}s ({rate:.0f} rows/sec)"
+        ))
+        if written and settings.ARTICLES_VECTOR_INDEX_DIR:
+            manifest = export_index(settings.ARTICLES_VECTOR_INDEX_DIR)
+            self.stdout.write(f"Exported index generation {manifest['generation']} ({manifest['count']} vectors)")
+
+    @staticmethod
+    def _batches(iterable, size):
+        batch = []
+        for item in iterable:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _read_checkpoint(path, embedder_path, dim):
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        # A checkpoint from a different embedder does not describe this run
+        if state.get('embedder') != embedder_path or state.get('dim') != dim:
+            return 0
+        return state.get('last_id', 0)
+
+    @staticmethod
+    def _write_checkpoint(path, last_id, embedder_path, dim):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_id': last_id, 'embedder': embedder_path, 'dim': dim}, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _clear_checkpoint(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.services.vector_index import export_index
+
+
+class Command(BaseCommand):
+    help = "Export stored embeddings as a new generation of the memory-mapped index shared by workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=None,
+                            help="Export directory (defaults to ARTICLES_VECTOR_INDEX_DIR)")
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Rows fetched and written per batch")
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or settings.ARTICLES_VECTOR_INDEX_DIR
+        if not directory:
+            raise CommandError("Pass --dir or set ARTICLES_VECTOR_INDEX_DIR")
+
+        started = time.monotonic()
+        manifest = export_index(directory, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported generation {manifest['generation']}: {manifest['count']} vectors "
+            f"of dimension {manifest['dim']} in {time.monotonic() - started:.1f}s"
+        ))
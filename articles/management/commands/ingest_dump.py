@@ -0,0 +1,167 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from articles.models import WikipediaArticle, WikipediaArticleQuerySet
+from articles.services.dumps import ABSTRACT_ID_PREFIX, DUMP_READERS, WIKI_BASE_URL, detect_format, iter_dump
+
+# Dump rows refresh categories too, unlike live search results
+INGEST_UPDATE_FIELDS = WikipediaArticleQuerySet.UPSERT_FIELDS + ['categories']
+# Abstracts matched onto a page-id row carry no categories or image; keep the stored ones
+ABSTRACT_MATCH_FIELDS = ['title', 'summary', 'url', 'updated_at']
+
+TITLE_MAX_LENGTH = WikipediaArticle._meta.get_field('title').max_length
+URL_MAX_LENGTH = WikipediaArticle._meta.get_field('url').max_length
+ARTICLE_ID_MAX_LENGTH = WikipediaArticle._meta.get_field('article_id').max_length
+
+
+def _storable(article):
+    return (
+        len(article["title"]) <= TITLE_MAX_LENGTH
+        and len(article["url"]) <= URL_MAX_LENGTH
+        and len(article["article_id"]) <= ARTICLE_ID_MAX_LENGTH
+    )
+
+
+def _title_keyed(article):
+    return article["article_id"].startswith(ABSTRACT_ID_PREFIX)
+
+
+def match_stored_titles(batch):
+    """Re-key title-keyed abstracts rows onto stored page-id rows with the same title.
+
+    Returns the matched articles; the rest of ``batch`` keeps its title keys.
+    """
+    titles = {article["title"] for article in batch if _title_keyed(article)}
+    if not titles:
+        return []
+    stored = dict(
+        WikipediaArticle.objects
+        .filter(title__in=titles)
+        .exclude(article_id__startswith=ABSTRACT_ID_PREFIX)
+        .order_by('-id')
+        .values_list('title', 'article_id')
+    )
+    matched = []
+    for article in batch:
+        if _title_keyed(article) and article["title"] in stored:
+            article["article_id"] = stored[article["title"]]
+            matched.append(article)
+    return matched
+
+
+def adopt_title_rows(batch):
+    """Move stored title-keyed rows onto the page ids a Cirrus batch carries for their titles.
+
+    Re-keying in place keeps the row's primary key, so its likes, views and
+    embedding survive; the upsert that follows then refreshes the content.
+    """
+    pairs = [(article["article_id"], article["title"]) for article in batch if not _title_keyed(article)]
+    if not pairs:
+        return
+    table = WikipediaArticle._meta.db_table
+    values = ", ".join(["(%s, %s)"] * len(pairs))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} AS a SET article_id = v.article_id
+            FROM (VALUES {values}) AS v(article_id, title)
+            WHERE a.article_id = %s || v.title
+              AND NOT EXISTS (SELECT 1 FROM {table} b WHERE b.article_id = v.article_id)
+            """,
+            [param for pair in pairs for param in pair] + [ABSTRACT_ID_PREFIX],
+        )
+
+
+def ingest_shard(path, fmt, batch_size, base_url, limit=None):
+    """Load one dump file in bulk upsert batches; returns (path, loaded, skipped)"""
+    loaded = skipped = 0
+    articles = iter_dump(path, fmt, base_url)
+    if limit:
+        articles = islice(articles, limit)
+    batch = []
+
+    def flush():
+        # Abstracts rows have no page id: land them on the same title's page-id
+        # row when one is stored, and let page-id rows take over title-keyed ones
+        adopt_title_rows(batch)
+        matched = match_stored_titles(batch)
+        if matched:
+            matched_ids = {id(article) for article in matched}
+            WikipediaArticle.objects.upsert(matched, update_fields=ABSTRACT_MATCH_FIELDS, resolve_ids=False)
+            batch[:] = [article for article in batch if id(article) not in matched_ids]
+        WikipediaArticle.objects.upsert(batch, update_fields=INGEST_UPDATE_FIELDS, resolve_ids=False)
+        batch.clear()
+
+    for article in articles:
+        if not _storable(article):
+            skipped += 1
+            continue
+        batch.append(article)
+        if len(batch) >= batch_size:
+            loaded += len(batch)
+            flush()
+    if batch:
+        loaded += len(batch)
+        flush()
+    return path, loaded, skipped
+
+
+class Command(BaseCommand):
+    help = "Bulk-load articles from Wikipedia abstracts or CirrusSearch dump files (plain, .gz or .bz2)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+',
+                            help="Dump files; several shards can be loaded in parallel with --workers")
+        parser.add_argument('--format', default='auto', choices=['auto', *DUMP_READERS],
+                            help="Dump format (detected from the file contents by default)")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Articles written per INSERT ... ON CONFLICT statement")
+        parser.add_argument('--workers', type=int, default=0,
+                            help="Processes loading shards concurrently (0 loads in this process)")
+        parser.add_argument('--base-url', default=WIKI_BASE_URL,
+                            help="Article URL prefix for dumps that do not carry URLs")
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Stop after this many articles per shard")
+
+    def handle(self, *args, **options):
+        paths = options['paths']
+        for path in paths:
+            try:
+                fmt = detect_format(path) if options['format'] == 'auto' else options['format']
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+            if fmt == 'abstract':
+                self.stdout.write(self.style.WARNING(
+                    f"{path}: abstracts dumps have no page ids; articles are matched to stored ones by title"
+                ))
+
+        args = (options['format'], options['batch_size'], options['base_url'], options['limit'])
+        total_loaded = total_skipped = 0
+        started = time.monotonic()
+
+        def report(path, loaded, skipped):
+            nonlocal total_loaded, total_skipped
+            total_loaded += loaded
+            total_skipped += skipped
+            self.stdout.write(f"{path}: loaded {loaded} articles, skipped {skipped}")
+
+        if options['workers'] > 0:
+            # Forked workers must open their own connections, not share ours
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+                futures = [executor.submit(ingest_shard, path, *args) for path in paths]
+                for future in as_completed(futures):
+                    report(*future.result())
+        else:
+            for path in paths:
+                report(*ingest_shard(path, *args))
+
+        elapsed = time.monotonic() - started
+        rate = total_loaded / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: loaded {total_loaded} articles from {len(paths)} file(s) in {elapsed:.1f}s ({rate:.0f} rows/sec)"
+        ))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.services.trending import TrendingService
+
+
+class Command(BaseCommand):
+    help = "Recompute the time-decayed trending leaderboards from stored interactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', action='append', dest='windows',
+                            help="Window to rebuild (repeatable); defaults to all configured windows")
+        parser.add_argument('--min-score', type=float, default=0.01,
+                            help="Drop articles whose decayed score falls below this value")
+
+    def handle(self, *args, **options):
+        windows = options['windows'] or list(TrendingService.windows())
+        unknown = set(windows) - set(TrendingService.windows())
+        if unknown:
+            raise CommandError(f"Unknown window(s): {', '.join(sorted(unknown))}")
+
+        for window in windows:
+            started = time.monotonic()
+            count = TrendingService.rebuild(window, min_score=options['min_score'])
+            self.stdout.write(f"{window}: {count} articles ranked in {time.monotonic() - started:.2f}s")
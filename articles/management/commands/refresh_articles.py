@@ -0,0 +1,84 @@
+import re
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from articles.models import WikipediaArticle
+from articles.services.ratelimit import UpstreamThrottled
+from articles.services.wikipedia_service import WikipediaService
+from taskqueue.queue import enqueue
+
+DURATION_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+def parse_duration(value):
+    """'30d', '12h', '90m' or '2w' (a bare number means days) as a timedelta"""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([mhdw]?)', value.strip())
+    if not match:
+        raise CommandError(f"Invalid duration {value!r}; use e.g. 30d, 12h, 90m or 2w")
+    amount, unit = match.groups()
+    return timedelta(**{DURATION_UNITS[unit or 'd']: float(amount)})
+
+
+class Command(BaseCommand):
+    help = "Re-fetch title, summary, URL and image of stored articles from MediaWiki, 50 page ids per request"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', default='30d',
+                            help="Refresh articles not refreshed (or created) within this long, e.g. 30d, 12h")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Due articles read per query (fetched and merged 50 at a time)")
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Stop after refreshing this many articles")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - parse_duration(options['older_than'])
+        batch_size = options['batch_size']
+        limit = options['limit']
+        due = WikipediaArticle.objects.refresh_due(cutoff)
+
+        refreshed = changed = 0
+        last_id = 0
+        started = time.monotonic()
+        while limit is None or refreshed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - refreshed)
+            batch = list(due.filter(id__gt=last_id).order_by('id').values_list('id', 'article_id')[:size])
+            if not batch:
+                break
+            missing = 0
+            for page_ids, articles in self.fetch([article_id for _, article_id in batch]):
+                changed_ids = WikipediaArticle.objects.merge_refreshed(articles, page_ids)
+                if changed_ids:
+                    enqueue('articles.tasks.embed_articles', {'article_ids': changed_ids})
+                refreshed += len(page_ids)
+                changed += len(changed_ids)
+                missing += len(page_ids) - len(articles)
+
+            last_id = batch[-1][0]
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"Refreshed {refreshed} articles, {changed} changed, "
+                f"{missing} missing in this batch ({refreshed / elapsed:.0f} rows/sec)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: refreshed {refreshed} articles ({changed} changed) in {time.monotonic() - started:.1f}s"
+        ))
+
+    def fetch(self, article_ids):
+        """Yield fetch_pages chunks, waiting out MediaWiki back-off requests.
+
+        After a back-off, fetching resumes with the first id whose chunk
+        has not been yielded (and so stored) yet.
+        """
+        done = 0
+        while done < len(article_ids):
+            try:
+                for page_ids, articles in WikipediaService.fetch_pages(article_ids[done:]):
+                    yield page_ids, articles
+                    done += len(page_ids)
+            except UpstreamThrottled as e:
+                self.stdout.write(f"Throttled by MediaWiki ({e.reason}); retrying in {e.retry_after or 1:.0f}s")
+                time.sleep(e.retry_after or 1)
@@ -0,0 +1,155 @@
+import cProfile
+import itertools
+import os
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+from .services import metrics
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+
+class RequestMetricsMiddleware:
+    """Record latency, SQL and upstream timings per route and add a Server-Timing header.
+
+    With ARTICLES_PROFILE_EVERY = N, every Nth sync request is run under
+    cProfile and its stats written to ARTICLES_PROFILE_DIR.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.profile_every = settings.ARTICLES_PROFILE_EVERY
+        self._requests = itertools.count(1)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        stats, token = metrics.start_request()
+        profiler = None
+        if self.profile_every and next(self._requests) % self.profile_every == 0:
+            profiler = cProfile.Profile()
+        try:
+            if profiler is not None:
+                response = profiler.runcall(self.get_response, request)
+            else:
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.finish(request, response, stats, profiler)
+        return response
+
+    async def __acall__(self, request):
+        stats, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.finish(request, response, stats)
+        return response
+
+    @staticmethod
+    def route(request):
+        match = getattr(request, 'resolver_match', None)
+        return f"/{match.route}" if match is not None and match.route else 'unmatched'
+
+    def finish(self, request, response, stats, profiler=None):
+        elapsed = time.perf_counter() - stats.started
+        route = self.route(request)
+        metrics.REQUEST_LATENCY.observe(elapsed, route=route, method=request.method, status=response.status_code)
+        metrics.REQUEST_DB_QUERIES.observe(stats.queries, route=route)
+        metrics.DB_QUERY_SECONDS.inc(stats.query_time, route=route)
+
+        timings = [
+            f'app;dur={elapsed * 1000:.1f}',
+            f'db;dur={stats.query_time * 1000:.1f};desc="{stats.queries} queries"',
+        ]
+        if stats.upstream_calls:
+            timings.append(
+                f'mediawiki;dur={stats.upstream_time * 1000:.1f};desc="{stats.upstream_calls} calls"'
+            )
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join([existing, *timings] if existing else timings)
+
+        if profiler is not None:
+            self.dump_profile(profiler, route)
+        if settings.ARTICLES_METRICS_DIR:
+            metrics.registry.export(settings.ARTICLES_METRICS_DIR, min_interval=settings.ARTICLES_METRICS_EXPORT_INTERVAL)
+
+    @staticmethod
+    def dump_profile(profiler, route):
+        os.makedirs(settings.ARTICLES_PROFILE_DIR, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        path = os.path.join(
+            settings.ARTICLES_PROFILE_DIR, f"{slug}-{int(time.time() * 1000)}-{os.getpid()}.prof"
+        )
+        profiler.dump_stats(path)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compress API responses with brotli when the client accepts it, else gzip.
+
+    Listed after WhiteNoise, so static files (served precompressed) never
+    reach it. Only text-like content types are compressed.
+    """
+    compressible_types = ('application/json', 'application/x-ndjson', 'text/')
+    brotli_quality = 4
+
+    def process_response(self, request, response):
+        if not response.get('Content-Type', '').startswith(self.compressible_types):
+            return response
+        accepts_brotli = re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is None or not accepts_brotli or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+        if not response.streaming and len(response.content) < 200:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            response.streaming_content = self.brotli_stream(response.streaming_content, response.is_async)
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content, quality=self.brotli_quality)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # Same rule as gzip: the encoded body no longer matches a strong ETag
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+    def brotli_stream(self, chunks, is_async):
+        # Flush after every chunk so NDJSON lines reach the client as they are produced
+        compressor = brotli.Compressor(quality=self.brotli_quality)
+        if is_async:
+            async def compressed():
+                async for chunk in chunks:
+                    yield compressor.process(chunk) + compressor.flush()
+                yield compressor.finish()
+            return compressed()
+
+        def compressed():
+            for chunk in chunks:
+                yield compressor.process(chunk) + compressor.flush()
+            yield compressor.finish()
+        return compressed()
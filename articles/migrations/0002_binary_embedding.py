@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+from django.db import migrations, models
+
+
+def json_to_float32(apps, schema_editor):
+    WikipediaArticle = apps.get_model('articles', 'WikipediaArticle')
+    batch = []
+    rows = WikipediaArticle.objects.exclude(embedding__isnull=True).exclude(embedding='')
+    for article in rows.only('id', 'embedding').iterator(chunk_size=2000):
+        article.embedding_f32 = np.asarray(json.loads(article.embedding), dtype='<f4').tobytes()
+        batch.append(article)
+        if len(batch) >= 2000:
+            WikipediaArticle.objects.bulk_update(batch, ['embedding_f32'])
+            batch = []
+    if batch:
+        WikipediaArticle.objects.bulk_update(batch, ['embedding_f32'])
+
+
+def float32_to_json(apps, schema_editor):
+    WikipediaArticle = apps.get_model('articles', 'WikipediaArticle')
+    batch = []
+    rows = WikipediaArticle.objects.exclude(embedding_f32__isnull=True)
+    for article in rows.only('id', 'embedding_f32').iterator(chunk_size=2000):
+        vector = np.frombuffer(bytes(article.embedding_f32), dtype='<f4')
+        article.embedding = json.dumps(vector.tolist())
+        batch.append(article)
+        if len(batch) >= 2000:
+            WikipediaArticle.objects.bulk_update(batch, ['embedding'])
+            batch = []
+    if batch:
+        WikipediaArticle.objects.bulk_update(batch, ['embedding'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wikipediaarticle',
+            name='embedding_f32',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(json_to_float32, float32_to_json),
+        migrations.RemoveField(
+            model_name='wikipediaarticle',
+            name='embedding',
+        ),
+        migrations.RenameField(
+            model_name='wikipediaarticle',
+            old_name='embedding_f32',
+            new_name='embedding',
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:56
+
+from django.conf import settings
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('articles', '0002_binary_embedding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendations',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendations', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('profile', models.BinaryField(blank=True, null=True)),
+                ('article_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, size=None)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_user_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleTrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(max_length=8)),
+                ('log_score', models.FloatField()),
+                ('updated_at', models.DateTimeField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='articles.wikipediaarticle')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', '-log_score'], name='trending_period_score_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='articletrendingscore',
+            constraint=models.UniqueConstraint(fields=('article', 'period'), name='unique_trending_article_period'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:58
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the indexes without blocking writes to the interactions table
+    atomic = False
+
+    dependencies = [
+        ('articles', '0004_trending_scores'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='userarticleinteraction',
+            index=models.Index(condition=models.Q(('liked', True)), fields=['user', '-updated_at'], include=('article',), name='interaction_user_liked_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userarticleinteraction',
+            index=models.Index(condition=models.Q(('viewed', True)), fields=['user'], include=('article',), name='interaction_user_viewed_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userarticleinteraction',
+            index=models.Index(fields=['article', 'updated_at'], name='interaction_article_time_idx'),
+        ),
+    ]
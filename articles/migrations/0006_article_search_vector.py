@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:18
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Keep search_vector in step with title/summary on every write path
+# (ORM saves, bulk upserts and raw SQL alike)
+CREATE_TRIGGER = """
+CREATE FUNCTION articles_wikipediaarticle_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.summary, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER articles_wikipediaarticle_search_vector_update
+BEFORE INSERT OR UPDATE OF title, summary ON articles_wikipediaarticle
+FOR EACH ROW EXECUTE FUNCTION articles_wikipediaarticle_search_vector();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS articles_wikipediaarticle_search_vector_update ON articles_wikipediaarticle;
+DROP FUNCTION IF EXISTS articles_wikipediaarticle_search_vector();
+"""
+
+# Touching title fires the trigger for rows stored before it existed
+BACKFILL = "UPDATE articles_wikipediaarticle SET title = title"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_interaction_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wikipediaarticle',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='wikipediaarticle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+        ),
+    ]
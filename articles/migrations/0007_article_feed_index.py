@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:52
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the index without blocking writes to the articles table
+    atomic = False
+
+    dependencies = [
+        ('articles', '0006_article_search_vector'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='wikipediaarticle',
+            index=models.Index(fields=['created_at', 'id'], name='article_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+# updated_at versions an article's rendered content (it feeds response ETags),
+# so writes that leave the content as it was keep the previous timestamp
+CREATE_TRIGGER = """
+CREATE FUNCTION articles_wikipediaarticle_keep_updated_at() RETURNS trigger AS $$
+BEGIN
+    IF (NEW.title, NEW.summary, NEW.url, NEW.image_url, NEW.categories)
+       IS NOT DISTINCT FROM (OLD.title, OLD.summary, OLD.url, OLD.image_url, OLD.categories) THEN
+        NEW.updated_at := OLD.updated_at;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER articles_wikipediaarticle_keep_updated_at
+BEFORE UPDATE ON articles_wikipediaarticle
+FOR EACH ROW EXECUTE FUNCTION articles_wikipediaarticle_keep_updated_at();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS articles_wikipediaarticle_keep_updated_at ON articles_wikipediaarticle;
+DROP FUNCTION IF EXISTS articles_wikipediaarticle_keep_updated_at();
+"""
+
+BACKFILL = "UPDATE articles_wikipediaarticle SET updated_at = created_at"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0007_article_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wikipediaarticle',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:40
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+# Keep category_names in step with the '|'-joined categories text on every
+# write path (ORM saves, bulk upserts, dump ingestion and COPY alike)
+CREATE_TRIGGER = """
+CREATE FUNCTION articles_wikipediaarticle_category_names() RETURNS trigger AS $$
+BEGIN
+    NEW.category_names := coalesce(string_to_array(nullif(NEW.categories, ''), '|'), '{}');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER articles_wikipediaarticle_category_names_update
+BEFORE INSERT OR UPDATE OF categories ON articles_wikipediaarticle
+FOR EACH ROW EXECUTE FUNCTION articles_wikipediaarticle_category_names();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS articles_wikipediaarticle_category_names_update ON articles_wikipediaarticle;
+DROP FUNCTION IF EXISTS articles_wikipediaarticle_category_names();
+"""
+
+# Touching categories fires the trigger for rows stored before it existed
+BACKFILL = "UPDATE articles_wikipediaarticle SET categories = categories WHERE categories <> ''"
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0008_article_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wikipediaarticle',
+            name='categories_fetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='wikipediaarticle',
+            name='category_names',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='wikipediaarticle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['category_names'], name='article_category_names_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wikipediaarticle',
+            index=models.Index(condition=models.Q(('categories', ''), ('categories_fetched_at__isnull', True)), fields=['-id'], name='article_categories_pending_idx'),
+        ),
+    ]
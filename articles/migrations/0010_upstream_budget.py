@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0009_article_category_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UpstreamBudget',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('tokens', models.FloatField()),
+                ('updated_at', models.DateTimeField()),
+                ('blocked_until', models.DateTimeField(blank=True, null=True)),
+                ('background_blocked_until', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0010_upstream_budget'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wikipediaarticle',
+            name='refreshed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build and drop the indexes without blocking writes to the interactions table
+    atomic = False
+
+    dependencies = [
+        ('articles', '0011_article_refreshed_at'),
+    ]
+
+    operations = [
+        # No query reads (article, updated_at): trending scans a time window across all articles
+        RemoveIndexConcurrently(
+            model_name='userarticleinteraction',
+            name='interaction_article_time_idx',
+        ),
+        AddIndexConcurrently(
+            model_name='userarticleinteraction',
+            index=models.Index(fields=['updated_at'], include=('article', 'liked', 'viewed', 'created_at'), name='interaction_updated_at_idx'),
+        ),
+    ]
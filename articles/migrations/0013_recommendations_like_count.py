@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+# Stored lists start from their user's current number of likes
+BACKFILL = """
+UPDATE articles_userrecommendations r
+SET like_count = (
+    SELECT count(*) FROM articles_userarticleinteraction i
+    WHERE i.user_id = r.user_id AND i.liked
+)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0012_interaction_window_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userrecommendations',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
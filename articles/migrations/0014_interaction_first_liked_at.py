@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0013_recommendations_like_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userarticleinteraction',
+            name='first_liked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        # Best available value for likes made before the column existed
+        migrations.RunSQL(
+            "UPDATE articles_userarticleinteraction SET first_liked_at = updated_at WHERE liked",
+            migrations.RunSQL.noop,
+        ),
+    ]
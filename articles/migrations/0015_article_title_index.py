@@ -0,0 +1,19 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the index without blocking writes to the articles table
+    atomic = False
+
+    dependencies = [
+        ('articles', '0014_interaction_first_liked_at'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='wikipediaarticle',
+            index=models.Index(fields=['title'], name='article_title_idx'),
+        ),
+    ]
@@ -1,6 +1,178 @@
-from django.db import models
+from django.db import connection, models
 from django.conf import settings
-import json
+from django.utils import timezone
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db.models.functions import Coalesce
+
+from .services.embeddings import decode_embedding, encode_embedding
+
+
+class WikipediaArticleQuerySet(models.QuerySet):
+    # Columns refreshed from upstream when an article we already store is seen again
+    UPSERT_FIELDS = ['title', 'summary', 'url', 'image_url', 'updated_at']
+    # Columns rendered by WikipediaArticleSerializer; leaves out the embedding blob
+    # (updated_at is not rendered but versions the row for ETags)
+    LISTING_FIELDS = ['id', 'article_id', 'title', 'summary', 'url', 'image_url', 'categories', 'created_at', 'updated_at']
+
+    def for_listing(self):
+        return self.only(*self.LISTING_FIELDS)
+
+    def listing_rows(self):
+        """LISTING_FIELDS as plain dicts, for serializers.serialize_article_rows"""
+        return self.values(*self.LISTING_FIELDS)
+
+    def upsert(self, articles, update_fields=None, resolve_ids=True):
+        """Insert or refresh article dicts in one INSERT ... ON CONFLICT round-trip.
+
+        Returns the saved WikipediaArticle instances in the order the
+        article_ids first appear in ``articles``; their primary keys are
+        filled in unless ``resolve_ids`` is False.
+        """
+        instances = {}
+        for article in articles:
+            # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement
+            instances.setdefault(article["article_id"], self.model(
+                article_id=article["article_id"],
+                title=article["title"],
+                summary=article.get("summary", ""),
+                url=article["url"],
+                image_url=article.get("image_url"),
+                categories=article.get("categories", ""),
+            ))
+        objs = list(instances.values())
+        if not objs:
+            return []
+
+        self.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=['article_id'],
+            update_fields=update_fields or self.UPSERT_FIELDS,
+        )
+
+        # Django < 5.0 does not populate primary keys for conflict-updating
+        # inserts, so resolve them with a single indexed lookup. updated_at is
+        # read back too: the database keeps the old value for unchanged rows
+        if resolve_ids and any(obj.pk is None for obj in objs):
+            rows = {
+                article_id: (pk, updated_at)
+                for article_id, pk, updated_at in
+                self.filter(article_id__in=instances).values_list('article_id', 'id', 'updated_at')
+            }
+            for obj in objs:
+                obj.pk, obj.updated_at = rows.get(obj.article_id, (None, obj.updated_at))
+        return objs
+
+    def refresh_due(self, cutoff):
+        """Articles fetched by MediaWiki page id whose content was last refreshed before ``cutoff``"""
+        return (
+            self.filter(article_id__regex=r'^[0-9]+$')
+            .annotate(last_refreshed=Coalesce('refreshed_at', 'created_at'))
+            .filter(last_refreshed__lt=cutoff)
+        )
+
+    def merge_refreshed(self, articles, article_ids):
+        """Upsert re-fetched ``articles`` and stamp refreshed_at on every one of ``article_ids``.
+
+        Ids MediaWiki no longer knows are stamped too, so they are not
+        retried on every run. Articles whose content changed lose their
+        embedding; returns their primary keys so it can be recomputed.
+        """
+        started = timezone.now()
+        stored = self.upsert(articles)
+        self.filter(article_id__in=article_ids).update(refreshed_at=timezone.now())
+        # updated_at only moves when the content differs (migration 0008)
+        changed = [obj.pk for obj in stored if obj.pk is not None and obj.updated_at >= started]
+        if changed:
+            self.filter(pk__in=changed).update(embedding=None)
+        return changed
+
+    def search(self, query, limit=10):
+        """Full-text search over stored titles and summaries, best match first.
+
+        Uses the GIN-indexed ``search_vector`` column; each returned article
+        gets a ``rank`` attribute.
+        """
+        search_query = SearchQuery(query, search_type='websearch', config=WikipediaArticle.SEARCH_CONFIG)
+        return list(
+            self.for_listing()
+            .filter(search_vector=search_query)
+            .annotate(rank=SearchRank(models.F('search_vector'), search_query))
+            .order_by('-rank', 'id')[:limit]
+        )
+
+    def sharing_categories(self, article_ids, limit=500, exclude_ids=(), top_categories=20, scan_limit=5000):
+        """Ids of articles sharing the most categories with ``article_ids``, best first.
+
+        The ``top_categories`` most frequent categories among ``article_ids``
+        are matched through the GIN index on category_names. At most
+        ``scan_limit`` matches are scored (by the summed frequency of the
+        categories they share), so huge categories cannot make this a scan.
+        ``article_ids`` themselves are never returned.
+        """
+        if not article_ids:
+            return []
+        table = self.model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH wanted AS (
+                    SELECT name, count(*) AS weight
+                    FROM {table}, unnest(category_names) AS name
+                    WHERE id = ANY(%(ids)s::bigint[])
+                    GROUP BY name
+                    ORDER BY weight DESC, name
+                    LIMIT %(top)s
+                ), matched AS (
+                    SELECT id, category_names FROM {table}
+                    WHERE category_names && (SELECT array_agg(name) FROM wanted)
+                      AND NOT id = ANY(%(exclude)s::bigint[])
+                    LIMIT %(scan)s
+                )
+                SELECT matched.id FROM matched
+                CROSS JOIN LATERAL (
+                    SELECT sum(weight) AS score FROM wanted WHERE name = ANY(matched.category_names)
+                ) shared
+                ORDER BY shared.score DESC, matched.id DESC
+                LIMIT %(limit)s
+                """,
+                {
+                    'ids': list(article_ids),
+                    'exclude': list(set(exclude_ids) | set(article_ids)),
+                    'top': top_categories,
+                    'scan': scan_limit,
+                    'limit': limit,
+                },
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def with_is_liked(self, user):
+        """Annotate ``user_liked`` via an EXISTS subquery so serializers need no per-row query"""
+        liked = UserArticleInteraction.objects.filter(
+            article=models.OuterRef('pk'), user=user, liked=True
+        )
+        return self.annotate(user_liked=models.Exists(liked))
+
+    def nearest(self, vector, k=10, exclude_ids=None):
+        """Return the k stored articles most similar to ``vector``, best first.
+
+        Scores come from the in-process embedding index; each returned
+        article gets a ``similarity`` attribute with its cosine score.
+        """
+        from .services.vector_index import get_index
+
+        ids, scores = get_index().search(vector, k, exclude_ids=exclude_ids)
+        articles = self.in_bulk(ids.tolist())
+        results = []
+        for article_id, score in zip(ids.tolist(), scores.tolist()):
+            article = articles.get(article_id)
+            if article is not None:
+                article.similarity = score
+                results.append(article)
+        return results
+
 
 class WikipediaArticle(models.Model):
     """Model to store minimal information about Wikipedia articles"""
@@ -11,22 +183,152 @@ class WikipediaArticle(models.Model):
     url = models.URLField()
     image_url = models.URLField(null=True, blank=True)
     categories = models.TextField(blank=True)
+    # categories split on '|', maintained by a database trigger (migration 0009)
+    # and GIN-indexed for overlap (&&) queries
+    category_names = ArrayField(models.TextField(), default=list, blank=True, editable=False)
+    # Set once categories have been looked up on MediaWiki, even if there were none
+    categories_fetched_at = models.DateTimeField(null=True, blank=True)
+    # Last time title, summary, URL and image were re-fetched by page id
+    # (`manage.py refresh_articles`); null means never since it was stored
+    refreshed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Only moves when content changes; a trigger (migration 0008) keeps the old
+    # value when an upsert rewrites identical content
+    updated_at = models.DateTimeField(auto_now=True)
     
-    # Vector embedding stored as JSON
-    embedding = models.TextField(blank=True, null=True)
+    # Vector embedding stored as raw float32 bytes (see services.embeddings)
+    embedding = models.BinaryField(blank=True, null=True)
+
+    # Weighted title (A) + summary (B) tsvector, maintained by a database
+    # trigger (migration 0006) so bulk upserts keep it current too
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Text search configuration used by the trigger and by search queries
+    SEARCH_CONFIG = 'english'
+
+    objects = WikipediaArticleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+            # Keyset pagination of the feed walks this index newest first
+            models.Index(fields=['created_at', 'id'], name='article_created_id_idx'),
+            GinIndex(fields=['category_names'], name='article_category_names_idx'),
+            # Articles still waiting for a categories lookup, newest first
+            models.Index(
+                fields=['-id'], name='article_categories_pending_idx',
+                condition=models.Q(categories_fetched_at__isnull=True, categories=''),
+            ),
+            # Dump ingestion matches page-id-less abstracts rows to stored articles by title
+            models.Index(fields=['title'], name='article_title_idx'),
+        ]
     
+    def as_listing_row(self):
+        """This article as a ``listing_rows()`` dict"""
+        return {field: getattr(self, field) for field in WikipediaArticleQuerySet.LISTING_FIELDS}
+
     def set_embedding(self, embedding_array):
-        self.embedding = json.dumps(embedding_array)
+        self.embedding = encode_embedding(embedding_array)
     
     def get_embedding(self):
-        if self.embedding:
-            return json.loads(self.embedding)
-        return None
+        """Return the embedding as a read-only float32 NumPy array"""
+        return decode_embedding(self.embedding)
     
     def __str__(self):
         return self.title
 
+class UserArticleInteractionQuerySet(models.QuerySet):
+    """Single-statement writes for the like/view hot path.
+
+    Each method is one INSERT ... ON CONFLICT DO UPDATE that only touches
+    liked/viewed/updated_at, so concurrent taps cannot lose an update.
+    """
+
+    def _table(self):
+        return self.model._meta.db_table
+
+    def toggle_like(self, user_id, article_id):
+        """Flip the like flag (creating a liked row if needed).
+
+        Returns (liked, first_like): the new value, and whether this is the
+        first time the user liked the article (re-likes after an unlike are
+        not). Raises WikipediaArticle.DoesNotExist if the article is unknown.
+        """
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {self._table()} AS i
+                    (user_id, article_id, liked, viewed, first_liked_at, created_at, updated_at)
+                SELECT %s, a.id, TRUE, TRUE, %s, %s, %s
+                FROM {WikipediaArticle._meta.db_table} a WHERE a.id = %s
+                ON CONFLICT (user_id, article_id) DO UPDATE SET
+                    liked = NOT i.liked, viewed = TRUE, updated_at = EXCLUDED.updated_at,
+                    first_liked_at = coalesce(i.first_liked_at, CASE WHEN NOT i.liked THEN EXCLUDED.updated_at END)
+                RETURNING liked, liked AND first_liked_at = %s
+                """,
+                [user_id, now, now, now, article_id, now],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            raise WikipediaArticle.DoesNotExist(f"WikipediaArticle {article_id} does not exist")
+        return row[0], row[1]
+
+    def set_likes(self, user_id, likes):
+        """Apply {article_id: liked} and return the rows whose like state changed.
+
+        Returns ({article_id: liked}, ids liked for the first time). Unknown
+        articles are skipped; rows already in the requested state are not
+        rewritten. Views are not reported: callers wanting article_viewed
+        run mark_viewed() on the same ids first.
+        """
+        if not likes:
+            return {}, []
+        now = timezone.now()
+        values = ", ".join(["(%s::bigint, %s::boolean)"] * len(likes))
+        params = [value for item in likes.items() for value in item]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {self._table()} AS i
+                    (user_id, article_id, liked, viewed, first_liked_at, created_at, updated_at)
+                SELECT %s, v.article_id, v.liked, TRUE, CASE WHEN v.liked THEN %s::timestamptz END, %s, %s
+                FROM (VALUES {values}) AS v(article_id, liked)
+                JOIN {WikipediaArticle._meta.db_table} a ON a.id = v.article_id
+                ON CONFLICT (user_id, article_id) DO UPDATE SET
+                    liked = EXCLUDED.liked, viewed = TRUE, updated_at = EXCLUDED.updated_at,
+                    first_liked_at = coalesce(i.first_liked_at, EXCLUDED.first_liked_at)
+                    WHERE i.liked IS DISTINCT FROM EXCLUDED.liked
+                RETURNING article_id, liked, (xmax = 0) AS inserted, liked AND first_liked_at = %s
+                """,
+                [user_id, now, now, now] + params + [now],
+            )
+            rows = cursor.fetchall()
+        # A fresh row inserted as "not liked" is not a change of like state
+        changed = {article_id: liked for article_id, liked, inserted, _ in rows if liked or not inserted}
+        return changed, [article_id for article_id, _, _, first in rows if first]
+
+    def mark_viewed(self, user_id, article_ids):
+        """Mark articles viewed and return the ids that were not viewed before"""
+        if not article_ids:
+            return []
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {self._table()} AS i (user_id, article_id, liked, viewed, created_at, updated_at)
+                SELECT %s, a.id, FALSE, TRUE, %s, %s
+                FROM {WikipediaArticle._meta.db_table} a WHERE a.id = ANY(%s)
+                ON CONFLICT (user_id, article_id) DO UPDATE SET
+                    viewed = TRUE, updated_at = EXCLUDED.updated_at
+                    WHERE NOT i.viewed
+                RETURNING article_id
+                """,
+                [user_id, now, now, list(article_ids)],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
 class UserArticleInteraction(models.Model):
     """Model to track user interactions with articles"""
     
@@ -34,12 +336,95 @@ class UserArticleInteraction(models.Model):
     article = models.ForeignKey(WikipediaArticle, on_delete=models.CASCADE)
     liked = models.BooleanField(default=False)
     viewed = models.BooleanField(default=False)
+    # When the user first liked the article; kept across unlikes so re-likes add no trending weight
+    first_liked_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UserArticleInteractionQuerySet.as_manager()
+    
     class Meta:
         unique_together = ('user', 'article')
+        indexes = [
+            # A user's liked articles, newest first (profiles, is_liked lookups)
+            models.Index(
+                fields=['user', '-updated_at'], include=['article'],
+                condition=models.Q(liked=True), name='interaction_user_liked_idx',
+            ),
+            # A user's viewed set, excluded from recommendations
+            models.Index(
+                fields=['user'], include=['article'],
+                condition=models.Q(viewed=True), name='interaction_user_viewed_idx',
+            ),
+            # Interactions in a time window, scored per article by TrendingService.rebuild
+            # (covering, so the window is read with an index-only scan)
+            models.Index(
+                fields=['updated_at'], include=['article', 'liked', 'viewed', 'created_at'],
+                name='interaction_updated_at_idx',
+            ),
+        ]
     
     def __str__(self):
         action = "liked" if self.liked else "viewed"
-        return f"{self.user.username} {action} {self.article.title}"
\ No newline at end of file
+        return f"{self.user.username} {action} {self.article.title}"
+
+
+class UserRecommendations(models.Model):
+    """Materialized recommendation list and profile vector for one user"""
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+        related_name='recommendations'
+    )
+    # Sum of the unit embeddings of the user's liked articles (float32 bytes)
+    profile = models.BinaryField(null=True, blank=True)
+    article_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    # Number of likes summed into ``profile``, kept in step by like toggles
+    like_count = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Recommendations for {self.user.username}"
+
+
+class ArticleTrendingScore(models.Model):
+    """Exponentially time-decayed interaction score of an article for one window.
+
+    ``log_score`` is log(sum(weight * exp((t - TRENDING_EPOCH) / tau))) over
+    the article's events, so ordering by it ranks by current decayed score
+    without ever rewriting rows as time passes.
+    """
+    
+    article = models.ForeignKey(WikipediaArticle, on_delete=models.CASCADE)
+    period = models.CharField(max_length=8)
+    log_score = models.FloatField()
+    updated_at = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'period'], name='unique_trending_article_period'),
+        ]
+        indexes = [
+            models.Index(fields=['period', '-log_score'], name='trending_period_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.article_id} ({self.period}): {self.log_score:.3f}"
+
+
+class UpstreamBudget(models.Model):
+    """Shared token bucket metering calls to an upstream API (see services.ratelimit).
+
+    ``tokens`` is the level at ``updated_at``; readers add the refill since
+    then. ``blocked_until`` is set when the upstream rate-limits us and
+    ``background_blocked_until`` when it asks background work to back off.
+    """
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    tokens = models.FloatField()
+    updated_at = models.DateTimeField()
+    blocked_until = models.DateTimeField(null=True, blank=True)
+    background_blocked_until = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.name}: {self.tokens:.1f} tokens"
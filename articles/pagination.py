@@ -0,0 +1,89 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ArticlePagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+
+class ArticleFeedPagination(BasePagination):
+    """Keyset pagination over (created_at, id), newest first.
+
+    The opaque cursor encodes the last row of the previous page, so every
+    page is a bounded range scan of the (created_at, id) index and deep
+    pages cost the same as the first one.
+    """
+    page_size = 10
+    page_size_query_param = 'count'
+    max_page_size = 50
+    # Upper bound on rows pulled in one NDJSON streaming response
+    max_stream_size = 5000
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request, maximum=None):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return min(max(size, 1), maximum or self.max_page_size)
+
+    @staticmethod
+    def encode_cursor(row):
+        position = f"{row['created_at'].isoformat()}|{row['id']}"
+        return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode()
+            created_at, article_id = position.split('|')
+            return datetime.fromisoformat(created_at), int(article_id)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def ordered_queryset(self, queryset, request):
+        """Order newest first and skip past the cursor position, if any"""
+        queryset = queryset.order_by('-created_at', '-id')
+        position = self.decode_cursor(request)
+        if position is not None:
+            created_at, article_id = position
+            # created_at__lte bounds the index range; the OR only filters rows tied on created_at
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=article_id),
+                created_at__lte=created_at,
+            )
+        return queryset
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+        # One extra row tells us whether there is a next page without a COUNT
+        rows = list(self.ordered_queryset(queryset, request)[:size + 1])
+        self.page = rows[:size]
+        self.next_cursor = self.encode_cursor(self.page[-1]) if len(rows) > size else None
+        return self.page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next_cursor': self.next_cursor,
+            'next': self.get_next_link(),
+            'articles': data,
+        })
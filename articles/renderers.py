@@ -0,0 +1,48 @@
+"""JSON rendering with orjson, which is several times faster than the stdlib
+encoder on long article lists. Falls back to DRF's encoder when orjson is
+not installed or cannot encode a value.
+"""
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # stdlib json only
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def _stdlib_dumps(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode()
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes for ``data``, byte-for-byte what JSONRenderer emits"""
+    if orjson is None:
+        ret = _stdlib_dumps(data)
+    else:
+        try:
+            # Dates, decimals, lazy strings etc. go through DRF's encoder so their format matches
+            ret = orjson.dumps(
+                data, default=_encoder.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits
+            ret = _stdlib_dumps(data)
+    # Same escaping as JSONRenderer: U+2028/2029 are valid JSON but not valid JavaScript
+    return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by ``dumps``; indented output is left to JSONRenderer"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
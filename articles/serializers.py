@@ -1,6 +1,30 @@
+from django.utils import timezone
 from rest_framework import serializers
 from .models import WikipediaArticle, UserArticleInteraction
 
+
+def liked_article_ids(user, article_ids):
+    """Ids among ``article_ids`` that ``user`` has liked, in one query"""
+    if not user or not user.is_authenticated:
+        return set()
+    return set(
+        UserArticleInteraction.objects
+        .filter(user=user, liked=True, article_id__in=article_ids)
+        .values_list('article_id', flat=True)
+    )
+
+class WikipediaArticleListSerializer(serializers.ListSerializer):
+    """Resolves is_liked for the whole list with a single query"""
+    
+    def to_representation(self, data):
+        articles = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        if 'liked_ids' not in self.context and request is not None:
+            self.context['liked_ids'] = liked_article_ids(
+                request.user, [article.id for article in articles]
+            )
+        return super().to_representation(articles)
+
 class WikipediaArticleSerializer(serializers.ModelSerializer):
     is_liked = serializers.SerializerMethodField()
     
@@ -8,22 +32,60 @@ class WikipediaArticleSerializer(serializers.ModelSerializer):
         model = WikipediaArticle
         fields = ['id', 'article_id', 'title', 'summary', 'url', 'image_url', 
                   'categories', 'created_at', 'is_liked']
+        list_serializer_class = WikipediaArticleListSerializer
     
     def get_is_liked(self, obj):
+        # Annotated by WikipediaArticle.objects.with_is_liked(user)
+        if hasattr(obj, 'user_liked'):
+            return obj.user_liked
+        # Provided by the view or by WikipediaArticleListSerializer
+        liked_ids = self.context.get('liked_ids')
+        if liked_ids is not None:
+            return obj.id in liked_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            try:
-                interaction = UserArticleInteraction.objects.get(
-                    user=request.user,
-                    article=obj
-                )
-                return interaction.liked
-            except UserArticleInteraction.DoesNotExist:
-                return False
+            return obj.id in liked_article_ids(request.user, [obj.id])
         return False
 
+def _datetime(value, tz):
+    # Same output as serializers.DateTimeField: current time zone, ISO 8601, 'Z' for UTC
+    value = value.astimezone(tz).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+def serialize_article_rows(rows, liked_ids, fields=None):
+    """Read-only fast path for lists: WikipediaArticleSerializer's output built
+    directly from ``WikipediaArticle.objects.listing_rows()`` dicts.
+
+    Skips field objects and per-field ``to_representation`` calls, which
+    dominate the cost of ModelSerializer for long lists. ``fields`` narrows
+    the output to a subset of WikipediaArticleSerializer.Meta.fields.
+    """
+    fields = fields or WikipediaArticleSerializer.Meta.fields
+    # created_at and is_liked come last in Meta.fields, so appending keeps the key order
+    plain = [field for field in fields if field not in ('created_at', 'is_liked')]
+    with_created_at = 'created_at' in fields
+    with_is_liked = 'is_liked' in fields
+    # Resolved once: timezone.localtime() per row costs more than the rest of the row
+    tz = timezone.get_current_timezone()
+    items = []
+    for row in rows:
+        item = {field: row[field] for field in plain}
+        if with_created_at:
+            item['created_at'] = _datetime(row['created_at'], tz)
+        if with_is_liked:
+            item['is_liked'] = row['id'] in liked_ids
+        items.append(item)
+    return items
+
 class UserArticleInteractionSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserArticleInteraction
         fields = ['id', 'article', 'liked', 'viewed', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
+
+class InteractionEventSerializer(serializers.Serializer):
+    article_id = serializers.IntegerField(min_value=1)
+    action = serializers.ChoiceField(choices=['like', 'unlike', 'view'])
+
+class InteractionBatchSerializer(serializers.Serializer):
+    events = InteractionEventSerializer(many=True, allow_empty=False, max_length=500)
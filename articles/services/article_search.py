@@ -0,0 +1,63 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from taskqueue.queue import enqueue
+
+from ..models import WikipediaArticle
+from .wikipedia_service import WikipediaService
+
+
+class ArticleSearchService:
+    """Answer searches from the local full-text index, topping up from MediaWiki.
+
+    In 'local' mode (ARTICLES_SEARCH_MODE) stored articles are searched
+    first; MediaWiki is only queried when fewer than
+    ARTICLES_LOCAL_SEARCH_MIN_RESULTS of them match, and its hits are then
+    merged ahead of the local ones. 'upstream' mode always asks MediaWiki.
+    Each method returns (articles, source) where source is 'local',
+    'upstream' or 'merged'.
+    """
+
+    @staticmethod
+    def local_enough(local):
+        return len(local) >= settings.ARTICLES_LOCAL_SEARCH_MIN_RESULTS
+
+    @staticmethod
+    def merge(upstream, local, limit):
+        """Upstream hits first, then local hits MediaWiki did not return"""
+        seen = {article.article_id for article in upstream}
+        merged = list(upstream) + [article for article in local if article.article_id not in seen]
+        return merged[:limit]
+
+    @staticmethod
+    def store(articles):
+        """Upsert upstream hits and queue their embeddings and categories lookups"""
+        stored = WikipediaArticle.objects.upsert(articles)
+        if stored:
+            enqueue('articles.tasks.embed_articles', {'article_ids': [article.id for article in stored]})
+            # One sweep at a time; it batches every article still missing categories
+            enqueue('articles.tasks.fetch_missing_categories', dedup_key='articles.tasks.fetch_missing_categories')
+        return stored
+
+    @staticmethod
+    def search(query, limit=10):
+        local = []
+        if settings.ARTICLES_SEARCH_MODE == 'local':
+            local = WikipediaArticle.objects.search(query, limit)
+            if ArticleSearchService.local_enough(local):
+                return local, 'local'
+
+        upstream = ArticleSearchService.store(WikipediaService.search_articles(query, limit))
+        return ArticleSearchService.merge(upstream, local, limit), 'merged' if local else 'upstream'
+
+    @staticmethod
+    async def async_search(query, limit=10, with_categories=False):
+        local = []
+        if settings.ARTICLES_SEARCH_MODE == 'local':
+            local = await sync_to_async(WikipediaArticle.objects.search)(query, limit)
+            if ArticleSearchService.local_enough(local):
+                return local, 'local'
+
+        articles = await WikipediaService.async_search_articles(query, limit, with_categories=with_categories)
+        upstream = await sync_to_async(ArticleSearchService.store)(articles)
+        return ArticleSearchService.merge(upstream, local, limit), 'merged' if local else 'upstream'
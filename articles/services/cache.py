@@ -0,0 +1,33 @@
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from common.cache import DjangoCacheBackend, LocalTTLCache
+
+CACHE_BACKENDS = {
+    'local': LocalTTLCache,
+    'django': DjangoCacheBackend,
+}
+
+
+def build_cache(config):
+    """Instantiate a cache backend from a settings dict ({'BACKEND': ..., **options})"""
+    options = {key.lower(): value for key, value in config.items() if key != 'BACKEND'}
+    backend = config.get('BACKEND', 'local')
+    backend_class = CACHE_BACKENDS.get(backend) or import_string(backend)
+    return backend_class(**options)
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """Return the process-wide cache used for Wikipedia search responses"""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = build_cache(getattr(settings, 'WIKIPEDIA_SEARCH_CACHE', {}))
+    return _search_cache
@@ -0,0 +1,117 @@
+"""Streaming readers for offline Wikipedia dumps.
+
+Each reader yields article dicts shaped like WikipediaService.parse_search
+output and holds at most one document in memory at a time.
+"""
+import bz2
+import gzip
+import json
+import xml.etree.ElementTree as ET
+from urllib.parse import quote
+
+from .wikipedia_service import WikipediaService
+
+WIKI_BASE_URL = "https://en.wikipedia.org/wiki/"
+ABSTRACT_TITLE_PREFIX = "Wikipedia: "
+# Abstracts dumps carry no page ids, so their rows are keyed by title instead
+ABSTRACT_ID_PREFIX = "title:"
+# Title prefixes of the non-main namespaces abstracts dumps may include
+NAMESPACE_PREFIXES = frozenset(
+    name + suffix
+    for name in ("User", "Wikipedia", "File", "MediaWiki", "Template", "Help", "Category",
+                 "Portal", "Draft", "TimedText", "Module")
+    for suffix in ("", " talk")
+) | {"Talk"}
+REDIRECT_PREFIX = "#redirect"
+
+
+def open_dump(path):
+    """Open a plain, .gz or .bz2 dump for binary streaming reads"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def detect_format(path):
+    """'abstract' for XML abstracts dumps, 'cirrus' for CirrusSearch JSON dumps"""
+    with open_dump(path) as f:
+        head = f.read(4096).lstrip()
+    if head.startswith(b"<"):
+        return "abstract"
+    if head.startswith(b"{"):
+        return "cirrus"
+    raise ValueError(f"Unrecognised dump format: {path}")
+
+
+def page_url(title, base_url=WIKI_BASE_URL):
+    return base_url + quote(title.replace(" ", "_"), safe="/:()',")
+
+
+def is_main_namespace(title):
+    prefix, sep, _ = title.partition(":")
+    return not sep or prefix not in NAMESPACE_PREFIXES
+
+
+def iter_abstracts(f, base_url=WIKI_BASE_URL):
+    """Yield main-namespace, non-redirect articles from an abstracts dump (<feed><doc><title/><url/><abstract/>...)"""
+    context = ET.iterparse(f, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event != "end" or elem.tag != "doc":
+            continue
+        title = (elem.findtext("title") or "").removeprefix(ABSTRACT_TITLE_PREFIX)
+        abstract = elem.findtext("abstract") or ""
+        if title and is_main_namespace(title) and not abstract.lstrip().lower().startswith(REDIRECT_PREFIX):
+            yield {
+                "article_id": ABSTRACT_ID_PREFIX + title,
+                "title": title,
+                "summary": WikipediaService.truncate_summary(abstract),
+                "url": elem.findtext("url") or page_url(title, base_url),
+                "image_url": None,
+                "categories": "",
+            }
+        # Drop the finished document so the tree never grows past one <doc>
+        root.clear()
+
+
+def iter_cirrus(f, base_url=WIKI_BASE_URL):
+    """Yield main-namespace articles from a CirrusSearch dump (bulk-API JSON lines).
+
+    Redirects have no documents of their own (they are listed in their
+    target's ``redirect`` field), so only target pages are yielded.
+    """
+    page_id = None
+    for line in f:
+        doc = json.loads(line)
+        if "index" in doc:
+            # Action line; the following line is the document it describes
+            page_id = doc["index"].get("_id")
+            continue
+        page_id, current = None, doc.get("page_id") or page_id
+        if doc.get("namespace", 0) != 0 or not current or not doc.get("title"):
+            continue
+        title = doc["title"]
+        yield {
+            "article_id": str(current),
+            "title": title,
+            "summary": WikipediaService.truncate_summary(doc.get("opening_text") or ""),
+            "url": page_url(title, base_url),
+            "image_url": None,
+            "categories": "|".join(doc.get("category") or []),
+        }
+
+
+DUMP_READERS = {
+    "abstract": iter_abstracts,
+    "cirrus": iter_cirrus,
+}
+
+
+def iter_dump(path, fmt="auto", base_url=WIKI_BASE_URL):
+    """Stream article dicts from the dump at ``path``"""
+    if fmt == "auto":
+        fmt = detect_format(path)
+    with open_dump(path) as f:
+        yield from DUMP_READERS[fmt](f, base_url)
@@ -0,0 +1,86 @@
+import re
+import zlib
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Embeddings are stored as raw little-endian float32 bytes: 4 bytes per dimension,
+# no per-row parsing and a zero-copy view via np.frombuffer
+EMBEDDING_DTYPE = np.dtype('<f4')
+
+
+def encode_embedding(vector):
+    """Serialize a vector (list or ndarray) to compact float32 bytes"""
+    if vector is None:
+        return None
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).ravel().tobytes()
+
+
+def decode_embedding(data):
+    """Return a read-only float32 array view over stored embedding bytes"""
+    if not data:
+        return None
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE)
+
+
+def normalize_rows(matrix):
+    """L2-normalize each row so a dot product is cosine similarity"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@lru_cache(maxsize=200_000)
+def _hash_feature(feature):
+    return zlib.crc32(feature.encode('utf-8'))
+
+
+class HashingEmbedder:
+    """Signed feature-hashing embedder over word unigrams and bigrams.
+
+    Needs no vocabulary, model files or network access, and produces the same
+    vector for the same text in every process, so batches can be embedded in
+    parallel and compared against vectors computed elsewhere.
+    """
+
+    def __init__(self, dim=256, ngrams=2):
+        self.dim = dim
+        self.ngrams = ngrams
+
+    def features(self, text):
+        tokens = TOKEN_RE.findall(text.lower())
+        for n in range(1, self.ngrams + 1):
+            for i in range(len(tokens) - n + 1):
+                yield " ".join(tokens[i:i + n])
+
+    def embed(self, texts):
+        """Embed a batch of texts into an (n, dim) float32 matrix of unit rows"""
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self.features(text or ""):
+                h = _hash_feature(feature)
+                rows.append(row)
+                cols.append(h % self.dim)
+                signs.append(1.0 if h & 0x80000000 else -1.0)
+
+        matrix = np.zeros((len(texts), self.dim), dtype=EMBEDDING_DTYPE)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), signs)
+        # Sublinear term frequency keeps long summaries from drowning the title
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        return normalize_rows(matrix).astype(EMBEDDING_DTYPE, copy=False)
+
+
+def article_text(title, summary):
+    """Text an article is embedded from; the title is repeated to weight it above the summary"""
+    return f"{title}\n{title}\n{summary or ''}"
+
+
+def get_embedder(path=None, dim=None):
+    """Instantiate the configured embedder (ARTICLES_EMBEDDER / ARTICLES_EMBEDDING_DIM)"""
+    embedder_class = import_string(path or settings.ARTICLES_EMBEDDER)
+    return embedder_class(dim=dim or settings.ARTICLES_EMBEDDING_DIM)
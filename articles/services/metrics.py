@@ -0,0 +1,278 @@
+"""Dependency-free metrics registry rendered in the Prometheus text format.
+
+Metrics live in the process that records them. With several gunicorn
+workers, point ARTICLES_METRICS_DIR at a directory they share: each worker
+periodically writes a snapshot there and ``/metrics`` sums all snapshots.
+
+Per-request SQL and upstream timings are collected through a context
+variable, so they are attributed correctly in sync views, async views and
+the ``sync_to_async`` threads those spawn.
+"""
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        for key, state in values.items():
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, state):
+                yield self.name + '_bucket', {**labels, 'le': repr(float(bound))}, count
+            yield self.name + '_bucket', {**labels, 'le': '+Inf'}, state[-2]
+            yield self.name + '_count', labels, state[-2]
+            yield self.name + '_sum', labels, state[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._last_export = 0.0
+
+    def counter(self, *args, **kwargs):
+        metric = Counter(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """``collector()`` yields (name, type, documentation, [(labels, value), ...]) at scrape time"""
+        self._collectors.append(collector)
+
+    def families(self):
+        """{name: {'type', 'help', 'samples': [[sample name, labels, value], ...]}} for this process"""
+        families = {}
+        for metric in self._metrics:
+            families[metric.name] = {
+                'type': metric.type,
+                'help': metric.documentation,
+                'samples': [list(sample) for sample in metric.samples()],
+            }
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                families[name] = {
+                    'type': metric_type,
+                    'help': documentation,
+                    'samples': [[name, labels, value] for labels, value in samples],
+                }
+        return families
+
+    def export(self, directory, min_interval=0.0):
+        """Write this process's snapshot to ``directory`` (at most once per ``min_interval``)"""
+        now = time.monotonic()
+        if now - self._last_export < min_interval:
+            return
+        self._last_export = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.families(), f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def merge(snapshots):
+        """Sum samples with identical names and labels across process snapshots"""
+        merged = {}
+        for families in snapshots:
+            for name, family in families.items():
+                target = merged.setdefault(name, {'type': family['type'], 'help': family['help'], 'samples': {}})
+                for sample_name, labels, value in family['samples']:
+                    key = (sample_name, tuple(sorted(labels.items())))
+                    target['samples'][key] = target['samples'].get(key, 0) + value
+        return {
+            name: {
+                'type': family['type'],
+                'help': family['help'],
+                'samples': [[sample_name, dict(labels), value] for (sample_name, labels), value in family['samples'].items()],
+            }
+            for name, family in merged.items()
+        }
+
+    def collect(self):
+        directory = settings.ARTICLES_METRICS_DIR
+        if not directory:
+            return self.families()
+        self.export(directory)
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return self.merge(snapshots)
+
+    def render(self):
+        lines = []
+        for name, family in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for sample_name, labels, value in family['samples']:
+                if labels:
+                    label_text = ','.join(
+                        f'{key}="{_escape(label_value)}"' for key, label_value in labels.items()
+                    )
+                    lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{sample_name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    return repr(float(value))
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Time spent handling requests', ['route', 'method', 'status'],
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    'http_request_db_queries', 'SQL queries issued per request', ['route'], buckets=QUERY_COUNT_BUCKETS,
+)
+DB_QUERY_SECONDS = registry.counter(
+    'db_query_seconds_total', 'Time spent in SQL queries', ['route'],
+)
+UPSTREAM_LATENCY = registry.histogram(
+    'mediawiki_request_duration_seconds', 'MediaWiki API call latency', ['status'],
+)
+
+
+class RequestStats:
+    __slots__ = ('started', 'queries', 'query_time', 'upstream_calls', 'upstream_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.upstream_calls = 0
+        self.upstream_time = 0.0
+
+
+_request_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+def start_request():
+    """Begin collecting stats for the current request; returns (stats, reset token)"""
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+
+def end_request(token):
+    _request_stats.reset(token)
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper attributing query count and time to the current request"""
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - started
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created receiver: time every query on every connection"""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def record_upstream(duration, status):
+    UPSTREAM_LATENCY.observe(duration, status=status)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.upstream_calls += 1
+        stats.upstream_time += duration
+
+
+def collect_cache_stats():
+    # Imported lazily: these modules pull in the models and HTTP clients
+    from .cache import get_search_cache
+    from .recommendations import RecommendationCache
+    from .singleflight import get_search_flight
+
+    caches = {
+        'search': get_search_cache().stats(),
+        'recommendations': RecommendationCache.stats(),
+    }
+    yield ('cache_hits_total', 'counter', 'Cache lookups answered from the cache',
+           [({'cache': name}, stats['hits']) for name, stats in caches.items()])
+    yield ('cache_misses_total', 'counter', 'Cache lookups that had to compute or fetch the value',
+           [({'cache': name}, stats['misses']) for name, stats in caches.items()])
+
+    flight = get_search_flight().stats()
+    yield ('search_singleflight_calls_total', 'counter', 'Upstream searches executed or coalesced into another',
+           [({'result': result}, flight[result]) for result in ('executed', 'coalesced_local', 'coalesced_remote')])
+
+
+registry.register_collector(collect_cache_stats)
@@ -0,0 +1,230 @@
+"""Token-bucket budget for MediaWiki calls, shared by every worker through PostgreSQL.
+
+The bucket is one ``UpstreamBudget`` row updated in a single statement per
+call, so web workers and task workers draw from the same budget. Callers
+pick a lane: ``interactive`` (searches) may drain the bucket, while
+``background`` (category sweeps, refreshes) only draws while more than
+BACKGROUND_RESERVE of the burst is left and never ahead of interactive
+callers waiting in the same process. A 429 from MediaWiki blocks every
+lane for its Retry-After; a ``maxlag`` error (only background requests
+send maxlag) blocks the background lane.
+Tokens are taken in autocommit: inside a transaction the bucket row would
+stay locked until it commits.
+"""
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from . import metrics
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+LANES = (INTERACTIVE, BACKGROUND)
+
+WAIT_SECONDS = metrics.registry.histogram(
+    'mediawiki_ratelimit_wait_seconds', 'Time spent waiting for a MediaWiki request token', ['lane'],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+THROTTLED = metrics.registry.counter(
+    'mediawiki_throttled_total', 'MediaWiki calls not made or refused because of the request budget',
+    ['lane', 'reason'],
+)
+
+
+class UpstreamThrottled(Exception):
+    """No request token was available in time, or MediaWiki asked us to back off"""
+
+    def __init__(self, reason, retry_after=None):
+        super().__init__(f"MediaWiki throttled ({reason}); retry after {retry_after or 0:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value, default):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - timezone.now()).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second up to ``burst``; one token per upstream call"""
+
+    def __init__(self, name, rate, burst, background_reserve=0.5, max_wait=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        # Tokens a lane must leave in the bucket
+        self.floors = {INTERACTIVE: 0.0, BACKGROUND: burst * background_reserve}
+        self.max_wait = {INTERACTIVE: 2.0, BACKGROUND: 60.0, **(max_wait or {})}
+        self._waiting = dict.fromkeys(LANES, 0)
+        self._lock = threading.Lock()
+
+    @property
+    def _table(self):
+        from ..models import UpstreamBudget
+
+        return UpstreamBudget._meta.db_table
+
+    def try_acquire(self, lane):
+        """Take a token if ``lane`` may have one now; returns (granted, seconds until it might)"""
+        if lane == BACKGROUND and self._waiting[INTERACTIVE]:
+            return False, 1 / self.rate
+        sql = f"""
+            WITH current AS (
+                SELECT name, at,
+                       least(%s, tokens + greatest(extract(epoch FROM at - updated_at)::float, 0) * %s) AS level,
+                       greatest(extract(epoch FROM CASE WHEN %s THEN greatest(blocked_until, background_blocked_until)
+                                                        ELSE blocked_until END - at)::float, 0) AS blocked
+                FROM {self._table}, clock_timestamp() AS at
+                WHERE name = %s
+                FOR UPDATE OF {self._table}
+            )
+            UPDATE {self._table} b
+            SET tokens = c.level - CASE WHEN c.blocked = 0 AND c.level >= %s THEN 1 ELSE 0 END,
+                updated_at = c.at
+            FROM current c
+            WHERE b.name = c.name
+            RETURNING c.blocked = 0 AND c.level >= %s, c.level, c.blocked
+        """
+        needed = self.floors[lane] + 1
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self.burst, self.rate, lane == BACKGROUND, self.name, needed, needed])
+            row = cursor.fetchone()
+            if row is None:
+                # First use: start full
+                cursor.execute(
+                    f"INSERT INTO {self._table} (name, tokens, updated_at) VALUES (%s, %s, clock_timestamp()) "
+                    "ON CONFLICT (name) DO NOTHING",
+                    [self.name, self.burst],
+                )
+                return self.try_acquire(lane)
+        granted, level, blocked = row
+        if granted:
+            return True, 0.0
+        return False, max(blocked, (needed - level) / self.rate)
+
+    def _sleep_time(self, deadline, wait):
+        # Jittered so workers woken together do not all retry at once
+        return min(wait * random.uniform(1.0, 1.2), max(deadline - time.monotonic(), 0.0))
+
+    def _begin(self, lane):
+        with self._lock:
+            self._waiting[lane] += 1
+        return time.monotonic()
+
+    def _end(self, lane, started, granted):
+        with self._lock:
+            self._waiting[lane] -= 1
+        WAIT_SECONDS.observe(time.monotonic() - started, lane=lane)
+        if not granted:
+            THROTTLED.inc(lane=lane, reason='budget')
+
+    def acquire(self, lane=INTERACTIVE):
+        """Block until a token is taken, or raise UpstreamThrottled after the lane's max wait"""
+        if self.rate <= 0:
+            return
+        started = self._begin(lane)
+        deadline = started + self.max_wait[lane]
+        granted = False
+        try:
+            while True:
+                granted, wait = self.try_acquire(lane)
+                if granted:
+                    return
+                if time.monotonic() + wait > deadline:
+                    raise UpstreamThrottled('budget', wait)
+                time.sleep(self._sleep_time(deadline, wait))
+        finally:
+            self._end(lane, started, granted)
+
+    async def aacquire(self, lane=INTERACTIVE):
+        """Async variant of acquire(); the bucket row is updated in a worker thread"""
+        if self.rate <= 0:
+            return
+        started = self._begin(lane)
+        deadline = started + self.max_wait[lane]
+        granted = False
+        try:
+            while True:
+                granted, wait = await sync_to_async(self.try_acquire)(lane)
+                if granted:
+                    return
+                if time.monotonic() + wait > deadline:
+                    raise UpstreamThrottled('budget', wait)
+                await asyncio.sleep(self._sleep_time(deadline, wait))
+        finally:
+            self._end(lane, started, granted)
+
+    def block(self, seconds, background_only=False):
+        """Stop every worker calling upstream (in the background lane only) for ``seconds``.
+
+        Never shortens a block already in place.
+        """
+        column = 'background_blocked_until' if background_only else 'blocked_until'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {self._table} SET {column} = greatest("
+                f"coalesce({column}, '-infinity'), clock_timestamp() + make_interval(secs => %s)"
+                f") WHERE name = %s",
+                [seconds, self.name],
+            )
+
+    def throttled(self, lane, reason, retry_after_header):
+        """Record an upstream back-off request and return the exception to raise"""
+        retry_after = parse_retry_after(retry_after_header, settings.WIKIPEDIA_RATE_LIMIT['DEFAULT_RETRY_AFTER'])
+        THROTTLED.inc(lane=lane, reason=reason)
+        if self.rate > 0:
+            self.block(retry_after, background_only=reason == 'maxlag')
+        return UpstreamThrottled(reason, retry_after)
+
+    async def athrottled(self, lane, reason, retry_after_header):
+        return await sync_to_async(self.throttled)(lane, reason, retry_after_header)
+
+    def waiting(self):
+        with self._lock:
+            return dict(self._waiting)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide TokenBucket for MediaWiki calls"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                config = settings.WIKIPEDIA_RATE_LIMIT
+                _limiter = TokenBucket(
+                    'mediawiki',
+                    rate=config['RATE'],
+                    burst=config['BURST'],
+                    background_reserve=config['BACKGROUND_RESERVE'],
+                    max_wait=config['MAX_WAIT'],
+                )
+    return _limiter
+
+
+def collect_ratelimit_stats():
+    waiting = get_rate_limiter().waiting()
+    yield ('mediawiki_ratelimit_waiting', 'gauge', 'Callers queued for a MediaWiki request token',
+           [({'lane': lane}, count) for lane, count in waiting.items()])
+
+
+metrics.registry.register_collector(collect_ratelimit_stats)
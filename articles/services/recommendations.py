@@ -0,0 +1,191 @@
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from taskqueue.queue import enqueue
+
+from ..models import UserArticleInteraction, UserRecommendations, WikipediaArticle
+from .embeddings import EMBEDDING_DTYPE, decode_embedding, encode_embedding
+from .vector_index import get_index
+
+
+class RecommendationEngine:
+    """Content-based recommender over the in-memory embedding matrix.
+
+    A user's profile is the sum of the unit embeddings of the articles they
+    liked; candidates are scored against it with one matrix-vector product
+    and the top k are selected with argpartition, skipping anything the user
+    has already viewed. Articles sharing categories with the likes (up to
+    ARTICLES_CATEGORY_CANDIDATES of them) are scored first and rank ahead;
+    the whole index only fills the rest of the list.
+    """
+
+    def __init__(self, index=None):
+        self.index = index if index is not None else get_index()
+
+    @staticmethod
+    def liked_ids(user):
+        return list(
+            UserArticleInteraction.objects
+            .filter(user=user, liked=True)
+            .values_list('article_id', flat=True)
+        )
+
+    @staticmethod
+    def viewed_ids(user):
+        return list(
+            UserArticleInteraction.objects
+            .filter(user=user, viewed=True)
+            .values_list('article_id', flat=True)
+        )
+
+    def profile_vector(self, article_ids):
+        """Sum of the (normalized) embeddings of ``article_ids`` present in the index"""
+        rows = self.index.rows(article_ids)
+        if not len(rows):
+            return None
+        return self.index.matrix[rows].sum(axis=0, dtype=EMBEDDING_DTYPE)
+
+    def recommend_ids(self, user, k=None):
+        """Return up to k recommended article ids for ``user``, best first"""
+        liked = self.liked_ids(user)
+        return self.rank(self.profile_vector(liked), self.viewed_ids(user), k, liked)
+
+    def rank(self, profile, exclude, k=None, liked=None):
+        """Top k article ids for a profile vector, excluding ``exclude``"""
+        k = k or settings.ARTICLES_RECOMMENDATION_LIMIT
+        if profile is None or not np.any(profile):
+            return self.fallback_ids(exclude, k)
+        ranked = []
+        if liked and settings.ARTICLES_CATEGORY_CANDIDATES:
+            candidates = WikipediaArticle.objects.sharing_categories(
+                liked, limit=settings.ARTICLES_CATEGORY_CANDIDATES, exclude_ids=exclude
+            )
+            ids, _ = self.index.search_among(profile, candidates, k)
+            ranked = ids.tolist()
+        if len(ranked) < k:
+            ids, _ = self.index.search(profile, k - len(ranked), exclude_ids=list(exclude) + ranked)
+            ranked += ids.tolist()
+        return ranked
+
+    @staticmethod
+    def fallback_ids(exclude, k):
+        """Cold start: newest stored articles the user has not seen"""
+        return list(
+            WikipediaArticle.objects
+            .exclude(id__in=exclude)
+            .order_by('-created_at')
+            .values_list('id', flat=True)[:k]
+        )
+
+    @staticmethod
+    def load_rows(ids):
+        """Fetch listing rows (dicts) for ``ids`` preserving their order"""
+        rows = {row['id']: row for row in WikipediaArticle.objects.filter(id__in=ids).listing_rows()}
+        return [rows[i] for i in ids if i in rows]
+
+
+class RecommendationCache:
+    """Per-user materialized recommendations stored in UserRecommendations.
+
+    Feed reads are a single primary-key lookup. A like toggle adds or
+    subtracts the toggled article's embedding to the stored profile and
+    adjusts the stored like count, an O(dim) update that never re-reads
+    the user's likes; lists older than ARTICLES_RECOMMENDATION_TTL are
+    rebuilt from scratch by a background task (served as-is meanwhile) so
+    newly embedded articles get picked up and any drift from incremental
+    updates is corrected.
+    """
+
+    _lock = threading.Lock()
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def _count(cls, hit):
+        with cls._lock:
+            if hit:
+                cls.hits += 1
+            else:
+                cls.misses += 1
+
+    @classmethod
+    def stats(cls):
+        total = cls.hits + cls.misses
+        return {
+            "hits": cls.hits,
+            "misses": cls.misses,
+            "hit_rate": cls.hits / total if total else 0.0,
+        }
+
+    @staticmethod
+    def age(entry):
+        """Seconds since ``entry`` was last computed"""
+        return (timezone.now() - entry.computed_at).total_seconds()
+
+    @classmethod
+    def get(cls, user):
+        """Return (entry, state) for ``user``; state is 'hit', 'stale' or 'miss'.
+
+        Only a user with no stored list waits for it to be built; an expired
+        one is returned while a deduplicated task rebuilds it.
+        """
+        entry = UserRecommendations.objects.filter(user=user).first()
+        if entry is None:
+            cls._count(False)
+            return cls.rebuild(user), 'miss'
+        cls._count(True)
+        if cls.age(entry) > settings.ARTICLES_RECOMMENDATION_TTL:
+            enqueue('articles.tasks.rebuild_recommendations', {'user_id': user.id},
+                    dedup_key=f"recommendations:{user.id}")
+            return entry, 'stale'
+        return entry, 'hit'
+
+    @staticmethod
+    def rebuild(user, engine=None):
+        """Recompute the profile from all likes and store a fresh list"""
+        engine = engine or RecommendationEngine()
+        liked = engine.liked_ids(user)
+        profile = engine.profile_vector(liked)
+        entry, _ = UserRecommendations.objects.update_or_create(
+            user=user,
+            defaults={
+                'profile': encode_embedding(profile),
+                'article_ids': engine.rank(profile, engine.viewed_ids(user), liked=liked),
+                'like_count': len(liked),
+                'computed_at': timezone.now(),
+            },
+        )
+        return entry
+
+    @classmethod
+    def apply_like(cls, user, article_id, liked, engine=None):
+        """Fold one like/unlike into the stored profile and re-rank.
+
+        Category candidates come from the toggled article alone when it is
+        liked (the next full rebuild uses all likes again).
+        """
+        engine = engine or RecommendationEngine()
+        with transaction.atomic():
+            entry = UserRecommendations.objects.select_for_update().filter(user=user).first()
+            if entry is None:
+                return cls.rebuild(user, engine)
+
+            vector = engine.index.vector(article_id)
+            profile = decode_embedding(entry.profile)
+            profile = np.zeros(engine.index.dim, dtype=EMBEDDING_DTYPE) if profile is None else profile.copy()
+            entry.like_count = max(entry.like_count + (1 if liked else -1), 0)
+            if not entry.like_count:
+                # Back to no likes: reset exactly rather than keep float residue
+                profile[:] = 0
+            elif vector is not None and profile.shape == vector.shape:
+                profile += vector if liked else -vector
+
+            entry.profile = encode_embedding(profile)
+            entry.article_ids = engine.rank(profile, engine.viewed_ids(user), liked=[article_id] if liked else None)
+            entry.computed_at = timezone.now()
+            entry.save(update_fields=['profile', 'article_ids', 'like_count', 'computed_at'])
+            return entry
@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+import uuid
+import weakref
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from common.cache import is_shared_alias
+
+from .cache import get_search_cache
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution.
+
+    Callers in the same process wait for the first caller's result. With
+    ``lock_alias`` naming a cache shared by all workers, the first worker to
+    take a lock key in it runs the call while the others poll ``result_cache``
+    for the value it stores, so ``fn`` must write its result there itself.
+    """
+
+    def __init__(self, result_cache, lock_alias=None, lock_timeout=15, poll_interval=0.05):
+        self.result_cache = result_cache
+        self.lock_alias = lock_alias or None
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self._lock = threading.Lock()
+        # asyncio futures are bound to their loop, so in-flight calls are tracked per loop
+        self._async_calls = weakref.WeakKeyDictionary()
+        self.executed = 0
+        self.coalesced_local = 0
+        self.coalesced_remote = 0
+
+    def _lock_key(self, key):
+        return f"singleflight:{key}"
+
+    def do(self, key, fn):
+        """Return ``fn()``, sharing one execution among concurrent callers of ``key``"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            with self._lock:
+                self.coalesced_local += 1
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._do_shared(key, fn)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _do_shared(self, key, fn):
+        if self.lock_alias is None:
+            return self._execute(fn)
+
+        lock_cache = caches[self.lock_alias]
+        lock_key = self._lock_key(key)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while not lock_cache.add(lock_key, token, self.lock_timeout):
+            # Another worker is fetching: wait for its result, or for the lock to
+            # be released or expire without one and take over
+            time.sleep(self.poll_interval)
+            value = self.result_cache.get(key)
+            if value is not None:
+                with self._lock:
+                    self.coalesced_remote += 1
+                return value
+            if time.monotonic() >= deadline:
+                return self._execute(fn)
+
+        try:
+            return self._execute(fn)
+        finally:
+            if lock_cache.get(lock_key) == token:
+                lock_cache.delete(lock_key)
+
+    def _execute(self, fn):
+        with self._lock:
+            self.executed += 1
+        return fn()
+
+    async def ado(self, key, fn):
+        """Async variant of do(); ``fn`` is a coroutine function"""
+        calls = self._async_calls.setdefault(asyncio.get_running_loop(), {})
+        future = calls.get(key)
+        if future is not None:
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    # This caller was cancelled, not the leader
+                    raise
+                # The leader was cancelled before finishing: make the call without it
+                return await self.ado(key, fn)
+            self.coalesced_local += 1
+            return result
+
+        future = calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._ado_shared(key, fn)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if not future.done():
+                # The leader was cancelled (CancelledError is not an Exception): wake
+                # the waiters rather than leave them awaiting a future nobody resolves
+                future.cancel()
+            del calls[key]
+
+    async def _ado_shared(self, key, fn):
+        if self.lock_alias is None:
+            self.executed += 1
+            return await fn()
+
+        lock_cache = caches[self.lock_alias]
+        lock_key = self._lock_key(key)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while not await lock_cache.aadd(lock_key, token, self.lock_timeout):
+            await asyncio.sleep(self.poll_interval)
+            value = await self.result_cache.aget(key)
+            if value is not None:
+                self.coalesced_remote += 1
+                return value
+            if time.monotonic() >= deadline:
+                self.executed += 1
+                return await fn()
+
+        try:
+            self.executed += 1
+            return await fn()
+        finally:
+            if await lock_cache.aget(lock_key) == token:
+                await lock_cache.adelete(lock_key)
+
+    def stats(self):
+        saved = self.coalesced_local + self.coalesced_remote
+        return {
+            "executed": self.executed,
+            "coalesced_local": self.coalesced_local,
+            "coalesced_remote": self.coalesced_remote,
+            "saved": saved,
+        }
+
+
+_search_flight = None
+_search_flight_lock = threading.Lock()
+
+
+def get_search_flight():
+    """Return the process-wide SingleFlight guarding upstream search calls.
+
+    Raises ImproperlyConfigured when a cross-process lock is configured but
+    the lock or the search cache is per-process: remote waiters poll the
+    search cache for the leader's result and would never see it.
+    """
+    global _search_flight
+    if _search_flight is None:
+        with _search_flight_lock:
+            if _search_flight is None:
+                config = getattr(settings, 'WIKIPEDIA_SEARCH_SINGLEFLIGHT', {})
+                result_cache = get_search_cache()
+                lock_alias = config.get('LOCK_ALIAS') or None
+                if lock_alias is not None:
+                    if not is_shared_alias(lock_alias):
+                        raise ImproperlyConfigured(
+                            f"WIKIPEDIA_SEARCH_SINGLEFLIGHT['LOCK_ALIAS'] {lock_alias!r} is a per-process cache"
+                        )
+                    if not getattr(result_cache, 'shared', False):
+                        raise ImproperlyConfigured(
+                            "WIKIPEDIA_SEARCH_SINGLEFLIGHT['LOCK_ALIAS'] needs a WIKIPEDIA_SEARCH_CACHE shared "
+                            "by all workers (the 'django' backend on a non-local CACHES alias)"
+                        )
+                _search_flight = SingleFlight(
+                    result_cache,
+                    lock_alias=lock_alias,
+                    lock_timeout=config.get('LOCK_TIMEOUT', 15),
+                    poll_interval=config.get('POLL_INTERVAL', 0.05),
+                )
+    return _search_flight
@@ -0,0 +1,141 @@
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models import ArticleTrendingScore, UserArticleInteraction
+
+# Fixed reference point for log scores; only differences between scores matter
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# Events older than this many decay constants contribute less than e^-10
+HORIZON = 10
+
+
+def _log_weight(weight, when, tau):
+    return math.log(weight) + (when - TRENDING_EPOCH).total_seconds() / tau
+
+
+def _logaddexp(a, b):
+    hi, lo = max(a, b), min(a, b)
+    return hi + math.log1p(math.exp(lo - hi))
+
+
+class TrendingService:
+    """Time-decayed like/view leaderboards for the configured windows"""
+
+    @staticmethod
+    def windows():
+        return settings.ARTICLES_TRENDING_WINDOWS
+
+    @staticmethod
+    def record(events):
+        """Fold (article_id, kind, timestamp) events into every window's score.
+
+        ``kind`` is a key of ARTICLES_TRENDING_WEIGHTS ('like' or 'view').
+        All windows are updated with one INSERT ... ON CONFLICT statement.
+        """
+        weights = settings.ARTICLES_TRENDING_WEIGHTS
+        combined = {}
+        for article_id, kind, when in events:
+            weight = weights.get(kind)
+            if not weight:
+                continue
+            for period, tau in TrendingService.windows().items():
+                key = (article_id, period)
+                value = _log_weight(weight, when, tau)
+                combined[key] = _logaddexp(combined[key], value) if key in combined else value
+        if not combined:
+            return
+
+        now = timezone.now()
+        table = ArticleTrendingScore._meta.db_table
+        placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(combined))
+        params = []
+        for (article_id, period), log_score in combined.items():
+            params.extend([article_id, period, log_score, now])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} AS t (article_id, period, log_score, updated_at)
+                VALUES {placeholders}
+                ON CONFLICT (article_id, period) DO UPDATE SET
+                    -- Clamped: EXP underflows (an error in PostgreSQL) once the
+                    -- scores are over ~745 decay constants apart
+                    log_score = GREATEST(t.log_score, EXCLUDED.log_score)
+                        + LN(1 + EXP(GREATEST(-ABS(t.log_score - EXCLUDED.log_score), -700))),
+                    updated_at = EXCLUDED.updated_at
+                """,
+                params,
+            )
+
+    @staticmethod
+    def top_ids(period, k=10):
+        """Ids of the k highest scoring articles in ``period``: an index range scan"""
+        return list(
+            ArticleTrendingScore.objects
+            .filter(period=period)
+            .order_by('-log_score')
+            .values_list('article_id', flat=True)[:k]
+        )
+
+    @staticmethod
+    def decayed_score(log_score, period, now=None):
+        """Convert a stored log score to the current decayed score"""
+        now = now or timezone.now()
+        tau = TrendingService.windows()[period]
+        return math.exp(log_score - (now - TRENDING_EPOCH).total_seconds() / tau)
+
+    @staticmethod
+    def window_scores_sql():
+        """Decayed score per article over interactions updated since a cutoff.
+
+        Reads only columns covered by interaction_updated_at_idx.
+        """
+        return f"""
+            SELECT article_id, SUM(
+                CASE WHEN liked THEN %s ELSE 0 END
+                    * EXP(GREATEST((EXTRACT(EPOCH FROM updated_at)::float8 - %s) / %s, -700))
+                + CASE WHEN viewed THEN %s ELSE 0 END
+                    * EXP(GREATEST((EXTRACT(EPOCH FROM created_at)::float8 - %s) / %s, -700))
+            )
+            FROM {UserArticleInteraction._meta.db_table}
+            WHERE updated_at >= %s
+            GROUP BY article_id
+        """
+
+    @staticmethod
+    def rebuild(period, min_score=0.01):
+        """Recompute one window from UserArticleInteraction and replace its leaderboard.
+
+        Articles whose decayed score is below ``min_score`` are dropped, which
+        also prunes entries that have decayed away since the last rebuild.
+        """
+        tau = TrendingService.windows()[period]
+        weights = settings.ARTICLES_TRENDING_WEIGHTS
+        now = timezone.now()
+        since = now - timedelta(seconds=tau * HORIZON)
+        now_epoch = now.timestamp()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                TrendingService.window_scores_sql(),
+                [weights['like'], now_epoch, tau, weights['view'], now_epoch, tau, since],
+            )
+            rows = cursor.fetchall()
+
+        offset = (now - TRENDING_EPOCH).total_seconds() / tau
+        scores = [
+            ArticleTrendingScore(
+                article_id=article_id, period=period,
+                log_score=math.log(score) + offset, updated_at=now,
+            )
+            for article_id, score in rows
+            if score and score >= min_score
+        ]
+        with transaction.atomic():
+            ArticleTrendingScore.objects.filter(period=period).delete()
+            ArticleTrendingScore.objects.bulk_create(scores, batch_size=2000)
+        return len(scores)
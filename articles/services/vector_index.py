@@ -0,0 +1,324 @@
+import fcntl
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+
+from .embeddings import EMBEDDING_DTYPE, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+# Names the current exported generation; replaced atomically by export_index()
+MANIFEST_NAME = 'index.json'
+
+
+class EmbeddingIndex:
+    """Exact cosine nearest-neighbour index over a dense float32 matrix.
+
+    Rows are L2-normalized once at build time, so a query is a single
+    matrix-vector product followed by an O(N) argpartition for the top k.
+    Ids are kept sorted, so id -> row lookups are a binary search with no
+    per-process mapping, and the matrix can be a read-only memory map of
+    an exported generation (see export_index).
+    """
+
+    def __init__(self, ids, matrix, normalized=False, generation=None):
+        ids = np.asarray(ids, dtype=np.int64)
+        matrix = np.asarray(matrix, dtype=EMBEDDING_DTYPE)
+        if len(ids) > 1 and np.any(ids[1:] < ids[:-1]):
+            order = np.argsort(ids, kind='stable')
+            ids, matrix = ids[order], matrix[order]
+        self.ids = ids
+        self.matrix = matrix if normalized else normalize_rows(matrix)
+        self.dim = self.matrix.shape[1] if self.matrix.ndim == 2 else 0
+        self.generation = generation
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self, article_ids):
+        """Row numbers of those ``article_ids`` present in the index, in the given order"""
+        wanted = np.fromiter(article_ids, dtype=np.int64)
+        if not len(wanted) or not len(self.ids):
+            return np.empty(0, dtype=np.intp)
+        rows = np.minimum(np.searchsorted(self.ids, wanted), len(self.ids) - 1)
+        return rows[self.ids[rows] == wanted]
+
+    def vector(self, article_id):
+        rows = self.rows([article_id])
+        return self.matrix[rows[0]] if len(rows) else None
+
+    @staticmethod
+    def _unit(vector):
+        query = np.asarray(vector, dtype=EMBEDDING_DTYPE).ravel()
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    @staticmethod
+    def _top(ids, scores, k):
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return ids[top], scores[top]
+
+    def scores(self, vector):
+        """Cosine similarity of ``vector`` against every row"""
+        return self.matrix @ self._unit(vector)
+
+    def search_among(self, vector, candidate_ids, k=10):
+        """Like search, scoring only the rows of ``candidate_ids``"""
+        rows = self.rows(candidate_ids)
+        if not len(rows) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=EMBEDDING_DTYPE)
+        scores = self.matrix[rows] @ self._unit(vector)
+        return self._top(self.ids[rows], scores, k)
+
+    def search(self, vector, k=10, exclude_ids=None):
+        """Return (ids, scores) of the k most similar rows, best first"""
+        if not len(self) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=EMBEDDING_DTYPE)
+
+        scores = self.scores(vector)
+        if exclude_ids:
+            scores[self.rows(exclude_ids)] = -np.inf
+
+        return self._top(self.ids, scores, k)
+
+    @classmethod
+    def from_queryset(cls, queryset, chunk_size=2000):
+        """Build an index from (id, embedding bytes) rows without decoding them one by one"""
+        ids, blobs, dim = [], [], None
+        for article_id, blob in embedding_rows(queryset, chunk_size):
+            if dim is None:
+                dim = len(blob) // EMBEDDING_DTYPE.itemsize
+            ids.append(article_id)
+            blobs.append(blob)
+
+        if not ids:
+            return cls(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=EMBEDDING_DTYPE))
+        matrix = np.frombuffer(b''.join(blobs), dtype=EMBEDDING_DTYPE).reshape(len(ids), dim)
+        return cls(ids, matrix)
+
+    @classmethod
+    def from_export(cls, directory):
+        """Memory-map the current exported generation read-only (None if there is none)"""
+        manifest = read_manifest(directory)
+        if manifest is None:
+            return None
+        ids = np.load(os.path.join(directory, manifest['ids']), mmap_mode='r')
+        matrix = np.load(os.path.join(directory, manifest['matrix']), mmap_mode='r')
+        count = manifest['count']
+        return cls(ids[:count], matrix[:count], normalized=True, generation=manifest['generation'])
+
+
+def embedding_rows(queryset, chunk_size=2000):
+    """Yield (id, embedding bytes) in id order, skipping rows whose dimension differs from the first"""
+    expected = None
+    rows = queryset.exclude(embedding__isnull=True).order_by('id').values_list('id', 'embedding')
+    for article_id, blob in rows.iterator(chunk_size=chunk_size):
+        blob = bytes(blob)
+        if not blob:
+            continue
+        if expected is None:
+            expected = len(blob)
+        if len(blob) != expected:
+            logger.warning("Skipping article %s: embedding dimension mismatch", article_id)
+            continue
+        yield article_id, blob
+
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def export_index(directory, queryset=None, chunk_size=2000):
+    """Write stored embeddings to ``directory`` as a new memory-mappable generation.
+
+    Produces ``embeddings-<generation>.npy`` (normalized float32 rows) and
+    ``ids-<generation>.npy`` (sorted int64 article ids), then points
+    index.json at them with an atomic rename, so readers see either the
+    previous generation or the complete new one. Files older than the
+    previous generation are removed. Returns the new manifest.
+    """
+    from ..models import WikipediaArticle
+
+    queryset = queryset if queryset is not None else WikipediaArticle.objects.all()
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        # One exporter at a time per directory
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        previous = read_manifest(directory)
+        generation = previous['generation'] + 1 if previous else 1
+        names = {'ids': f'ids-{generation}.npy', 'matrix': f'embeddings-{generation}.npy'}
+
+        rows = embedding_rows(queryset, chunk_size)
+        first = next(rows, None)
+        dim = len(first[1]) // EMBEDDING_DTYPE.itemsize if first else 0
+        # Rows are streamed straight into the file. The count is an upper
+        # bound: rows embedded meanwhile are left for the next generation
+        capacity = queryset.exclude(embedding__isnull=True).count() if first else 0
+        matrix = np.lib.format.open_memmap(
+            os.path.join(directory, names['matrix']), mode='w+', dtype=EMBEDDING_DTYPE, shape=(capacity, dim)
+        )
+        ids = np.empty(capacity, dtype=np.int64)
+        count = 0
+
+        def write(batch_ids, batch_blobs):
+            nonlocal count
+            block = np.frombuffer(b''.join(batch_blobs), dtype=EMBEDDING_DTYPE).reshape(len(batch_ids), dim)
+            matrix[count:count + len(batch_ids)] = normalize_rows(block)
+            ids[count:count + len(batch_ids)] = batch_ids
+            count += len(batch_ids)
+
+        batch_ids, batch_blobs = [], []
+        for article_id, blob in itertools.chain([first] if first else [], rows):
+            if count + len(batch_ids) >= capacity:
+                break
+            batch_ids.append(article_id)
+            batch_blobs.append(blob)
+            if len(batch_ids) >= chunk_size:
+                write(batch_ids, batch_blobs)
+                batch_ids, batch_blobs = [], []
+        if batch_ids:
+            write(batch_ids, batch_blobs)
+        matrix.flush()
+        del matrix
+        np.save(os.path.join(directory, names['ids']), ids[:count])
+
+        manifest = {'generation': generation, 'count': count, 'dim': dim, **names}
+        tmp_path = os.path.join(directory, f'{MANIFEST_NAME}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(directory, MANIFEST_NAME))
+
+        # Workers that have not swapped yet still map the previous generation
+        for name in os.listdir(directory):
+            stem, _, extension = name.rpartition('.')
+            prefix, _, number = stem.rpartition('-')
+            if extension == 'npy' and prefix in ('ids', 'embeddings') and number.isdigit() \
+                    and int(number) < generation - 1:
+                os.remove(os.path.join(directory, name))
+        return manifest
+
+
+_index = None
+_index_loaded_at = 0.0
+_index_lock = threading.Lock()
+# (mtime, inode) of the manifest the current exported index was mapped from
+_manifest_stamp = None
+# Thread reloading an expired database-loaded index, if one is running
+_reload_thread = None
+
+
+def _manifest_stat(directory):
+    try:
+        stat = os.stat(os.path.join(directory, MANIFEST_NAME))
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_ino
+
+
+def _get_exported_index(directory):
+    """The mapped current generation, swapped when the manifest changes (None if never exported)"""
+    global _index, _manifest_stamp
+    # One stat per call is cheap next to scoring and makes a swap take effect at once
+    stamp = _manifest_stat(directory)
+    if stamp is None:
+        return None
+    if _index is not None and stamp == _manifest_stamp:
+        return _index
+    with _index_lock:
+        if _index is None or stamp != _manifest_stamp:
+            index = EmbeddingIndex.from_export(directory)
+            if index is None:
+                return None
+            _index, _manifest_stamp = index, stamp
+            logger.info("Mapped embedding index generation %s with %d vectors", index.generation, len(index))
+        return _index
+
+
+def _load_from_database():
+    """Build the index from stored embeddings and install it; call with _index_lock held"""
+    global _index, _index_loaded_at, _manifest_stamp
+    from ..models import WikipediaArticle
+
+    _index = EmbeddingIndex.from_queryset(WikipediaArticle.objects.all())
+    _index_loaded_at = time.monotonic()
+    _manifest_stamp = None
+    logger.info("Loaded embedding index with %d vectors", len(_index))
+
+
+def _reload():
+    global _index, _index_loaded_at, _manifest_stamp
+    from ..models import WikipediaArticle
+
+    try:
+        # Built outside the lock: requests keep getting the previous index meanwhile
+        index = EmbeddingIndex.from_queryset(WikipediaArticle.objects.all())
+        with _index_lock:
+            _index, _index_loaded_at, _manifest_stamp = index, time.monotonic(), None
+        logger.info("Reloaded embedding index with %d vectors", len(index))
+    except Exception:
+        logger.exception("Reloading the embedding index failed; serving the previous one")
+        with _index_lock:
+            # Retry after another TTL rather than on the next request
+            _index_loaded_at = time.monotonic()
+    finally:
+        # Only this thread's connection
+        connections.close_all()
+
+
+def _start_reload():
+    """Reload the index from the database in a background thread, unless one already is"""
+    global _reload_thread
+    with _index_lock:
+        if _reload_thread is not None and _reload_thread.is_alive():
+            return
+        _reload_thread = threading.Thread(target=_reload, name='embedding-index-reload', daemon=True)
+        _reload_thread.start()
+
+
+def get_index():
+    """Return the process-wide embedding index.
+
+    With ARTICLES_VECTOR_INDEX_DIR set, the exported generation is
+    memory-mapped, so every worker shares the same pages, and is replaced
+    by a newer generation as soon as one is published. Otherwise (or until
+    a first export exists) the index is loaded from the database; once it
+    is older than ARTICLES_VECTOR_INDEX_TTL it keeps being served while a
+    background thread loads the replacement. Only the first load blocks.
+    """
+    directory = getattr(settings, 'ARTICLES_VECTOR_INDEX_DIR', '')
+    if directory:
+        index = _get_exported_index(directory)
+        if index is not None:
+            return index
+
+    index = _index
+    if index is None:
+        with _index_lock:
+            # Callers arriving during the first load wait for it instead of repeating it
+            if _index is None:
+                _load_from_database()
+            index = _index
+    elif time.monotonic() - _index_loaded_at > getattr(settings, 'ARTICLES_VECTOR_INDEX_TTL', 600):
+        _start_reload()
+    return index
+
+
+def invalidate_index():
+    """Force the next get_index() call to reload (from the export or the database)"""
+    global _index
+    with _index_lock:
+        _index = None
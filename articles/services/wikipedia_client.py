@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+import weakref
+
+import aiohttp
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .metrics import record_upstream
+from .ratelimit import BACKGROUND, INTERACTIVE, get_rate_limiter
+
+
+class WikipediaClient:
+    """Thin MediaWiki API client sharing one keep-alive connection pool"""
+
+    def __init__(self, api_url=None, connect_timeout=None, read_timeout=None,
+                 pool_maxsize=None, max_retries=None, user_agent=None):
+        self.api_url = api_url or settings.WIKIPEDIA_API_URL
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else settings.WIKIPEDIA_CONNECT_TIMEOUT,
+            read_timeout if read_timeout is not None else settings.WIKIPEDIA_READ_TIMEOUT,
+        )
+        pool_maxsize = pool_maxsize or settings.WIKIPEDIA_POOL_MAXSIZE
+        retries = Retry(
+            total=settings.WIKIPEDIA_MAX_RETRIES if max_retries is None else max_retries,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            # A 429's Retry-After is honoured by the shared budget, not by sleeping here
+            respect_retry_after_header=False,
+        )
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent or settings.WIKIPEDIA_USER_AGENT
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, params, lane=INTERACTIVE):
+        """Issue a GET against the API and return the decoded JSON body.
+
+        Waits for a token from the shared request budget first. Raises
+        UpstreamThrottled when none comes in time or MediaWiki asks us to
+        back off (HTTP 429 or a maxlag error).
+        """
+        limiter = get_rate_limiter()
+        limiter.acquire(lane)
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            response = self.session.get(self.api_url, params=with_maxlag(params, lane), timeout=self.timeout)
+            status = response.status_code
+            if response.status_code == 429:
+                raise limiter.throttled(lane, 'rate_limited', response.headers.get('Retry-After'))
+            response.raise_for_status()
+            data = response.json()
+            if is_maxlag(data):
+                status = 'maxlag'
+                raise limiter.throttled(lane, 'maxlag', response.headers.get('Retry-After'))
+            return data
+        finally:
+            record_upstream(time.perf_counter() - started, status)
+
+    def close(self):
+        self.session.close()
+
+
+def with_maxlag(params, lane):
+    """Background requests ask MediaWiki to refuse them while its replicas lag"""
+    if lane == BACKGROUND and settings.WIKIPEDIA_MAXLAG:
+        return {**params, "maxlag": settings.WIKIPEDIA_MAXLAG}
+    return params
+
+
+def is_maxlag(data):
+    return isinstance(data, dict) and data.get("error", {}).get("code") == "maxlag"
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide WikipediaClient, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = WikipediaClient()
+    return _client
+
+
+class AsyncWikipediaClient:
+    """aiohttp-based MediaWiki client for ASGI views, one connection pool per event loop"""
+
+    def __init__(self, api_url=None, connect_timeout=None, read_timeout=None,
+                 pool_maxsize=None, user_agent=None):
+        self.api_url = api_url or settings.WIKIPEDIA_API_URL
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout if connect_timeout is not None else settings.WIKIPEDIA_CONNECT_TIMEOUT,
+            sock_read=read_timeout if read_timeout is not None else settings.WIKIPEDIA_READ_TIMEOUT,
+        )
+        # Must be created inside the running loop it will be used from
+        self.session = aiohttp.ClientSession(
+            timeout=timeout,
+            connector=aiohttp.TCPConnector(limit=pool_maxsize or settings.WIKIPEDIA_ASYNC_POOL_MAXSIZE),
+            headers={"User-Agent": user_agent or settings.WIKIPEDIA_USER_AGENT},
+            raise_for_status=True,
+        )
+
+    async def get(self, params, lane=INTERACTIVE):
+        limiter = get_rate_limiter()
+        await limiter.aacquire(lane)
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            async with self.session.get(self.api_url, params=with_maxlag(params, lane)) as response:
+                status = response.status
+                data = await response.json(content_type=None)
+                if is_maxlag(data):
+                    status = 'maxlag'
+                    raise await limiter.athrottled(lane, 'maxlag', response.headers.get('Retry-After'))
+                return data
+        except aiohttp.ClientResponseError as e:
+            status = e.status
+            if e.status == 429:
+                raise await limiter.athrottled(
+                    lane, 'rate_limited', e.headers.get('Retry-After') if e.headers else None
+                ) from e
+            raise
+        finally:
+            record_upstream(time.perf_counter() - started, status)
+
+    async def get_many(self, params_list, lane=INTERACTIVE):
+        """Issue several API calls concurrently; results keep the input order"""
+        return await asyncio.gather(*(self.get(params, lane) for params in params_list))
+
+    async def aclose(self):
+        await self.session.close()
+
+
+# aiohttp sessions are bound to the loop that created them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """Return the AsyncWikipediaClient for the running event loop.
+
+    Its session is closed when the loop shuts down: asyncio.run() (used by
+    ASGI servers and by asgiref's async_to_sync) cancels leftover tasks
+    before closing the loop, which wakes the watcher task started here.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncWikipediaClient()
+        # The loop only keeps weak references to its tasks
+        client.closer = loop.create_task(close_on_shutdown(client))
+    return client
+
+
+async def close_on_shutdown(client):
+    """Wait until cancelled by loop shutdown, then close ``client``'s session"""
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        await client.aclose()
@@ -1,61 +1,320 @@
-import requests
+import logging
+
+from django.conf import settings
+
+from . import metrics
+from .cache import get_search_cache
+from .ratelimit import BACKGROUND, INTERACTIVE, UpstreamThrottled
+from .singleflight import get_search_flight
+from .wikipedia_client import get_async_client, get_client
+
+logger = logging.getLogger(__name__)
+
+STALE_SEARCHES = metrics.registry.counter(
+    'search_stale_responses_total', 'Searches answered while MediaWiki was throttled', ['result'],
+)
+
 
 class WikipediaService:
+    # Titles per prop=categories request (the API limit for non-bot clients)
+    CATEGORY_BATCH_SIZE = 50
+    # Page ids per fetch_pages request (the same limit)
+    PAGE_BATCH_SIZE = 50
+
+    @staticmethod
+    def normalize_query(query):
+        """Collapse case and whitespace so equivalent searches share a cache key"""
+        return " ".join(query.lower().split())
+
+    @staticmethod
+    def search_cache_key(query, limit, with_categories=False):
+        suffix = ":categories" if with_categories else ""
+        return f"search:{limit}{suffix}:{WikipediaService.normalize_query(query)}"
+
+    @staticmethod
+    def search_params(query, limit):
+        # Use MediaWiki API with generator=search for efficiency
+        return {
+            "action": "query",
+            "format": "json",
+            "generator": "search",
+            "gsrsearch": query,
+            "gsrlimit": limit,
+            "prop": "extracts|pageimages|info",
+            "exintro": 1,
+            "explaintext": 1,
+            "piprop": "thumbnail",
+            "pithumbsize": 500,
+            "pilimit": limit,
+            "inprop": "url"
+        }
+
+    @staticmethod
+    def pages_params(page_ids):
+        """Summary, thumbnail and URL of up to PAGE_BATCH_SIZE pages given by id"""
+        return {
+            "action": "query",
+            "format": "json",
+            "pageids": "|".join(str(page_id) for page_id in page_ids),
+            "prop": "extracts|pageimages|info",
+            "exintro": 1,
+            "explaintext": 1,
+            # Intro extracts come 20 pages per response; the rest follow via continue
+            "exlimit": "max",
+            "piprop": "thumbnail",
+            "pithumbsize": 500,
+            "pilimit": "max",
+            "inprop": "url"
+        }
+
+    @staticmethod
+    def categories_params(query, limit):
+        """Same search generator, asking only for each hit's visible categories"""
+        return {
+            "action": "query",
+            "format": "json",
+            "generator": "search",
+            "gsrsearch": query,
+            "gsrlimit": limit,
+            "prop": "categories",
+            "clshow": "!hidden",
+            "cllimit": "max",
+        }
+
+    @staticmethod
+    def title_categories_params(titles):
+        """Visible categories of up to CATEGORY_BATCH_SIZE pages given by title"""
+        return {
+            "action": "query",
+            "format": "json",
+            "titles": "|".join(titles),
+            "prop": "categories",
+            "clshow": "!hidden",
+            "cllimit": "max",
+        }
+
+    @staticmethod
+    def category_names(page_info):
+        """A page's category names without the 'Category:' prefix"""
+        return [c["title"].split(":", 1)[-1] for c in page_info.get("categories", [])]
+
+    @staticmethod
+    def parse_categories(data):
+        """Map page id -> '|'-joined category names"""
+        categories = {}
+        for page_id, page_info in data.get("query", {}).get("pages", {}).items():
+            categories[str(page_id)] = "|".join(WikipediaService.category_names(page_info))
+        return categories
+
+    @staticmethod
+    def query_continued(params, lane=INTERACTIVE):
+        """Yield every response of a query, following MediaWiki ``continue`` tokens"""
+        client = get_client()
+        continuation = {}
+        while True:
+            data = client.get({**params, **continuation}, lane)
+            yield data
+            if "continue" not in data:
+                return
+            continuation = data["continue"]
+
+    @staticmethod
+    def fetch_categories(titles, lane=BACKGROUND):
+        """Map each of ``titles`` to its list of visible category names.
+
+        Sends one request per CATEGORY_BATCH_SIZE titles; a batch whose
+        categories exceed one response (cllimit) is continued until complete.
+        Titles MediaWiki does not know map to an empty list. Raises on
+        upstream errors (including UpstreamThrottled) so a caller can retry.
+        """
+        titles = list(dict.fromkeys(titles))
+        categories = {title: [] for title in titles}
+        for start in range(0, len(titles), WikipediaService.CATEGORY_BATCH_SIZE):
+            batch = titles[start:start + WikipediaService.CATEGORY_BATCH_SIZE]
+            params = WikipediaService.title_categories_params(batch)
+            # Pages come back under their normalized title ("foo bar" -> "Foo bar")
+            aliases = {}
+            for data in WikipediaService.query_continued(params, lane):
+                query = data.get("query", {})
+                for item in query.get("normalized", []):
+                    aliases.setdefault(item["to"], set()).add(item["from"])
+                for page_info in query.get("pages", {}).values():
+                    title = page_info.get("title", "")
+                    names = WikipediaService.category_names(page_info)
+                    for requested in {title, *aliases.get(title, ())}:
+                        if requested in categories:
+                            categories[requested].extend(names)
+        return categories
+
+    @staticmethod
+    def truncate_summary(summary):
+        return summary[:500] + "..." if len(summary) > 500 else summary
+
+    @staticmethod
+    def parse_search(data, query, categories=None):
+        """Turn a generator=search response into article dicts"""
+        articles = []
+        pages = data.get("query", {}).get("pages", {})
+
+        if not pages:
+            logger.info("No results found for query: %s", query)
+            return []
+
+        # Sort pages to ensure consistent ordering
+        for page_id, page_info in sorted(pages.items(), key=lambda item: int(item[0])):
+            # Categories are only filled when the caller fetched them alongside the search
+            page_categories = (categories or {}).get(str(page_id), "")
+            articles.append(WikipediaService.page_article(page_id, page_info, page_categories))
+
+        logger.info("Found %d articles for query: %s", len(articles), query)
+        return articles
+
+    @staticmethod
+    def page_article(page_id, page_info, categories=""):
+        """Turn one page of a prop=extracts|pageimages|info response into an article dict"""
+        title = page_info.get("title", "")
+        summary = page_info.get("extract", "")
+        url = page_info.get("fullurl", f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}")
+
+        # Get image if available
+        image_url = None
+        if "thumbnail" in page_info:
+            image_url = page_info["thumbnail"]["source"]
+
+        return {
+            "article_id": str(page_id),
+            "title": title,
+            "summary": WikipediaService.truncate_summary(summary),
+            "url": url,
+            "image_url": image_url,
+            "categories": categories,
+        }
+
+    @staticmethod
+    def fetch_pages(page_ids, lane=BACKGROUND):
+        """Yield (requested ids, article dicts) for ``page_ids``, PAGE_BATCH_SIZE pages per request.
+
+        Each batch's responses (continued until complete, since a page's
+        extract may come in a later one) are merged and yielded before the
+        next batch is requested, so callers can store them as they arrive.
+        Missing or invalid pages have no article. Raises on upstream errors
+        (including UpstreamThrottled).
+        """
+        page_ids = list(dict.fromkeys(str(page_id) for page_id in page_ids))
+        for start in range(0, len(page_ids), WikipediaService.PAGE_BATCH_SIZE):
+            batch = page_ids[start:start + WikipediaService.PAGE_BATCH_SIZE]
+            pages = {}
+            for data in WikipediaService.query_continued(WikipediaService.pages_params(batch), lane):
+                for page_id, page_info in data.get("query", {}).get("pages", {}).items():
+                    pages.setdefault(str(page_id), {}).update(page_info)
+            yield batch, [
+                WikipediaService.page_article(page_id, pages[page_id])
+                for page_id in batch
+                if page_id in pages and "missing" not in pages[page_id] and "invalid" not in pages[page_id]
+            ]
+
+    @staticmethod
+    def stale_key(cache_key):
+        return f"stale:{cache_key}"
+
+    @staticmethod
+    def stale_result(articles, query, error):
+        """Count and log a search answered from its stale copy (or not at all)"""
+        STALE_SEARCHES.inc(result='miss' if articles is None else 'hit')
+        logger.warning("MediaWiki search for %r throttled, %s: %s",
+                       query, "no stale copy" if articles is None else "serving stale results", error)
+        return articles
+
     @staticmethod
     def search_articles(query, limit=10):
-        """Search for Wikipedia articles using MediaWiki API directly"""
+        """Search for Wikipedia articles, serving repeated queries from the response cache.
+
+        While MediaWiki is throttled the last response for the query is
+        served, for up to WIKIPEDIA_SEARCH_STALE_TTL after it was fetched.
+        """
+        cache = get_search_cache()
+        cache_key = WikipediaService.search_cache_key(query, limit)
+        articles = cache.get(cache_key)
+        if articles is not None:
+            return articles
+
+        def fetch():
+            # Concurrent identical searches wait for this one instead of calling upstream.
+            # A leader that missed the cache just before another finished storing
+            # the result serves it rather than fetching again
+            articles = cache.get(cache_key)
+            if articles is not None:
+                return articles
+            stale_key = WikipediaService.stale_key(cache_key)
+            try:
+                articles = WikipediaService._fetch_search(query, limit)
+            except UpstreamThrottled as e:
+                return WikipediaService.stale_result(cache.get(stale_key), query, e)
+            if articles is not None:
+                cache.set(cache_key, articles)
+                cache.set(stale_key, articles, settings.WIKIPEDIA_SEARCH_STALE_TTL)
+            return articles
+
+        articles = get_search_flight().do(cache_key, fetch)
+        return articles if articles is not None else []
+
+    @staticmethod
+    def _fetch_search(query, limit):
+        """Search for Wikipedia articles using MediaWiki API directly.
+
+        Returns None when the upstream call fails so errors are never cached,
+        and raises UpstreamThrottled when it was not made or refused.
+        """
         try:
-            # Use MediaWiki API with generator=search for efficiency
-            api_url = "https://en.wikipedia.org/w/api.php"
-            params = {
-                "action": "query",
-                "format": "json",
-                "generator": "search",
-                "gsrsearch": query,
-                "gsrlimit": limit,
-                "prop": "extracts|pageimages|info",
-                "exintro": 1,
-                "explaintext": 1,
-                "piprop": "thumbnail",
-                "pithumbsize": 500,
-                "pilimit": limit,
-                "inprop": "url"
-            }
-            
-            response = requests.get(api_url, params=params)
-            data = response.json()
-            
-            articles = []
-            pages = data.get("query", {}).get("pages", {})
-            
-            if not pages:
-                print(f"No results found for query: {query}")
-                return []
-            
-            # Sort pages to ensure consistent ordering
-            for page_id, page_info in sorted(pages.items(), key=lambda item: int(item[0])):
-                title = page_info.get("title", "")
-                summary = page_info.get("extract", "")
-                url = page_info.get("fullurl", f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}")
-                
-                # Get image if available
-                image_url = None
-                if "thumbnail" in page_info:
-                    image_url = page_info["thumbnail"]["source"]
-                
-                article = {
-                    "article_id": str(page_id),
-                    "title": title,
-                    "summary": summary[:500] + "..." if len(summary) > 500 else summary,
-                    "url": url,
-                    "image_url": image_url,
-                    "categories": ""  # Simplified - no categories for better performance
-                }
-                
-                articles.append(article)
-            
-            print(f"Found {len(articles)} articles for query: {query}")
+            data = get_client().get(WikipediaService.search_params(query, limit))
+            return WikipediaService.parse_search(data, query)
+        except UpstreamThrottled:
+            raise
+        except Exception:
+            logger.exception("Error in MediaWiki search for query: %s", query)
+            return None
+
+    @staticmethod
+    async def async_search_articles(query, limit=10, with_categories=False):
+        """Async variant of search_articles for ASGI views.
+
+        With ``with_categories`` the search and a categories lookup for the
+        same hits are sent concurrently and merged.
+        """
+        cache = get_search_cache()
+        cache_key = WikipediaService.search_cache_key(query, limit, with_categories)
+        articles = await cache.aget(cache_key)
+        if articles is not None:
+            return articles
+
+        async def fetch():
+            articles = await cache.aget(cache_key)
+            if articles is not None:
+                return articles
+            stale_key = WikipediaService.stale_key(cache_key)
+            try:
+                articles = await WikipediaService._afetch_search(query, limit, with_categories)
+            except UpstreamThrottled as e:
+                return WikipediaService.stale_result(await cache.aget(stale_key), query, e)
+            if articles is not None:
+                await cache.aset(cache_key, articles)
+                await cache.aset(stale_key, articles, settings.WIKIPEDIA_SEARCH_STALE_TTL)
             return articles
-        except Exception as e:
-            print(f"Error in MediaWiki search: {e}")
-            return []
\ No newline at end of file
+
+        articles = await get_search_flight().ado(cache_key, fetch)
+        return articles if articles is not None else []
+
+    @staticmethod
+    async def _afetch_search(query, limit, with_categories):
+        try:
+            requests = [WikipediaService.search_params(query, limit)]
+            if with_categories:
+                requests.append(WikipediaService.categories_params(query, limit))
+            responses = await get_async_client().get_many(requests)
+            categories = WikipediaService.parse_categories(responses[1]) if with_categories else None
+            return WikipediaService.parse_search(responses[0], query, categories)
+        except UpstreamThrottled:
+            raise
+        except Exception:
+            logger.exception("Error in MediaWiki search for query: %s", query)
+            return None
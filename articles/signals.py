@@ -0,0 +1,38 @@
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from taskqueue.queue import enqueue
+
+# Sent after a like is toggled: user, article_id, liked, first_like (the user's
+# first like of the article, as opposed to a re-like after an unlike)
+article_like_toggled = Signal()
+
+# Sent when articles are marked viewed for the first time: user, article_ids
+article_viewed = Signal()
+
+
+# Receivers only queue work (see articles.tasks) so the request returns immediately
+
+@receiver(article_like_toggled)
+def update_recommendations_on_like(sender, user, article_id, liked, **kwargs):
+    from .tasks import apply_like
+
+    enqueue(apply_like, {'user_id': user.id, 'article_id': article_id, 'liked': liked})
+
+
+@receiver(article_like_toggled)
+def record_trending_on_like(sender, user, article_id, liked, first_like=True, **kwargs):
+    from .tasks import record_trending
+
+    # Unlike/re-like toggles add no weight: each user's like counts once per article
+    if liked and first_like:
+        enqueue(record_trending, {'events': [[article_id, 'like', timezone.now().isoformat()]]})
+
+
+@receiver(article_viewed)
+def record_trending_on_view(sender, user, article_ids, **kwargs):
+    from .tasks import record_trending
+
+    if article_ids:
+        now = timezone.now().isoformat()
+        enqueue(record_trending, {'events': [[article_id, 'view', now] for article_id in article_ids]})
@@ -0,0 +1,107 @@
+"""Background tasks run by `manage.py run_workers` (see the taskqueue app)"""
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from taskqueue.queue import enqueue
+from taskqueue.registry import task
+
+from .models import WikipediaArticle
+from .services.embeddings import article_text, encode_embedding, get_embedder
+from .services.ratelimit import UpstreamThrottled
+from .services.recommendations import RecommendationCache
+from .services.trending import TrendingService
+from .services.vector_index import export_index
+from .services.wikipedia_service import WikipediaService
+
+
+@task()
+def apply_like(user_id, article_id, liked):
+    """Fold a like toggle into the user's stored recommendations"""
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is not None:
+        RecommendationCache.apply_like(user, article_id, liked)
+
+
+@task()
+def rebuild_recommendations(user_id):
+    """Recompute a user's recommendations from all their likes"""
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is not None:
+        RecommendationCache.rebuild(user)
+
+
+@task()
+def record_trending(events):
+    """Fold [article_id, kind, ISO timestamp] events into the trending scores"""
+    TrendingService.record([
+        (article_id, kind, datetime.fromisoformat(when)) for article_id, kind, when in events
+    ])
+
+
+@task()
+def embed_articles(article_ids):
+    """Embed those of ``article_ids`` that have no embedding yet"""
+    articles = list(
+        WikipediaArticle.objects
+        .filter(id__in=article_ids, embedding__isnull=True)
+        .only('id', 'title', 'summary')
+    )
+    if not articles:
+        return
+    vectors = get_embedder().embed([article_text(article.title, article.summary) for article in articles])
+    for article, vector in zip(articles, vectors):
+        article.embedding = encode_embedding(vector)
+    WikipediaArticle.objects.bulk_update(articles, ['embedding'])
+    if settings.ARTICLES_VECTOR_INDEX_DIR:
+        # One export covers every batch embedded until it runs
+        enqueue(
+            export_embeddings, dedup_key='articles.tasks.export_embeddings',
+            delay=settings.ARTICLES_VECTOR_INDEX_EXPORT_DELAY,
+        )
+
+
+@task()
+def export_embeddings():
+    """Publish a new generation of the shared, memory-mapped embedding index"""
+    if settings.ARTICLES_VECTOR_INDEX_DIR:
+        export_index(settings.ARTICLES_VECTOR_INDEX_DIR)
+
+
+@task()
+def fetch_missing_categories(batch_size=500):
+    """Look up categories for the newest articles that have none yet.
+
+    Requests go out CATEGORY_BATCH_SIZE titles at a time. While a full
+    batch was found the task queues itself again, so a backlog drains in
+    the background one batch per run. When MediaWiki is throttled the
+    batch is requeued for after the back-off instead of failing.
+    """
+    articles = list(
+        WikipediaArticle.objects
+        .filter(categories_fetched_at__isnull=True, categories='')
+        .order_by('-id')
+        .only('id', 'title')[:batch_size]
+    )
+    if not articles:
+        return
+    try:
+        categories = WikipediaService.fetch_categories([article.title for article in articles])
+    except UpstreamThrottled as e:
+        enqueue(
+            fetch_missing_categories, {'batch_size': batch_size},
+            dedup_key=fetch_missing_categories.task_name, delay=e.retry_after or 0,
+        )
+        return
+    now = timezone.now()
+    for article in articles:
+        article.categories = '|'.join(categories.get(article.title, []))
+        article.categories_fetched_at = now
+        # categories are rendered, so they move updated_at (and response ETags) too
+        article.updated_at = now
+    WikipediaArticle.objects.bulk_update(articles, ['categories', 'categories_fetched_at', 'updated_at'])
+    if len(articles) == batch_size:
+        enqueue(fetch_missing_categories, {'batch_size': batch_size}, dedup_key=fetch_missing_categories.task_name)
+
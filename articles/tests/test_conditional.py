@@ -0,0 +1,94 @@
+import gzip
+
+import brotli
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from articles.models import UserArticleInteraction, WikipediaArticle
+
+
+@override_settings(TASKQUEUE_EAGER=False)
+class FeedTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('reader', email='reader@example.com', password='pw')
+        cls.articles = WikipediaArticle.objects.bulk_create([
+            WikipediaArticle(
+                article_id=str(i), title=f"Article {i}", summary="A summary long enough to compress. " * 5,
+                url=f"https://en.wikipedia.org/wiki/A{i}",
+            )
+            for i in range(10)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class ConditionalGetTests(FeedTestCase):
+    """List ETags change with article content and the caller's likes; matches answer 304"""
+
+    def get(self, **headers):
+        return self.client.get('/api/articles/', {'count': 5}, **headers)
+
+    def test_matching_etag_not_modified(self):
+        response = self.get()
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        not_modified = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(not_modified.content, b'')
+        # The weak form sent back for compressed responses matches too, as does *
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=f'"other", W/{etag}').status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='*').status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_etag_follows_content_and_likes(self):
+        etag = self.get()['ETag']
+        newest = WikipediaArticle.objects.order_by('-id').first()
+
+        UserArticleInteraction.objects.create(user=self.user, article=newest, liked=True, viewed=True)
+        liked_etag = self.get()['ETag']
+        self.assertNotEqual(liked_etag, etag)
+
+        newest.title = "Renamed"
+        newest.save()
+        response = self.get(HTTP_IF_NONE_MATCH=liked_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], liked_etag)
+
+
+class CompressionTests(FeedTestCase):
+    """JSON and NDJSON responses are brotli-encoded when accepted, gzip otherwise"""
+
+    def test_brotli_preferred(self):
+        plain = self.client.get('/api/articles/', {'count': 5})
+        response = self.client.get('/api/articles/', {'count': 5}, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+        # The encoded body no longer matches the strong ETag
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+
+    def test_gzip_fallback(self):
+        plain = self.client.get('/api/articles/', {'count': 5})
+        response = self.client.get('/api/articles/', {'count': 5}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_stream_compressed_per_line(self):
+        response = self.client.get('/api/articles/', {'count': 5, 'stream': 1}, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        lines = brotli.decompress(b''.join(response.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertIn(b'next_cursor', lines[-1])
+
+    def test_small_and_uncompressed_responses_untouched(self):
+        response = self.client.get('/api/articles/trending/', {'window': 'nope'}, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(self.client.get('/api/articles/', {'count': 5}).has_header('Content-Encoding'))
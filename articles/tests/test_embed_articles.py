@@ -0,0 +1,52 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from articles.models import WikipediaArticle
+
+DIM = 8
+
+
+@override_settings(ARTICLES_VECTOR_INDEX_DIR='', ARTICLES_EMBEDDING_DIM=DIM)
+class EmbedArticlesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.articles = WikipediaArticle.objects.bulk_create([
+            WikipediaArticle(article_id=str(i), title=f"Article {i}", url=f"https://en.wikipedia.org/wiki/A{i}")
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, 'checkpoint')
+
+    def embed(self, **options):
+        call_command('embed_articles', checkpoint=self.checkpoint, chunk_size=2, stdout=StringIO(), **options)
+
+    def missing(self):
+        return set(WikipediaArticle.objects.filter(embedding__isnull=True).values_list('id', flat=True))
+
+    def test_finished_run_rescans_cleared_rows(self):
+        self.embed()
+        self.assertEqual(self.missing(), set())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+        # e.g. merge_refreshed clears the embedding of a changed article
+        WikipediaArticle.objects.filter(pk=self.articles[0].pk).update(embedding=None)
+        self.embed()
+        self.assertEqual(self.missing(), set())
+
+    def test_interrupted_run_resumes_after_checkpoint(self):
+        self.embed(limit=2)
+        self.assertTrue(os.path.exists(self.checkpoint))
+        WikipediaArticle.objects.filter(pk=self.articles[0].pk).update(embedding=None)
+
+        self.embed()
+        # The resumed run continues after the checkpoint; the cleared row waits for the next full scan
+        self.assertEqual(self.missing(), {self.articles[0].pk})
+        self.embed()
+        self.assertEqual(self.missing(), set())
@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from articles.models import UserArticleInteraction, WikipediaArticle
+from articles.services.recommendations import RecommendationEngine
+from articles.services.trending import TrendingService
+
+
+class InteractionIndexPlanTests(TransactionTestCase):
+    """The interaction hot paths stay backed by their indexes (migrations 0005, 0012).
+
+    The table is vacuumed (so index-only scans are costed as such, hence no
+    TestCase transaction) and sequential scans are disabled, so the
+    planner's choice does not depend on the handful of rows a test creates:
+    a plan without the index means the query no longer matches it.
+    """
+
+    def setUp(self):
+        users = get_user_model().objects.bulk_create([
+            get_user_model()(username=f"user-{i}", email=f"user-{i}@example.com") for i in range(20)
+        ])
+        articles = WikipediaArticle.objects.bulk_create([
+            WikipediaArticle(article_id=str(i), title=f"Article {i}", url=f"https://en.wikipedia.org/wiki/A{i}")
+            for i in range(50)
+        ])
+        UserArticleInteraction.objects.bulk_create([
+            UserArticleInteraction(user=user, article=article, liked=(i + j) % 3 == 0, viewed=(i + j) % 2 == 0)
+            for i, user in enumerate(users) for j, article in enumerate(articles)
+        ])
+        self.user = users[0]
+        with connection.cursor() as cursor:
+            cursor.execute(f"VACUUM ANALYZE {UserArticleInteraction._meta.db_table}")
+            cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def plan(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def queryset_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        return self.plan(sql, params)
+
+    def test_liked_ids_use_partial_liked_index(self):
+        queryset = UserArticleInteraction.objects.filter(user=self.user, liked=True).values_list('article_id', flat=True)
+        self.assertEqual(set(queryset), set(RecommendationEngine.liked_ids(self.user)))
+        plan = self.queryset_plan(queryset)
+        self.assertIn('Index Only Scan using interaction_user_liked_idx', plan)
+
+    def test_viewed_ids_use_partial_viewed_index(self):
+        queryset = UserArticleInteraction.objects.filter(user=self.user, viewed=True).values_list('article_id', flat=True)
+        self.assertEqual(set(queryset), set(RecommendationEngine.viewed_ids(self.user)))
+        plan = self.queryset_plan(queryset)
+        self.assertIn('Index Only Scan using interaction_user_viewed_idx', plan)
+
+    def test_trending_window_uses_updated_at_index(self):
+        since = timezone.now() - timedelta(hours=10)
+        plan = self.plan(TrendingService.window_scores_sql(), [3.0, 0.0, 3600, 1.0, 0.0, 3600, since])
+        self.assertIn('Index Only Scan using interaction_updated_at_idx', plan)
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from articles.models import UserArticleInteraction, WikipediaArticle
+from taskqueue.models import Task
+
+
+@override_settings(TASKQUEUE_EAGER=False)
+class InteractionTests(TestCase):
+    """Like toggles and batches report first views and first likes exactly once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('reader', email='reader@example.com', password='pw')
+        cls.articles = WikipediaArticle.objects.bulk_create([
+            WikipediaArticle(article_id=str(i), title=f"Article {i}", url=f"https://en.wikipedia.org/wiki/A{i}")
+            for i in range(4)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def trending_events(self):
+        """Queued trending events as (article id, kind), in queue order"""
+        return [
+            (article_id, kind)
+            for task in Task.objects.filter(name='articles.tasks.record_trending').order_by('id')
+            for article_id, kind, _ in task.payload['events']
+        ]
+
+    def like_updates(self):
+        return [
+            (task.payload['article_id'], task.payload['liked'])
+            for task in Task.objects.filter(name='articles.tasks.apply_like').order_by('id')
+        ]
+
+    def batch(self, *events):
+        response = self.client.post(
+            '/api/articles/interactions/batch/',
+            {'events': [{'article_id': article_id, 'action': action} for article_id, action in events]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_toggle(self):
+        article = self.articles[0].id
+        for expected in (True, False, True):
+            response = self.client.post(f'/api/articles/{article}/like/')
+            self.assertEqual(response.json(), {'article_id': article, 'liked': expected})
+
+        # One view and one like: the re-like after the unlike adds no trending weight
+        self.assertEqual(self.trending_events(), [(article, 'view'), (article, 'like')])
+        self.assertEqual(self.like_updates(), [(article, True), (article, False), (article, True)])
+        self.assertEqual(self.client.post('/api/articles/999999/like/').status_code, 404)
+
+    def test_batch(self):
+        a, b, c, d = (article.id for article in self.articles)
+        result = self.batch((a, 'like'), (b, 'unlike'), (c, 'view'), (999999, 'like'))
+        self.assertEqual(result['liked'], {str(a): True})
+        # An unlike of a pair with no row still creates it viewed, and says so
+        self.assertEqual(sorted(result['viewed']), sorted([a, b, c]))
+        self.assertEqual(
+            sorted(self.trending_events()), sorted([(a, 'view'), (b, 'view'), (c, 'view'), (a, 'like')])
+        )
+        self.assertTrue(UserArticleInteraction.objects.get(user=self.user, article_id=b).viewed)
+
+        Task.objects.all().delete()
+        result = self.batch((a, 'unlike'), (b, 'view'), (c, 'like'), (d, 'unlike'), (d, 'like'))
+        # Later events for an article win; repeated views are not reported again
+        self.assertEqual(result['liked'], {str(a): False, str(c): True, str(d): True})
+        self.assertEqual(result['viewed'], [d])
+        self.assertEqual(sorted(self.trending_events()), sorted([(d, 'view'), (c, 'like'), (d, 'like')]))
+
+        Task.objects.all().delete()
+        result = self.batch((a, 'like'), (c, 'like'))
+        # a is re-liked (no trending weight); c already liked (no change)
+        self.assertEqual(result, {'liked': {str(a): True}, 'viewed': []})
+        self.assertEqual(self.trending_events(), [])
+        self.assertEqual(self.like_updates(), [(a, True)])
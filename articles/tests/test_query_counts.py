@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+import numpy as np
+
+from articles.models import ArticleTrendingScore, UserArticleInteraction, WikipediaArticle
+from articles.services.embeddings import encode_embedding
+from articles.services.vector_index import invalidate_index
+
+DIM = 8
+
+
+@override_settings(ARTICLES_VECTOR_INDEX_DIR='', TASKQUEUE_EAGER=False, ARTICLES_EMBEDDING_DIM=DIM)
+class ListQueryCountTests(TestCase):
+    """Article lists cost a fixed number of queries whatever their length or the user's likes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('reader', password='pw')
+        rng = np.random.default_rng(0)
+        cls.articles = WikipediaArticle.objects.bulk_create([
+            WikipediaArticle(
+                article_id=str(i), title=f"Article {i}", url=f"https://en.wikipedia.org/wiki/A{i}",
+                embedding=encode_embedding(rng.standard_normal(DIM).astype(np.float32)),
+            )
+            for i in range(120)
+        ])
+        ArticleTrendingScore.objects.bulk_create([
+            ArticleTrendingScore(article=article, period='24h', log_score=i, updated_at=timezone.now())
+            for i, article in enumerate(cls.articles)
+        ])
+
+    def setUp(self):
+        invalidate_index()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def like(self, count):
+        # bulk_create skips the signals that would queue recommendation updates
+        UserArticleInteraction.objects.filter(user=self.user).delete()
+        UserArticleInteraction.objects.bulk_create([
+            UserArticleInteraction(user=self.user, article=article, liked=True)
+            for article in self.articles[:count]
+        ])
+
+    def assertConstantQueries(self, num, path, sizes):
+        for likes in (0, 1, 40):
+            self.like(likes)
+            for params in sizes:
+                with self.subTest(likes=likes, **params), self.assertNumQueries(num):
+                    response = self.client.get(path, params)
+                self.assertEqual(response.status_code, 200)
+
+    def test_trending(self):
+        # leaderboard ids, article rows, liked ids
+        self.assertConstantQueries(3, '/api/articles/trending/', [{'limit': 5}, {'limit': 50}])
+
+    def test_recommended(self):
+        self.like(3)
+        self.client.get('/api/articles/recommended/')  # builds and stores the list
+        # stored list, article rows, liked ids
+        self.assertConstantQueries(3, '/api/articles/recommended/', [{'page_size': 5}, {'page_size': 50}])
+
+    def test_feed(self):
+        # page rows, liked ids
+        self.assertConstantQueries(2, '/api/articles/', [{'count': 5}, {'count': 50}])
@@ -0,0 +1,122 @@
+import json
+from unittest import mock
+
+import requests
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from articles.models import UpstreamBudget
+from articles.services import ratelimit
+from articles.services.ratelimit import BACKGROUND, INTERACTIVE, TokenBucket, UpstreamThrottled, parse_retry_after
+from articles.services.wikipedia_client import WikipediaClient
+
+
+class TokenBucketTests(TestCase):
+    """The shared bucket row: lanes, floors and upstream back-off blocks"""
+
+    def bucket(self, rate=0.001, burst=4):
+        # A near-zero refill keeps the token count steady for the length of a test
+        return TokenBucket('test', rate=rate, burst=burst, background_reserve=0.5)
+
+    def drain(self, bucket, lane):
+        taken = 0
+        while bucket.try_acquire(lane)[0]:
+            taken += 1
+        return taken
+
+    def test_background_leaves_reserve_for_interactive(self):
+        bucket = self.bucket()
+        # Starts full (4); background stops at the 2-token floor
+        self.assertEqual(self.drain(bucket, BACKGROUND), 2)
+        self.assertEqual(self.drain(bucket, INTERACTIVE), 2)
+        granted, wait = bucket.try_acquire(INTERACTIVE)
+        self.assertFalse(granted)
+        self.assertGreater(wait, 0)
+
+    def test_background_yields_to_waiting_interactive_callers(self):
+        bucket = self.bucket()
+        bucket._waiting[INTERACTIVE] = 1
+        self.assertFalse(bucket.try_acquire(BACKGROUND)[0])
+        self.assertEqual(UpstreamBudget.objects.filter(name='test').count(), 0)
+
+    def test_acquire_gives_up_after_max_wait(self):
+        bucket = TokenBucket('test', rate=0.001, burst=1, max_wait={INTERACTIVE: 0.05})
+        bucket.acquire(INTERACTIVE)
+        with self.assertRaises(UpstreamThrottled) as raised:
+            bucket.acquire(INTERACTIVE)
+        self.assertEqual(raised.exception.reason, 'budget')
+
+    def test_rate_limited_blocks_every_lane(self):
+        bucket = self.bucket()
+        bucket.try_acquire(INTERACTIVE)
+        error = bucket.throttled(INTERACTIVE, 'rate_limited', '30')
+        self.assertEqual(error.retry_after, 30.0)
+        for lane in (INTERACTIVE, BACKGROUND):
+            granted, wait = bucket.try_acquire(lane)
+            self.assertFalse(granted)
+            self.assertGreater(wait, 25)
+
+    def test_maxlag_blocks_background_only(self):
+        bucket = self.bucket()
+        bucket.try_acquire(INTERACTIVE)
+        bucket.throttled(BACKGROUND, 'maxlag', '10')
+        self.assertFalse(bucket.try_acquire(BACKGROUND)[0])
+        self.assertTrue(bucket.try_acquire(INTERACTIVE)[0])
+
+    def test_block_never_shortened(self):
+        bucket = self.bucket()
+        bucket.try_acquire(INTERACTIVE)
+        bucket.block(60)
+        bucket.block(1)
+        self.assertGreater(bucket.try_acquire(INTERACTIVE)[1], 55)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('12', 5.0), 12.0)
+        self.assertEqual(parse_retry_after(None, 5.0), 5.0)
+        self.assertEqual(parse_retry_after('soon', 5.0), 5.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT', 5.0), 0.0)
+
+
+def api_response(status, body, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode()
+    response.headers.update(headers or {})
+    return response
+
+
+@override_settings(WIKIPEDIA_RATE_LIMIT={**settings.WIKIPEDIA_RATE_LIMIT, 'RATE': 100, 'BURST': 10},
+                   WIKIPEDIA_MAXLAG=5)
+class ClientThrottlingTests(TestCase):
+    """MediaWiki back-off answers are raised and block the shared bucket"""
+
+    def setUp(self):
+        patch = mock.patch.object(ratelimit, '_limiter', None)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.client = WikipediaClient(api_url='http://mediawiki.invalid/w/api.php', max_retries=0)
+        self.addCleanup(self.client.close)
+
+    def respond(self, response):
+        return mock.patch.object(self.client.session, 'get', return_value=response)
+
+    def test_429_raises_and_blocks_for_retry_after(self):
+        with self.respond(api_response(429, {}, {'Retry-After': '20'})):
+            with self.assertRaises(UpstreamThrottled) as raised:
+                self.client.get({'action': 'query'})
+        self.assertEqual((raised.exception.reason, raised.exception.retry_after), ('rate_limited', 20.0))
+        with self.assertRaises(UpstreamThrottled):
+            ratelimit.get_rate_limiter().acquire(INTERACTIVE)
+
+    def test_maxlag_sent_and_honoured_for_background_only(self):
+        maxlag = api_response(200, {'error': {'code': 'maxlag', 'info': 'Waiting for replicas'}}, {'Retry-After': '5'})
+        with self.respond(maxlag) as get:
+            with self.assertRaises(UpstreamThrottled) as raised:
+                self.client.get({'action': 'query'}, lane=BACKGROUND)
+        self.assertEqual(get.call_args.kwargs['params']['maxlag'], 5)
+        self.assertEqual(raised.exception.reason, 'maxlag')
+
+        with self.respond(api_response(200, {'query': {}})) as get:
+            self.assertEqual(self.client.get({'action': 'query'}), {'query': {}})
+        self.assertNotIn('maxlag', get.call_args.kwargs['params'])
+        self.assertFalse(ratelimit.get_rate_limiter().try_acquire(BACKGROUND)[0])
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+import numpy as np
+
+from articles.models import UserArticleInteraction, UserRecommendations, WikipediaArticle
+from articles.services.embeddings import decode_embedding, encode_embedding
+from articles.services.recommendations import RecommendationCache
+from articles.services.vector_index import invalidate_index
+
+DIM = 8
+
+
+@override_settings(ARTICLES_VECTOR_INDEX_DIR='', TASKQUEUE_EAGER=False, ARTICLES_EMBEDDING_DIM=DIM)
+class ApplyLikeTests(TestCase):
+    """A like toggle updates the stored profile from one embedding"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('reader', password='pw')
+        rng = np.random.default_rng(0)
+        cls.vectors = rng.standard_normal((20, DIM)).astype(np.float32)
+        cls.articles = WikipediaArticle.objects.bulk_create([
+            WikipediaArticle(
+                article_id=str(i), title=f"Article {i}", url=f"https://en.wikipedia.org/wiki/A{i}",
+                embedding=encode_embedding(vector),
+            )
+            for i, vector in enumerate(cls.vectors)
+        ])
+
+    def setUp(self):
+        invalidate_index()
+        UserArticleInteraction.objects.bulk_create([
+            UserArticleInteraction(user=self.user, article=article, liked=True)
+            for article in self.articles[:3]
+        ])
+        self.entry = RecommendationCache.rebuild(self.user)
+        UserRecommendations.objects.filter(pk=self.entry.pk).update(
+            computed_at=self.entry.computed_at - timedelta(hours=1)
+        )
+
+    def test_like_adds_embedding_without_reading_likes(self):
+        before = decode_embedding(self.entry.profile)
+        with CaptureQueriesContext(connection) as queries:
+            entry = RecommendationCache.apply_like(self.user, self.articles[5].id, True)
+        self.assertFalse(any('"liked"' in query['sql'] for query in queries.captured_queries))
+
+        entry.refresh_from_db()
+        unit = self.vectors[5] / np.linalg.norm(self.vectors[5])
+        np.testing.assert_allclose(decode_embedding(entry.profile), before + unit, rtol=1e-5)
+        self.assertEqual(entry.like_count, 4)
+        self.assertGreater(entry.computed_at, self.entry.computed_at)
+
+    def test_unliking_everything_resets_profile(self):
+        for article in self.articles[:3]:
+            entry = RecommendationCache.apply_like(self.user, article.id, False)
+        entry.refresh_from_db()
+        self.assertEqual(entry.like_count, 0)
+        self.assertFalse(decode_embedding(entry.profile).any())
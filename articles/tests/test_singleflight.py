@@ -0,0 +1,95 @@
+import asyncio
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from articles.services import cache, singleflight
+from common.cache import LocalTTLCache
+from articles.services.singleflight import SingleFlight
+
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'},
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class SearchFlightConfigTests(SimpleTestCase):
+    """A cross-process lock needs a search cache every worker can read"""
+
+    def build(self, search_cache, lock_alias):
+        with override_settings(WIKIPEDIA_SEARCH_CACHE=search_cache,
+                               WIKIPEDIA_SEARCH_SINGLEFLIGHT={'LOCK_ALIAS': lock_alias}), \
+                mock.patch.object(cache, '_search_cache', None), \
+                mock.patch.object(singleflight, '_search_flight', None):
+            return singleflight.get_search_flight()
+
+    def test_local_result_cache_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.build({'BACKEND': 'local'}, 'shared')
+
+    def test_local_django_alias_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.build({'BACKEND': 'django', 'ALIAS': 'default'}, 'shared')
+        with self.assertRaises(ImproperlyConfigured):
+            self.build({'BACKEND': 'django', 'ALIAS': 'shared'}, 'default')
+
+    def test_shared_caches_accepted(self):
+        flight = self.build({'BACKEND': 'django', 'ALIAS': 'shared'}, 'shared')
+        self.assertEqual(flight.lock_alias, 'shared')
+        self.assertIsNone(self.build({'BACKEND': 'local'}, '').lock_alias)
+
+
+class AsyncCoalescingTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_execution(self):
+        flight = SingleFlight(LocalTTLCache())
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return ['result']
+
+        async def search():
+            return await asyncio.gather(*(flight.ado('q', fetch) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(search()), [['result']] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats(), {'executed': 1, 'coalesced_local': 4, 'coalesced_remote': 0, 'saved': 4})
+
+    def test_failure_reaches_every_waiter(self):
+        flight = SingleFlight(LocalTTLCache())
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            raise RuntimeError('upstream down')
+
+        async def search():
+            return await asyncio.gather(*(flight.ado('q', fetch) for _ in range(3)), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in asyncio.run(search())))
+        self.assertEqual(flight.executed, 1)
+
+    def test_cancelled_leader_does_not_strand_waiters(self):
+        flight = SingleFlight(LocalTTLCache())
+        started = []
+
+        async def fetch():
+            started.append(1)
+            await asyncio.sleep(0.05)
+            return ['result']
+
+        async def search():
+            leader = asyncio.ensure_future(flight.ado('q', fetch))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.ado('q', fetch))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            result = await asyncio.wait_for(follower, timeout=1)
+            self.assertTrue(leader.cancelled())
+            return result
+
+        self.assertEqual(asyncio.run(search()), ['result'])
+        # The follower ran the call itself once the leader was gone
+        self.assertEqual(len(started), 2)
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from articles.models import ArticleTrendingScore, WikipediaArticle
+from articles.services.trending import TrendingService
+
+
+class TrendingRecordTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.old, cls.recent = WikipediaArticle.objects.bulk_create([
+            WikipediaArticle(article_id=str(i), title=f"Article {i}", url=f"https://en.wikipedia.org/wiki/A{i}")
+            for i in range(2)
+        ])
+
+    def test_event_long_after_the_last_one(self):
+        now = timezone.now()
+        # 40 days is ~960 decay constants of the 1h window
+        TrendingService.record([(self.old.id, 'like', now - timedelta(days=40))])
+        TrendingService.record([(self.recent.id, 'view', now - timedelta(minutes=5))])
+        TrendingService.record([(self.old.id, 'like', now)])
+
+        self.assertEqual(TrendingService.top_ids('1h'), [self.old.id, self.recent.id])
+        score = ArticleTrendingScore.objects.get(article=self.old, period='1h')
+        self.assertAlmostEqual(TrendingService.decayed_score(score.log_score, '1h', now), 3.0, places=3)
+
+    def test_events_in_one_batch_combine(self):
+        now = timezone.now()
+        TrendingService.record([(self.recent.id, 'like', now), (self.recent.id, 'view', now)])
+        score = ArticleTrendingScore.objects.get(article=self.recent, period='24h')
+        self.assertAlmostEqual(TrendingService.decayed_score(score.log_score, '24h', now), 4.0, places=3)
@@ -0,0 +1,46 @@
+from django.test import TransactionTestCase, override_settings
+
+import numpy as np
+
+from articles.models import WikipediaArticle
+from articles.services import vector_index
+from articles.services.embeddings import encode_embedding
+
+DIM = 8
+
+
+@override_settings(ARTICLES_VECTOR_INDEX_DIR='', ARTICLES_EMBEDDING_DIM=DIM, ARTICLES_VECTOR_INDEX_TTL=0)
+class IndexReloadTests(TransactionTestCase):
+    """An expired index keeps being served while a thread loads the next one
+
+    (no TestCase transaction: the reload thread reads on its own connection).
+    """
+
+    def add_articles(self, start, count):
+        rng = np.random.default_rng(start)
+        WikipediaArticle.objects.bulk_create([
+            WikipediaArticle(
+                article_id=str(i), title=f"Article {i}", url=f"https://en.wikipedia.org/wiki/A{i}",
+                embedding=encode_embedding(rng.standard_normal(DIM).astype(np.float32)),
+            )
+            for i in range(start, start + count)
+        ])
+
+    def setUp(self):
+        vector_index.invalidate_index()
+        self.addCleanup(vector_index.invalidate_index)
+        self.addCleanup(self.wait_for_reload)
+
+    def wait_for_reload(self):
+        if vector_index._reload_thread is not None:
+            vector_index._reload_thread.join(timeout=10)
+
+    def test_expired_index_served_while_reloading(self):
+        self.add_articles(0, 10)
+        first = vector_index.get_index()
+        self.assertEqual(len(first), 10)
+
+        self.add_articles(10, 5)
+        self.assertIs(vector_index.get_index(), first)
+        self.wait_for_reload()
+        self.assertEqual(len(vector_index.get_index()), 15)
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from articles.services import cache, ratelimit, wikipedia_service
+from articles.services.wikipedia_client import WikipediaClient, get_async_client, get_client
+from articles.services.wikipedia_service import WikipediaService
+from benchmarks.stub_mediawiki import build_response
+from common.cache import LocalTTLCache
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """MediaWiki stub answering from benchmarks.stub_mediawiki, failing the next ``fail`` requests with 503"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            failing = server.fail > 0
+            server.fail -= failing
+        if failing:
+            body, status = b'{}', 503
+        else:
+            params = {k: v[-1] for k, v in parse_qs(urlsplit(self.path).query).items()}
+            body, status = json.dumps(build_response(params)).encode(), 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(WIKIPEDIA_RATE_LIMIT={**settings.WIKIPEDIA_RATE_LIMIT, 'RATE': 0})
+class WikipediaClientTests(SimpleTestCase):
+    """Pooling, caching and retries against a local MediaWiki stub"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = 0
+        self.server.connections = set()
+        self.server.fail = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        url = f'http://127.0.0.1:{self.server.server_address[1]}/w/api.php'
+        self.client = WikipediaClient(api_url=url, max_retries=2)
+        self.addCleanup(self.client.close)
+        for patch in (
+            mock.patch.object(wikipedia_service, 'get_client', lambda: self.client),
+            mock.patch.object(cache, '_search_cache', LocalTTLCache()),
+            mock.patch.object(ratelimit, '_limiter', None),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_process_client_is_shared(self):
+        self.assertIs(get_client(), get_client())
+
+    def test_session_reuses_one_connection(self):
+        for query in ('alpha', 'beta', 'gamma'):
+            self.client.get(WikipediaService.search_params(query, 3))
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_repeated_query_served_from_cache(self):
+        first = WikipediaService.search_articles('Albedo', 3)
+        self.assertEqual(len(first), 3)
+        # Same query up to case and whitespace
+        self.assertEqual(WikipediaService.search_articles('  albedo ', 3), first)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_server_error_retried(self):
+        self.server.fail = 1
+        self.assertEqual(len(WikipediaService.search_articles('Albedo', 3)), 3)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_failure_not_cached(self):
+        # One attempt plus two retries, all failing
+        self.server.fail = 3
+        with self.assertLogs('articles.services.wikipedia_service', 'ERROR'):
+            self.assertEqual(WikipediaService.search_articles('Albedo', 3), [])
+        self.assertEqual(self.server.requests, 3)
+
+        self.assertEqual(len(WikipediaService.search_articles('Albedo', 3)), 3)
+        self.assertEqual(self.server.requests, 4)
+
+
+class AsyncClientTests(SimpleTestCase):
+    def test_session_per_loop_closed_on_shutdown(self):
+        async def use_client():
+            client = get_async_client()
+            self.assertIs(get_async_client(), client)
+            self.assertFalse(client.session.closed)
+            return client
+
+        first = asyncio.run(use_client())
+        second = asyncio.run(use_client())
+        self.assertIsNot(first, second)
+        self.assertTrue(first.session.closed)
+        self.assertTrue(second.session.closed)
@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
+    ArticleFeedAPIView,
     ArticleLikeAPIView,
+    AsyncArticleSearchView,
+    InteractionBatchAPIView,
+    RecommendedArticlesAPIView,
     TrendingArticlesAPIView,
     WikipediaService,
     ArticleSearchAPIView,
@@ -13,9 +18,14 @@ from django.http import JsonResponse
 
 urlpatterns = [
     # Use direct_search instead of ArticleSearchAPIView.as_view()
-    path('search/', ArticleSearchAPIView.as_view(), name='article-search'),
-    # path('recommended/', RecommendedArticlesAPIView.as_view(), name='recommended-articles'),
-    # path('trending/', TrendingArticlesAPIView.as_view(), name='trending-articles'),
+    path(
+        'search/',
+        AsyncArticleSearchView.as_view() if settings.ARTICLES_ASYNC_SEARCH else ArticleSearchAPIView.as_view(),
+        name='article-search'
+    ),
+    path('recommended/', RecommendedArticlesAPIView.as_view(), name='recommended-articles'),
+    path('trending/', TrendingArticlesAPIView.as_view(), name='trending-articles'),
     path('<int:article_id>/like/', ArticleLikeAPIView.as_view(), name='article-like'),
-    # path('', fetch_articles, name='fetch-articles'),
+    path('interactions/batch/', InteractionBatchAPIView.as_view(), name='interaction-batch'),
+    path('', ArticleFeedAPIView.as_view(), name='article-feed'),
 ]
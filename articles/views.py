@@ -1,68 +1,274 @@
-from rest_framework import viewsets, generics, status
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions, viewsets, generics, status
 from rest_framework.decorators import api_view, action
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from .models import WikipediaArticle, UserArticleInteraction
-from .serializers import WikipediaArticleSerializer, UserArticleInteractionSerializer
-from django.http import JsonResponse
+from .serializers import (
+    WikipediaArticleSerializer,
+    UserArticleInteractionSerializer,
+    InteractionBatchSerializer,
+    liked_article_ids,
+    serialize_article_rows,
+)
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.views import View
 from django.views.decorators.http import require_http_methods
+import json
+from itertools import islice
 import requests
+from . import conditional, renderers
+from .pagination import ArticleFeedPagination, ArticlePagination
+from .services import metrics
+from .services.article_search import ArticleSearchService
+from .services.recommendations import RecommendationCache, RecommendationEngine
+from .services.trending import TrendingService
+from .signals import article_like_toggled, article_viewed
 from .services.wikipedia_service import WikipediaService
 
 
+# Search results are rendered without created_at
+SEARCH_FIELDS = [field for field in WikipediaArticleSerializer.Meta.fields if field != 'created_at']
+
+
+def search_payload(rows, liked):
+    """Build the search response body with local ids and like state"""
+    return {"articles": serialize_article_rows(rows, liked, SEARCH_FIELDS)}
+
 # Create a new WikipediaService that uses MediaWiki API directly
 class ArticleSearchAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    cache_control = {'private': True, 'max_age': 60}
     
     def get(self, request):
         query = request.query_params.get('q', '')
         if not query:
             return Response({"error": "Query parameter 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        articles = WikipediaService.search_articles(query)
-        return Response({"articles": articles})
+        # Served from the local full-text index when it has enough matches
+        articles, source = ArticleSearchService.search(query)
+        rows = [article.as_listing_row() for article in articles]
+        liked = liked_article_ids(request.user, [row['id'] for row in rows])
+        etag = conditional.list_etag(rows, liked)
+        if conditional.etag_matches(request, etag):
+            return conditional.not_modified(etag, self.cache_control)
+        
+        response = Response(search_payload(rows, liked))
+        response['X-Search-Source'] = source
+        return conditional.finalize(response, etag, self.cache_control)
+
+class AsyncArticleSearchView(View):
+    """ASGI-native search: the MediaWiki round-trip awaits on the event loop
+    instead of holding a worker. Pass ``categories=1`` to fetch each hit's
+    categories concurrently with the search.
+    """
+    cache_control = ArticleSearchAPIView.cache_control
+    
+    @staticmethod
+    def authenticate(request):
+        drf_request = Request(
+            request,
+            authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+        )
+        try:
+            user = drf_request.user
+        except exceptions.APIException:
+            return None
+        return user if user and user.is_authenticated else None
+    
+    async def get(self, request):
+        user = await sync_to_async(self.authenticate)(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        query = request.GET.get('q', '')
+        if not query:
+            return JsonResponse({"error": "Query parameter 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with_categories = request.GET.get('categories') in ('1', 'true')
+        articles, source = await ArticleSearchService.async_search(query, with_categories=with_categories)
+        rows = [article.as_listing_row() for article in articles]
+        liked = await sync_to_async(liked_article_ids)(user, [row['id'] for row in rows])
+        etag = conditional.list_etag(rows, liked)
+        if conditional.etag_matches(request, etag):
+            return conditional.not_modified(etag, self.cache_control)
+        
+        response = HttpResponse(renderers.dumps(search_payload(rows, liked)), content_type='application/json')
+        response['X-Search-Source'] = source
+        return conditional.finalize(response, etag, self.cache_control)
 
 class ArticleLikeAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request, article_id):
+        # A like is also a view; first views are reported like the batch endpoint's
+        newly_viewed = UserArticleInteraction.objects.mark_viewed(request.user.id, [article_id])
+        # Toggle the like status in a single INSERT ... ON CONFLICT statement
         try:
-            article = WikipediaArticle.objects.get(id=article_id)
+            liked, first_like = UserArticleInteraction.objects.toggle_like(request.user.id, article_id)
         except WikipediaArticle.DoesNotExist:
             return Response(
                 {"error": "Article not found"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Toggle the like status
-        interaction, created = UserArticleInteraction.objects.get_or_create(
-            user=request.user,
-            article=article,
-            defaults={'liked': True, 'viewed': True}
+        article_viewed.send(sender=self.__class__, user=request.user, article_ids=newly_viewed)
+        article_like_toggled.send(
+            sender=self.__class__, user=request.user,
+            article_id=article_id, liked=liked, first_like=first_like
         )
+        return Response({
+            "article_id": article_id,
+            "liked": liked
+        })
+
+class InteractionBatchAPIView(APIView):
+    """Apply many like/unlike/view events from one client request"""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = InteractionBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        likes, views = {}, set()
+        for event in serializer.validated_data['events']:
+            if event['action'] == 'view':
+                views.add(event['article_id'])
+            else:
+                # Later events for the same article win
+                likes[event['article_id']] = event['action'] == 'like'
         
-        if not created:
-            interaction.liked = not interaction.liked
-            interaction.viewed = True
-            interaction.save()
+        # Likes and unlikes count as views too. Marked first, so a pair seen for
+        # the first time is reported as viewed whichever action created its row
+        newly_viewed = UserArticleInteraction.objects.mark_viewed(request.user.id, views | set(likes))
+        changed, first_likes = UserArticleInteraction.objects.set_likes(request.user.id, likes)
+        
+        first_likes = set(first_likes)
+        for article_id, liked in changed.items():
+            article_like_toggled.send(
+                sender=self.__class__, user=request.user,
+                article_id=article_id, liked=liked, first_like=article_id in first_likes
+            )
+        article_viewed.send(sender=self.__class__, user=request.user, article_ids=newly_viewed)
         
         return Response({
-            "article_id": article.id,
-            "liked": interaction.liked
+            "liked": {str(article_id): liked for article_id, liked in changed.items()},
+            "viewed": newly_viewed,
         })
 
-class TrendingArticlesAPIView(APIView):
+class ArticleFeedAPIView(APIView):
+    """Newest-first article feed for infinite scroll, keyset-paginated by cursor.
+    
+    With ``stream=1`` (or ``Accept: application/x-ndjson``) up to ``count``
+    articles are streamed as one JSON object per line, followed by a final
+    ``{"next_cursor": ...}`` line.
+    """
     permission_classes = [IsAuthenticated]
+    pagination_class = ArticleFeedPagination
+    stream_chunk_size = 500
+    cache_control = {'private': True, 'no_cache': True}
     
     def get(self, request):
-        # Get trending articles (based on most interactions)
-        trending_articles = WikipediaArticle.objects.filter(
-            userarticleinteraction__isnull=False
-        ).distinct().order_by('-created_at')[:10]
+        paginator = self.pagination_class()
+        queryset = WikipediaArticle.objects.listing_rows()
+        if self.wants_stream(request):
+            return self.stream(request, paginator, queryset)
+        
+        rows = paginator.paginate_queryset(queryset, request, view=self)
+        liked = liked_article_ids(request.user, [row['id'] for row in rows])
+        etag = conditional.list_etag(rows, liked, request.get_full_path())
+        if conditional.etag_matches(request, etag):
+            return conditional.not_modified(etag, self.cache_control)
         
-        serializer = WikipediaArticleSerializer(
-            trending_articles, many=True, context={'request': request}
+        response = paginator.get_paginated_response(serialize_article_rows(rows, liked))
+        return conditional.finalize(response, etag, self.cache_control)
+    
+    @staticmethod
+    def wants_stream(request):
+        return (
+            request.query_params.get('stream') in ('1', 'true')
+            or 'application/x-ndjson' in request.META.get('HTTP_ACCEPT', '')
         )
-        return Response(serializer.data)
\ No newline at end of file
+    
+    def stream(self, request, paginator, queryset):
+        size = paginator.get_page_size(request, maximum=paginator.max_stream_size)
+        # Built (and the cursor validated) before streaming starts
+        rows = paginator.ordered_queryset(queryset, request)[:size].iterator(chunk_size=self.stream_chunk_size)
+        
+        def lines():
+            sent, last = 0, None
+            while True:
+                chunk = list(islice(rows, self.stream_chunk_size))
+                if not chunk:
+                    break
+                # is_liked is resolved per chunk, one query each
+                liked = liked_article_ids(request.user, [row['id'] for row in chunk])
+                for item in serialize_article_rows(chunk, liked):
+                    yield renderers.dumps(item) + b'\n'
+                sent += len(chunk)
+                last = chunk[-1]
+            next_cursor = paginator.encode_cursor(last) if sent == size else None
+            yield renderers.dumps({'next_cursor': next_cursor}) + b'\n'
+        
+        return StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+
+class RecommendedArticlesAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = ArticlePagination
+    cache_control = {'private': True, 'no_cache': True}
+    
+    def get(self, request):
+        entry, state = RecommendationCache.get(request.user)
+        
+        # Paginate the ranked ids, then load only the rows on this page
+        paginator = self.pagination_class()
+        page_ids = paginator.paginate_queryset(entry.article_ids, request, view=self)
+        rows = RecommendationEngine.load_rows(page_ids)
+        liked = liked_article_ids(request.user, page_ids)
+        # The total count and page links are part of the body too
+        etag = conditional.list_etag(rows, liked, request.get_full_path(), len(entry.article_ids))
+        if conditional.etag_matches(request, etag):
+            return conditional.not_modified(etag, self.cache_control)
+        
+        response = paginator.get_paginated_response(serialize_article_rows(rows, liked))
+        response['X-Recommendations-Cache'] = state
+        response['X-Recommendations-Age'] = str(int(RecommendationCache.age(entry)))
+        return conditional.finalize(response, etag, self.cache_control)
+
+class TrendingArticlesAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    cache_control = {'private': True, 'max_age': 60}
+    
+    def get(self, request):
+        window = request.query_params.get('window', '24h')
+        if window not in TrendingService.windows():
+            return Response(
+                {"error": f"Unknown window '{window}'. Use one of: {', '.join(TrendingService.windows())}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        
+        # Ranked ids come straight off the (period, -log_score) index
+        ids = TrendingService.top_ids(window, limit)
+        rows = RecommendationEngine.load_rows(ids)
+        liked = liked_article_ids(request.user, ids)
+        etag = conditional.list_etag(rows, liked)
+        if conditional.etag_matches(request, etag):
+            return conditional.not_modified(etag, self.cache_control)
+        
+        return conditional.finalize(Response(serialize_article_rows(rows, liked)), etag, self.cache_control)
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """Prometheus scrape endpoint (restrict access at the proxy)"""
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
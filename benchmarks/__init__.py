@@ -0,0 +1,6 @@
+"""Benchmarks and load tools for the articles API.
+
+Everything here runs against local processes only: a stub MediaWiki server
+stands in for en.wikipedia.org so numbers are reproducible and no real
+upstream traffic is generated.
+"""
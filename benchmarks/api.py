@@ -0,0 +1,157 @@
+"""Load-test the articles API end to end and write a JSON report.
+
+Seeds synthetic data (see benchmarks.seed), starts a stub MediaWiki and a
+gunicorn server, then drives each scenario from many concurrent clients,
+each request authenticated as a random seeded user. For every scenario the
+report holds throughput, p50/p95/p99 latency and the SQL queries one
+request issues (measured in-process with the test client, so the load run
+itself carries no instrumentation overhead).
+
+    python -m benchmarks.api --articles 100000 --users 1000 --interactions 200000 \\
+        --concurrency 50 --duration 20 --output bench-report.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+import django
+
+SCENARIOS = ("search", "like", "trending", "recommended", "feed")
+
+
+def request_factories(tokens, article_ids, topics, random_seed=0):
+    """Map scenario name -> make_request(n) for benchmarks.loadgen.run_load"""
+    rng = random.Random(random_seed)
+
+    def auth():
+        return {"Authorization": f"Token {rng.choice(tokens)}"}
+
+    def search(n):
+        # Alternate queries the local full-text index can answer with ones that miss it
+        query = f"bench topic {rng.randrange(topics)}" if n % 2 == 0 else f"uncached query {n}"
+        return "GET", "/api/articles/search/", {"params": {"q": query}, "headers": auth()}
+
+    def like(n):
+        return "POST", f"/api/articles/{rng.choice(article_ids)}/like/", {"headers": auth()}
+
+    def trending(n):
+        window = ("1h", "24h", "7d")[n % 3]
+        return "GET", "/api/articles/trending/", {"params": {"window": window, "limit": 20}, "headers": auth()}
+
+    def recommended(n):
+        return "GET", "/api/articles/recommended/", {"params": {"page": 1 + n % 3}, "headers": auth()}
+
+    def feed(n):
+        return "GET", "/api/articles/", {"params": {"count": 20}, "headers": auth()}
+
+    return {"search": search, "like": like, "trending": trending, "recommended": recommended, "feed": feed}
+
+
+def queries_per_request(make_request, samples):
+    """Median SQL query count of ``samples`` requests issued through the Django test client"""
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    client = Client(HTTP_HOST="localhost")
+    counts = []
+    for n in range(samples):
+        method, path, kwargs = make_request(n)
+        extra = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in kwargs.get("headers", {}).items()}
+        with CaptureQueriesContext(connection) as captured:
+            if method == "GET":
+                client.get(path, kwargs.get("params", {}), **extra)
+            else:
+                client.generic(method, path, json.dumps(kwargs.get("json_body") or {}),
+                               content_type="application/json", **extra)
+        counts.append(len(captured))
+    return statistics.median(counts) if counts else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--interactions", type=int, default=20000)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse previously seeded bench rows")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--mode", choices=["wsgi", "asgi"], default="wsgi")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per scenario")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub upstream latency in seconds")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="MediaWiki requests/second budget for the server (0 disables it)")
+    parser.add_argument("--query-samples", type=int, default=20,
+                        help="Requests per scenario used to measure queries per request")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", default=None, help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    scenarios = args.scenarios.split(",")
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    from benchmarks.stub_mediawiki import StubMediaWiki
+
+    # Started before Django is configured so this process's client uses it too
+    stub = StubMediaWiki(latency=args.latency).start()
+    os.environ["WIKIPEDIA_API_URL"] = stub.url
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+    from rest_framework.authtoken.models import Token
+
+    from articles.models import WikipediaArticle
+    from benchmarks.loadgen import run_load, summarize
+    from benchmarks.seed import ARTICLE_PREFIX, USER_PREFIX, seed
+    from benchmarks.server import GunicornServer
+
+    report = {"config": vars(args), "seed": None, "scenarios": {}}
+    try:
+        if not args.skip_seed:
+            report["seed"] = seed(
+                users=args.users, articles=args.articles, interactions=args.interactions,
+                topics=args.topics, random_seed=args.seed, do_reset=True,
+            )
+        tokens = list(Token.objects.filter(user__username__startswith=USER_PREFIX).values_list("key", flat=True))
+        article_ids = list(
+            WikipediaArticle.objects.filter(article_id__startswith=ARTICLE_PREFIX).values_list("id", flat=True)
+        )
+        if not tokens or not article_ids:
+            parser.error("No seeded bench data; run without --skip-seed")
+
+        factories = request_factories(tokens, article_ids, args.topics, args.seed)
+        env = {
+            "WIKIPEDIA_API_URL": stub.url,
+            "ARTICLES_ASYNC_SEARCH": str(args.mode == "asgi"),
+            # The stub has no budget to protect; waits for tokens would dominate the timings
+            "WIKIPEDIA_RATE_LIMIT_RATE": str(args.rate_limit),
+        }
+        with GunicornServer(args.mode, workers=args.workers, env=env) as server:
+            for name in scenarios:
+                started = time.monotonic()
+                latencies, errors, elapsed = run_load(
+                    factories[name], server.base_url, concurrency=args.concurrency, duration=args.duration,
+                )
+                report["scenarios"][name] = summarize(latencies, errors, elapsed, {
+                    "queries_per_request": queries_per_request(factories[name], args.query_samples),
+                    "wall_s": round(time.monotonic() - started, 2),
+                })
+    finally:
+        stub.stop()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Closed-loop HTTP/1.1 load generator with latency percentiles.
+
+Uses a minimal keep-alive client on raw asyncio streams: general purpose
+async HTTP clients add enough per-request overhead at high concurrency to
+become the bottleneck themselves.
+"""
+import asyncio
+import itertools
+import json
+import time
+from urllib.parse import urlencode, urlsplit
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed, extra=None):
+    """Throughput and p50/p95/p99 (milliseconds) for one run"""
+    ordered = sorted(latencies)
+    completed = len(ordered)
+    summary = {
+        "requests": completed + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": None if not ordered else round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": None if not ordered else round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": None if not ordered else round(percentile(ordered, 99) * 1000, 2),
+    }
+    summary.update(extra or {})
+    return summary
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection; reconnects after errors or Connection: close"""
+
+    def __init__(self, host, port, headers):
+        self.host = host
+        self.port = port
+        self.headers = headers
+        self.reader = self.writer = None
+
+    async def request(self, method, path, params=None, json_body=None, headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        body = b"" if json_body is None else json.dumps(json_body).encode()
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        if json_body is not None:
+            head.append("Content-Type: application/json")
+        head += [f"{name}: {value}" for name, value in {**self.headers, **(headers or {})}.items()]
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection")
+        status = int(status_line.split()[1])
+        length, close, chunked = 0, False, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection" and value.lower() == "close":
+                close = True
+            elif name == "transfer-encoding" and "chunked" in value.lower():
+                chunked = True
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length:
+            await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def _run(make_request, base_url, concurrency, total, duration, headers):
+    parts = urlsplit(base_url)
+    latencies, errors = [], 0
+    counter = itertools.count()
+    deadline = time.monotonic() + duration if duration else None
+
+    async def worker():
+        nonlocal errors
+        connection = Connection(parts.hostname, parts.port or 80, headers or {})
+        try:
+            while True:
+                n = next(counter)
+                if (total is not None and n >= total) or (deadline is not None and time.monotonic() >= deadline):
+                    return
+                method, path, kwargs = make_request(n)
+                started = time.perf_counter()
+                try:
+                    status = await connection.request(method, path, **kwargs)
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    connection.close()
+                    errors += 1
+                    continue
+                if status >= 400:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.monotonic() - started
+
+
+def run_load(make_request, base_url, concurrency=50, total=None, duration=None, headers=None):
+    """Drive ``make_request(n) -> (method, path, kwargs)`` from ``concurrency`` clients.
+
+    ``kwargs`` may hold ``params`` (query string dict), ``json_body`` and
+    per-request ``headers`` (merged over ``headers``).
+    Stops after ``total`` requests or ``duration`` seconds, whichever is set.
+    Returns (latencies in seconds, error count, elapsed seconds).
+    """
+    if total is None and duration is None:
+        raise ValueError("Set total or duration")
+    return asyncio.run(_run(make_request, base_url, concurrency, total, duration, headers))
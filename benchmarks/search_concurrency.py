@@ -0,0 +1,63 @@
+"""Compare sync gunicorn (WSGI) with uvicorn workers (ASGI) for /api/articles/search/.
+
+Both servers talk to the same stub MediaWiki with a fixed upstream latency
+and the search cache disabled, so every request pays the full round-trip.
+Sync workers can hold one request each; the async view parks slow
+upstream calls on the event loop. Prints one JSON object per mode.
+
+    python -m benchmarks.search_concurrency --concurrency 200 --latency 0.3
+"""
+import argparse
+import json
+import os
+
+import django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub upstream latency in seconds")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", default="wsgi,asgi")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="MediaWiki requests/second budget for the server (0 disables it)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+    from benchmarks.loadgen import run_load, summarize
+    from benchmarks.server import GunicornServer
+    from benchmarks.stub_mediawiki import StubMediaWiki
+    from benchmarks.users import bench_token
+
+    stub = StubMediaWiki(latency=args.latency).start()
+    headers = {"Authorization": f"Token {bench_token()}"}
+    env = {
+        "WIKIPEDIA_API_URL": stub.url,
+        "WIKIPEDIA_SEARCH_CACHE_TTL": "0",
+        # Measure the MediaWiki round-trip, not the local full-text index
+        "ARTICLES_SEARCH_MODE": "upstream",
+        # The stub has no budget to protect; waits for tokens would dominate the timings
+        "WIKIPEDIA_RATE_LIMIT_RATE": str(args.rate_limit),
+    }
+
+    for mode in args.modes.split(","):
+        mode_env = {**env, "ARTICLES_ASYNC_SEARCH": "True" if mode == "asgi" else "False"}
+        with GunicornServer(mode, workers=args.workers, env=mode_env) as server:
+            latencies, errors, elapsed = run_load(
+                lambda n: ("GET", "/api/articles/search/", {"params": {"q": f"topic {n % 500}"}}),
+                server.base_url, concurrency=args.concurrency, duration=args.duration, headers=headers,
+            )
+        print(json.dumps(summarize(latencies, errors, elapsed, {
+            "mode": mode,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "upstream_latency_s": args.latency,
+        })))
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
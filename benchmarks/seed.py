@@ -0,0 +1,219 @@
+"""Seed synthetic users, articles (with embeddings) and interactions.
+
+Rows are tagged (usernames ``bench-user-N``, article ids ``bench-N``) so a
+re-run with ``--reset`` replaces them without touching real data. Articles
+and interactions are written with COPY, which keeps a 1M-row seed within
+minutes. Embeddings are drawn around a fixed set of topic centroids so
+recommendations have structure to find; like popularity is Zipf-shaped so
+trending has a head and a long tail.
+
+    python -m benchmarks.seed --articles 100000 --users 1000 --interactions 200000
+"""
+import argparse
+import io
+import json
+import os
+import time
+from datetime import timedelta
+
+import django
+import numpy as np
+
+USER_PREFIX = "bench-user-"
+ARTICLE_PREFIX = "bench-"
+PASSWORD = "bench-password"
+
+
+def _copy(cursor, table, columns, rows):
+    """Stream ``rows`` (tuples of already COPY-escaped text) into ``table``"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def _text(value):
+    return value.replace("\\", "\\\\").replace("\t", " ").replace("\n", " ")
+
+
+def reset():
+    from django.contrib.auth import get_user_model
+
+    from articles.models import WikipediaArticle
+
+    get_user_model().objects.filter(username__startswith=USER_PREFIX).delete()
+    WikipediaArticle.objects.filter(article_id__startswith=ARTICLE_PREFIX).delete()
+
+
+def seed_users(count, batch_size):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from rest_framework.authtoken.models import Token
+
+    User = get_user_model()
+    # Hashing once and sharing the result keeps seeding independent of the hasher's cost
+    password = make_password(PASSWORD)
+    existing = User.objects.filter(username__startswith=USER_PREFIX).count()
+    users = [
+        User(username=f"{USER_PREFIX}{i}", email=f"{USER_PREFIX}{i}@bench.invalid", password=password)
+        for i in range(existing, count)
+    ]
+    User.objects.bulk_create(users, batch_size=batch_size)
+    ids = list(User.objects.filter(username__startswith=USER_PREFIX).order_by("id").values_list("id", flat=True))
+    Token.objects.bulk_create(
+        [Token(user_id=user_id, key=Token.generate_key()) for user_id in ids],
+        batch_size=batch_size, ignore_conflicts=True,
+    )
+    return ids
+
+
+def seed_articles(count, dim, topics, batch_size, rng):
+    from django.db import connection
+    from django.utils import timezone
+
+    from articles.models import WikipediaArticle
+    from articles.services.embeddings import EMBEDDING_DTYPE, normalize_rows
+
+    start = WikipediaArticle.objects.filter(article_id__startswith=ARTICLE_PREFIX).count()
+    centroids = normalize_rows(rng.standard_normal((topics, dim)).astype(EMBEDDING_DTYPE))
+    now = timezone.now()
+    table = WikipediaArticle._meta.db_table
+    columns = ["article_id", "title", "summary", "url", "image_url", "categories", "created_at", "updated_at", "embedding"]
+
+    with connection.cursor() as cursor:
+        for offset in range(start, count, batch_size):
+            n = min(batch_size, count - offset)
+            topic = rng.integers(0, topics, n)
+            vectors = normalize_rows(centroids[topic] + 0.6 * rng.standard_normal((n, dim)).astype(EMBEDDING_DTYPE))
+            rows = []
+            for j in range(n):
+                i = offset + j
+                created = (now - timedelta(seconds=int(count - i))).isoformat()
+                rows.append((
+                    f"{ARTICLE_PREFIX}{i}",
+                    f"Bench topic {topic[j]} article {i}",
+                    _text(f"Synthetic article {i} about benchmark topic {topic[j]}. " * 4),
+                    f"https://en.wikipedia.org/wiki/Bench_{i}",
+                    "\\N",
+                    f"Bench topic {topic[j]}",
+                    created,
+                    created,
+                    "\\\\x" + vectors[j].astype(EMBEDDING_DTYPE).tobytes().hex(),
+                ))
+            _copy(cursor.cursor, table, columns, rows)
+
+    return list(
+        WikipediaArticle.objects.filter(article_id__startswith=ARTICLE_PREFIX)
+        .order_by("id").values_list("id", flat=True)
+    )
+
+
+def seed_interactions(count, user_ids, article_ids, like_ratio, batch_size, rng):
+    from django.db import connection
+    from django.utils import timezone
+
+    from articles.models import UserArticleInteraction
+
+    if not count or not user_ids or not article_ids:
+        return 0
+    users = np.asarray(user_ids)
+    # Zipf-like popularity: articles early in this shuffled order are picked far more often
+    articles = rng.permutation(np.asarray(article_ids))
+    pairs = np.empty((0, 2), dtype=np.int64)
+    count = min(count, len(users) * len(articles))
+    for _ in range(20):
+        ranks = np.minimum(rng.zipf(1.3, count) - 1, len(articles) - 1)
+        sampled = np.stack([rng.choice(users, count), articles[ranks]], axis=1)
+        pairs = np.unique(np.concatenate([pairs, sampled]), axis=0)
+        if len(pairs) >= count:
+            break
+    pairs = pairs[rng.permutation(len(pairs))[:count]]
+
+    now = timezone.now()
+    table = UserArticleInteraction._meta.db_table
+    columns = ["user_id", "article_id", "liked", "viewed", "created_at", "updated_at"]
+    inserted = 0
+    with connection.cursor() as cursor:
+        # COPY into a staging table so pairs seeded by an earlier run are skipped, not fatal
+        cursor.execute(
+            "CREATE TEMP TABLE bench_interactions (user_id bigint, article_id bigint, liked boolean, "
+            "viewed boolean, created_at timestamptz, updated_at timestamptz) ON COMMIT DROP"
+        )
+        for offset in range(0, len(pairs), batch_size):
+            batch = pairs[offset:offset + batch_size]
+            liked = rng.random(len(batch)) < like_ratio
+            # Spread activity over the last week so every trending window has data
+            ages = rng.exponential(86400, len(batch)).clip(0, 7 * 86400)
+            rows = []
+            for (user_id, article_id), like, age in zip(batch.tolist(), liked.tolist(), ages.tolist()):
+                when = (now - timedelta(seconds=age)).isoformat()
+                rows.append((str(user_id), str(article_id), "t" if like else "f", "t", when, when))
+            _copy(cursor.cursor, "bench_interactions", columns, rows)
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM bench_interactions "
+                "ON CONFLICT (user_id, article_id) DO NOTHING"
+            )
+            inserted += cursor.rowcount
+            cursor.execute("TRUNCATE bench_interactions")
+    return inserted
+
+
+def seed(users=1000, articles=10000, interactions=20000, dim=None, topics=50,
+         like_ratio=0.3, batch_size=10000, random_seed=0, do_reset=False):
+    """Seed the database and return a summary dict with row counts and timings"""
+    from django.conf import settings
+    from django.db import transaction
+
+    from articles.services.trending import TrendingService
+    from articles.services.vector_index import invalidate_index
+
+    dim = dim or settings.ARTICLES_EMBEDDING_DIM
+    rng = np.random.default_rng(random_seed)
+    timings = {}
+
+    def timed(name, fn, *args):
+        started = time.monotonic()
+        result = fn(*args)
+        timings[name] = round(time.monotonic() - started, 2)
+        return result
+
+    if do_reset:
+        timed("reset_s", reset)
+    user_ids = timed("users_s", seed_users, users, batch_size)
+    with transaction.atomic():
+        article_ids = timed("articles_s", seed_articles, articles, dim, topics, batch_size, rng)
+    with transaction.atomic():
+        seeded = timed("interactions_s", seed_interactions, interactions, user_ids, article_ids,
+                       like_ratio, batch_size, rng)
+    for window in TrendingService.windows():
+        timed(f"trending_{window}_s", TrendingService.rebuild, window)
+    invalidate_index()
+    return {"users": len(user_ids), "articles": len(article_ids), "interactions": seeded, **timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--interactions", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=None, help="Defaults to ARTICLES_EMBEDDING_DIM")
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--like-ratio", type=float, default=0.3)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--reset", action="store_true", help="Delete previously seeded bench rows first")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+    print(json.dumps(seed(
+        users=args.users, articles=args.articles, interactions=args.interactions, dim=args.dim,
+        topics=args.topics, like_ratio=args.like_ratio, batch_size=args.batch_size,
+        random_seed=args.seed, do_reset=args.reset,
+    )))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Microbenchmark: ModelSerializer + JSONRenderer against the values() fast path.
+
+For each list size, times the serialize+render step alone (rows already in
+memory) and end to end including the query, for
+  * drf:  for_listing() instances -> WikipediaArticleSerializer -> JSONRenderer
+  * fast: listing_rows() dicts -> serialize_article_rows -> ORJSONRenderer
+Both produce identical bytes (checked before timing). Needs stored articles,
+e.g. from benchmarks.seed. Prints one JSON object per size.
+
+    python -m benchmarks.serialization --sizes 10,50,200 --repeat 200
+"""
+import argparse
+import json
+import os
+import time
+
+import django
+
+
+def best_of(fn, repeat):
+    """Fastest of ``repeat`` runs of ``fn``, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,50,200")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+    from rest_framework.renderers import JSONRenderer
+
+    from articles.models import WikipediaArticle
+    from articles.renderers import ORJSONRenderer, orjson
+    from articles.serializers import WikipediaArticleSerializer, serialize_article_rows
+
+    drf_renderer, fast_renderer = JSONRenderer(), ORJSONRenderer()
+    for size in (int(size) for size in args.sizes.split(",")):
+        ids = list(WikipediaArticle.objects.order_by("-id").values_list("id", flat=True)[:size])
+        if len(ids) < size:
+            parser.error(f"Only {len(ids)} articles stored; seed more (python -m benchmarks.seed)")
+        # Every other article liked, so is_liked takes both branches
+        liked = set(ids[::2])
+        queryset = WikipediaArticle.objects.filter(id__in=ids).order_by("-id")
+
+        def drf(articles):
+            serializer = WikipediaArticleSerializer(articles, many=True, context={"liked_ids": liked})
+            return drf_renderer.render(serializer.data)
+
+        def fast(rows):
+            return fast_renderer.render(serialize_article_rows(rows, liked))
+
+        instances, rows = list(queryset.for_listing()), list(queryset.listing_rows())
+        assert drf(instances) == fast(rows), "fast path output differs from WikipediaArticleSerializer"
+
+        result = {
+            "size": size,
+            "orjson": orjson is not None,
+            "drf_render_ms": best_of(lambda: drf(instances), args.repeat),
+            "fast_render_ms": best_of(lambda: fast(rows), args.repeat),
+            "drf_total_ms": best_of(lambda: drf(list(queryset.for_listing())), args.repeat),
+            "fast_total_ms": best_of(lambda: fast(list(queryset.listing_rows())), args.repeat),
+        }
+        result["render_speedup"] = result["drf_render_ms"] / result["fast_render_ms"]
+        result["total_speedup"] = result["drf_total_ms"] / result["fast_total_ms"]
+        print(json.dumps({key: round(value, 3) if isinstance(value, float) else value
+                          for key, value in result.items()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Start and stop gunicorn instances of the project for benchmarking"""
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class GunicornServer:
+    """``mode`` is 'wsgi' (sync workers) or 'asgi' (uvicorn workers)"""
+
+    def __init__(self, mode="wsgi", workers=4, env=None):
+        self.mode = mode
+        self.workers = workers
+        self.port = free_port()
+        self.env = {**os.environ, **(env or {})}
+        self.process = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        command = [
+            sys.executable, "-m", "gunicorn",
+            f"config.{self.mode}:application",
+            "--bind", f"127.0.0.1:{self.port}",
+            "--workers", str(self.workers),
+            "--log-level", "warning",
+        ]
+        if self.mode == "asgi":
+            command += ["--worker-class", "uvicorn.workers.UvicornWorker"]
+        self.process = subprocess.Popen(command, cwd=ROOT, env=self.env)
+        self._wait_ready()
+        return self
+
+    def _wait_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn ({self.mode}) exited with {self.process.returncode}")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f"gunicorn ({self.mode}) did not start within {timeout}s")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
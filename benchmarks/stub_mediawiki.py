@@ -0,0 +1,156 @@
+"""Minimal asyncio MediaWiki API stub with configurable latency.
+
+Serves deterministic ``action=query`` responses for generator=search (with
+extracts/pageimages/info or categories) and for ``pageids`` lookups, over
+HTTP/1.1 keep-alive. Run standalone with:
+
+    python -m benchmarks.stub_mediawiki --port 8099 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+import zlib
+from urllib.parse import parse_qs, urlsplit
+
+
+def _page(page_id, title):
+    return {
+        "pageid": page_id,
+        "ns": 0,
+        "title": title,
+        "extract": f"{title} is a synthetic article served by the benchmark stub. " * 12,
+        "fullurl": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+        "thumbnail": {"source": f"https://upload.wikimedia.org/stub/{page_id}.jpg", "width": 500, "height": 300},
+        "categories": [
+            {"ns": 14, "title": f"Category:Stub topic {page_id % 17}"},
+            {"ns": 14, "title": f"Category:Stub group {page_id % 5}"},
+        ],
+        "touched": "2025-01-01T00:00:00Z",
+    }
+
+
+def build_response(params):
+    """Return the JSON body for a MediaWiki API query"""
+    prop = params.get("prop", "")
+    if "pageids" in params:
+        page_ids = [int(p) for p in params["pageids"].split("|") if p]
+        pages = {str(p): _page(p, f"Page {p}") for p in page_ids}
+    elif params.get("generator") == "search":
+        query = params.get("gsrsearch", "")
+        limit = int(params.get("gsrlimit", 10))
+        base = zlib.crc32(query.lower().encode()) % 1_000_000
+        pages = {str(base + i): _page(base + i, f"{query.title()} {i}") for i in range(limit)}
+    else:
+        pages = {}
+
+    for page in pages.values():
+        if "categories" not in prop:
+            page.pop("categories")
+        if "extracts" not in prop:
+            page.pop("extract")
+    return {"batchcomplete": "", "query": {"pages": pages}} if pages else {"batchcomplete": ""}
+
+
+class StubMediaWiki:
+    """Stub server run in the foreground (``serve``) or as a child process (``start``).
+
+    The child process keeps the stub off the load generator's GIL, which
+    would otherwise distort latency measurements.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/w/api.php"
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length", 0) or 0):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                _, target, _ = request_line.decode("latin-1").split(" ", 2)
+                params = {k: v[-1] for k, v in parse_qs(urlsplit(target).query).items()}
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                body = json.dumps(build_response(params)).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def serve(self):
+        async def main():
+            server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+            print(f"Stub MediaWiki listening on {self.url} (latency {self.latency}s)", flush=True)
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(main())
+
+    def start(self, timeout=10):
+        """Serve from a child process and return once it accepts connections"""
+        if not self.port:
+            with socket.socket() as sock:
+                sock.bind((self.host, 0))
+                self.port = sock.getsockname()[1]
+        self.process = subprocess.Popen([
+            sys.executable, "-m", "benchmarks.stub_mediawiki",
+            "--host", self.host, "--port", str(self.port), "--latency", str(self.latency),
+        ], stdout=subprocess.DEVNULL)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=0.5):
+                    return self
+            except OSError:
+                time.sleep(0.05)
+        self.stop()
+        raise RuntimeError("Stub MediaWiki did not start")
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+            self.process = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+    args = parser.parse_args()
+    StubMediaWiki(args.host, args.port, args.latency).serve()
+
+
+if __name__ == "__main__":
+    main()
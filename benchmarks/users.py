@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+BENCH_USERNAME = "bench"
+
+
+def bench_user(username=BENCH_USERNAME):
+    User = get_user_model()
+    user, created = User.objects.get_or_create(
+        username=username, defaults={"email": f"{username}@bench.invalid"}
+    )
+    if created:
+        user.set_unusable_password()
+        user.save(update_fields=["password"])
+    return user
+
+
+def bench_token(username=BENCH_USERNAME):
+    token, _ = Token.objects.get_or_create(user=bench_user(username))
+    return token.key
@@ -0,0 +1,149 @@
+"""Cache tiers used across apps: a per-process TTL+LRU cache and a Django cache framework wrapper"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Django cache backends whose entries never leave the process
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_alias(alias):
+    """Whether the CACHES alias is stored outside this process"""
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+class LocalTTLCache:
+    """In-process cache with per-entry TTL and LRU eviction"""
+
+    # Entries are visible to this process only
+    shared = False
+
+    def __init__(self, ttl=300, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value, ttl=None):
+        self.set(key, value, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+class DjangoCacheBackend:
+    """Shared cache backed by one of the Django cache framework aliases.
+
+    Keys are namespaced by ``key_prefix`` and a generation number stored in
+    the alias: clear() bumps the generation instead of clearing the whole
+    alias (sessions and other users of it), and the orphaned entries expire
+    by their TTL.
+    """
+
+    def __init__(self, ttl=300, alias='default', key_prefix='wikipedia', max_entries=None):
+        # max_entries is accepted for config compatibility; eviction is left to
+        # the underlying cache's own OPTIONS['MAX_ENTRIES']
+        self.ttl = ttl
+        self.alias = alias
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _cache(self):
+        return caches[self.alias]
+
+    @property
+    def shared(self):
+        """Whether other worker processes see the same entries"""
+        return is_shared_alias(self.alias)
+
+    @property
+    def _generation_key(self):
+        return f"{self.key_prefix}:generation"
+
+    def _key(self, key, generation=None):
+        if generation is None:
+            generation = self._cache.get(self._generation_key, 0)
+        return f"{self.key_prefix}:{generation}:{key}"
+
+    async def _akey(self, key):
+        return self._key(key, await self._cache.aget(self._generation_key, 0))
+
+    def get(self, key):
+        value = self._cache.get(self._key(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        self._cache.set(self._key(key), value, self.ttl if ttl is None else ttl)
+
+    async def aget(self, key):
+        value = await self._cache.aget(await self._akey(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def aset(self, key, value, ttl=None):
+        await self._cache.aset(await self._akey(key), value, self.ttl if ttl is None else ttl)
+
+    def delete(self, key):
+        self._cache.delete(self._key(key))
+
+    def clear(self):
+        """Drop this backend's entries only"""
+        try:
+            self._cache.incr(self._generation_key)
+        except ValueError:
+            # First clear: no generation stored yet
+            if not self._cache.add(self._generation_key, 1, None):
+                self._cache.incr(self._generation_key)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
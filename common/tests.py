@@ -0,0 +1,36 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from .cache import DjangoCacheBackend
+
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'common-tests'}}
+
+
+@override_settings(CACHES=CACHES)
+class DjangoCacheBackendTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_clear_drops_own_entries_only(self):
+        search = DjangoCacheBackend(alias='default', key_prefix='wikipedia')
+        tokens = DjangoCacheBackend(alias='default', key_prefix='authtoken')
+        caches['default'].set('session', 'kept')
+        search.set('q', ['result'])
+        tokens.set('t', 'user')
+
+        search.clear()
+        self.assertIsNone(search.get('q'))
+        self.assertEqual(tokens.get('t'), 'user')
+        self.assertEqual(caches['default'].get('session'), 'kept')
+
+        search.set('q', ['new'])
+        self.assertEqual(search.get('q'), ['new'])
+        search.clear()
+        self.assertIsNone(search.get('q'))
+
+    async def test_async_access_shares_keys(self):
+        search = DjangoCacheBackend(alias='default')
+        search.clear()
+        await search.aset('q', ['result'])
+        self.assertEqual(search.get('q'), ['result'])
+        self.assertEqual(await search.aget('q'), ['result'])
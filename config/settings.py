@@ -26,12 +26,17 @@ INSTALLED_APPS = [
     # Local apps
     'users',
     'frontend',
-    'articles'
+    'articles',
+    'taskqueue',
 ]
 
 MIDDLEWARE = [
+    # First, so its timings and query counts cover the rest of the stack
+    'articles.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add whitenoise middleware
+    # Brotli/gzip for API responses; after WhiteNoise, which serves static files precompressed
+    'articles.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -69,6 +74,8 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'postgres'),
         'HOST': os.environ.get('POSTGRES_HOST', 'db'),
         'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        # Seconds to keep connections open between requests (0 closes them after each request)
+        'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', '0')),
     }
 }
 
@@ -83,10 +90,28 @@ AUTH_PASSWORD_VALIDATORS = [
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
+# Token -> user cache for CachedTokenAuthentication. LOCAL_TTL bounds how long a
+# deleted token or deactivated user stays accepted by other workers; SHARED_ALIAS
+# optionally names a CACHES alias shared by all workers as a second tier.
+# Invalidation hooks post_save/post_delete, which queryset .update()/.delete()
+# bypass: a user deactivated with User.objects.filter(...).update(is_active=False)
+# stays accepted for up to LOCAL_TTL + SHARED_TTL, so keep both short
+AUTH_TOKEN_CACHE = {
+    'LOCAL_TTL': int(os.environ.get('AUTH_TOKEN_CACHE_TTL', '30')),
+    'MAX_ENTRIES': 10000,
+    'SHARED_ALIAS': os.environ.get('AUTH_TOKEN_CACHE_ALIAS', ''),
+    'SHARED_TTL': int(os.environ.get('AUTH_TOKEN_CACHE_SHARED_TTL', '60')),
+}
+
 # Rest framework settings
 REST_FRAMEWORK = {
+    # orjson-backed JSON (articles.renderers); falls back to the stdlib encoder
+    'DEFAULT_RENDERER_CLASSES': [
+        'articles.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -94,6 +119,142 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Wikipedia / MediaWiki API client
+WIKIPEDIA_API_URL = os.environ.get('WIKIPEDIA_API_URL', 'https://en.wikipedia.org/w/api.php')
+WIKIPEDIA_USER_AGENT = os.environ.get(
+    'WIKIPEDIA_USER_AGENT', 'WikipediaExplorer/1.0 (https://github.com/rehan-io/wikipedia_recommender)'
+)
+WIKIPEDIA_CONNECT_TIMEOUT = float(os.environ.get('WIKIPEDIA_CONNECT_TIMEOUT', '3.05'))
+WIKIPEDIA_READ_TIMEOUT = float(os.environ.get('WIKIPEDIA_READ_TIMEOUT', '10'))
+WIKIPEDIA_POOL_MAXSIZE = int(os.environ.get('WIKIPEDIA_POOL_MAXSIZE', '10'))
+WIKIPEDIA_MAX_RETRIES = int(os.environ.get('WIKIPEDIA_MAX_RETRIES', '2'))
+# Connections per event loop for the async client used under ASGI
+WIKIPEDIA_ASYNC_POOL_MAXSIZE = int(os.environ.get('WIKIPEDIA_ASYNC_POOL_MAXSIZE', '100'))
+
+# Serve /api/articles/search/ from the async view; only useful under ASGI
+# (gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker)
+ARTICLES_ASYNC_SEARCH = os.environ.get('ARTICLES_ASYNC_SEARCH', 'False') == 'True'
+
+# MediaWiki request budget: a token bucket shared by all web and task workers
+# through the database, refilling RATE requests/second up to BURST (RATE 0
+# disables it). Background work only draws while more than BACKGROUND_RESERVE
+# of the burst is left, so searches keep headroom; MAX_WAIT is how long each
+# lane queues for a token before giving up. Background requests send MAXLAG
+# (seconds of replication lag past which MediaWiki asks clients to back off)
+WIKIPEDIA_RATE_LIMIT = {
+    'RATE': float(os.environ.get('WIKIPEDIA_RATE_LIMIT_RATE', '10')),
+    'BURST': int(os.environ.get('WIKIPEDIA_RATE_LIMIT_BURST', '20')),
+    'BACKGROUND_RESERVE': 0.5,
+    'MAX_WAIT': {'interactive': 2.0, 'background': 60.0},
+    # Used when a 429 or maxlag response carries no Retry-After
+    'DEFAULT_RETRY_AFTER': 5.0,
+}
+WIKIPEDIA_MAXLAG = int(os.environ.get('WIKIPEDIA_MAXLAG', '5'))
+
+# Search response cache: 'local' (per-process TTL+LRU), 'django' (uses CACHES[ALIAS])
+# or a dotted path to a class implementing get/set/aget/aset/delete/clear/stats (and
+# ``shared = True`` if every worker sees its entries)
+WIKIPEDIA_SEARCH_CACHE = {
+    'BACKEND': os.environ.get('WIKIPEDIA_SEARCH_CACHE_BACKEND', 'local'),
+    'TTL': int(os.environ.get('WIKIPEDIA_SEARCH_CACHE_TTL', '300')),
+    'MAX_ENTRIES': 1024,
+}
+# Seconds a search response stays available to be served stale while MediaWiki is throttled
+WIKIPEDIA_SEARCH_STALE_TTL = int(os.environ.get('WIKIPEDIA_SEARCH_STALE_TTL', '86400'))
+
+# 'local' answers searches from the full-text index over stored articles and only
+# queries MediaWiki (merging its hits in) when fewer than ARTICLES_LOCAL_SEARCH_MIN_RESULTS
+# match; 'upstream' always queries MediaWiki
+ARTICLES_SEARCH_MODE = os.environ.get('ARTICLES_SEARCH_MODE', 'local')
+ARTICLES_LOCAL_SEARCH_MIN_RESULTS = int(os.environ.get('ARTICLES_LOCAL_SEARCH_MIN_RESULTS', '5'))
+
+# Concurrent identical searches share one upstream call per process. Set LOCK_ALIAS
+# to a CACHES alias shared by all workers (with the 'django' search cache backend)
+# to also coalesce across processes (the first search raises ImproperlyConfigured if
+# either cache is per-process); LOCK_TIMEOUT bounds how long others wait
+WIKIPEDIA_SEARCH_SINGLEFLIGHT = {
+    'LOCK_ALIAS': os.environ.get('WIKIPEDIA_SINGLEFLIGHT_LOCK_ALIAS', ''),
+    'LOCK_TIMEOUT': 15,
+    'POLL_INTERVAL': 0.05,
+}
+
+# Local embedder used by `manage.py embed_articles` and the recommender
+ARTICLES_EMBEDDER = os.environ.get('ARTICLES_EMBEDDER', 'articles.services.embeddings.HashingEmbedder')
+ARTICLES_EMBEDDING_DIM = int(os.environ.get('ARTICLES_EMBEDDING_DIM', '256'))
+
+# Number of ranked recommendations computed per user (pages are sliced from these)
+ARTICLES_RECOMMENDATION_LIMIT = int(os.environ.get('ARTICLES_RECOMMENDATION_LIMIT', '200'))
+
+# Articles sharing categories with a user's likes that are scored (and ranked)
+# ahead of the rest of the embedding index (0 scores the whole index only)
+ARTICLES_CATEGORY_CANDIDATES = int(os.environ.get('ARTICLES_CATEGORY_CANDIDATES', '1000'))
+
+# Seconds a materialized recommendation list is served before a full rebuild
+ARTICLES_RECOMMENDATION_TTL = int(os.environ.get('ARTICLES_RECOMMENDATION_TTL', '3600'))
+
+# Trending: decay time constant (seconds) per window and per-event weights
+ARTICLES_TRENDING_WINDOWS = {
+    '1h': 3600,
+    '24h': 86400,
+    '7d': 604800,
+}
+ARTICLES_TRENDING_WEIGHTS = {
+    'like': 3.0,
+    'view': 1.0,
+}
+
+# Seconds before a worker rebuilds its in-memory embedding index from the database
+# (in a background thread; the old index is served until the new one is ready)
+ARTICLES_VECTOR_INDEX_TTL = int(os.environ.get('ARTICLES_VECTOR_INDEX_TTL', '600'))
+
+# Directory holding the exported, memory-mapped embedding index shared by all
+# workers (`manage.py export_embeddings`); empty loads it per process instead
+ARTICLES_VECTOR_INDEX_DIR = os.environ.get('ARTICLES_VECTOR_INDEX_DIR', '')
+# Seconds after new embeddings are written before a new generation is exported
+# (further embeddings within the delay are picked up by the same export)
+ARTICLES_VECTOR_INDEX_EXPORT_DELAY = int(os.environ.get('ARTICLES_VECTOR_INDEX_EXPORT_DELAY', '300'))
+
+# Request metrics served at /metrics. Each process keeps its own; with several
+# workers set ARTICLES_METRICS_DIR to a directory they share so /metrics sums them
+ARTICLES_METRICS_DIR = os.environ.get('ARTICLES_METRICS_DIR', '')
+ARTICLES_METRICS_EXPORT_INTERVAL = 5
+
+# Run 1 in N sync requests under cProfile and write .prof files (0 disables)
+ARTICLES_PROFILE_EVERY = int(os.environ.get('ARTICLES_PROFILE_EVERY', '0'))
+ARTICLES_PROFILE_DIR = os.environ.get('ARTICLES_PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+
+# Background tasks (taskqueue app), run by `manage.py run_workers`
+TASKQUEUE_CONCURRENCY = int(os.environ.get('TASKQUEUE_CONCURRENCY', '4'))
+TASKQUEUE_POLL_INTERVAL = float(os.environ.get('TASKQUEUE_POLL_INTERVAL', '1.0'))
+TASKQUEUE_MAX_ATTEMPTS = 5
+# Retry n waits about TASKQUEUE_RETRY_BACKOFF * 2^(n-1) seconds, capped at the max
+TASKQUEUE_RETRY_BACKOFF = 2.0
+TASKQUEUE_RETRY_BACKOFF_MAX = 600
+# Seconds after which a running task is assumed abandoned by its worker and claimed again.
+# Workers refresh the lock every third of this while a task runs, so only tasks of dead
+# workers are reclaimed; those run again, which is why tasks must be idempotent
+TASKQUEUE_LOCK_TIMEOUT = int(os.environ.get('TASKQUEUE_LOCK_TIMEOUT', '600'))
+# Run tasks inline after commit instead of queueing them (development without workers)
+TASKQUEUE_EAGER = os.environ.get('TASKQUEUE_EAGER', 'False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'articles': {
+            'handlers': ['console'],
+            'level': os.environ.get('ARTICLES_LOG_LEVEL', 'INFO'),
+        },
+        'taskqueue': {
+            'handlers': ['console'],
+            'level': os.environ.get('ARTICLES_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
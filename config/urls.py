@@ -1,9 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from articles.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('users.urls')),
     path('api/articles/', include('articles.urls')),
+    path('metrics', metrics_view, name='metrics'),
     path('', include('frontend.urls')),  # Add this line for frontend URLs
 ]
@@ -1,24 +1,29 @@
 import React, { useState, useEffect } from 'react';
-import axios from 'axios';
+import { api } from '../services/api';
 import '../styles/Home.css';
 
 const Home = () => {
   const [articles, setArticles] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
-  const [page, setPage] = useState(1);
+  const [cursor, setCursor] = useState(null);
+  const [hasMore, setHasMore] = useState(true);
 
   useEffect(() => {
     fetchArticles();
   }, []);
 
   const fetchArticles = async () => {
+    if (!hasMore) return;
     try {
       setLoading(true);
-      const response = await axios.get(`/api/articles?count=5&page=${page}`);
+      const params = { count: 5 };
+      if (cursor) params.cursor = cursor;
+      const response = await api.get('/articles/', { params });
       if (response.data && response.data.articles) {
         setArticles(prev => [...prev, ...response.data.articles]);
-        setPage(prev => prev + 1);
+        setCursor(response.data.next_cursor);
+        setHasMore(Boolean(response.data.next_cursor));
       }
       setLoading(false);
     } catch (err) {
@@ -38,7 +43,7 @@ const Home = () => {
 
     window.addEventListener('scroll', handleScroll);
     return () => window.removeEventListener('scroll', handleScroll);
-  }, [loading]);
+  }, [loading, cursor, hasMore]);
 
   return (
     <div className="home-container">
@@ -48,13 +53,13 @@ const Home = () => {
       </div>
       
       <div className="articles-container">
-        {articles.map((article, index) => (
-          <div className="article" key={index}>
+        {articles.map((article) => (
+          <div className="article" key={article.id}>
             <h2>{article.title}</h2>
-            {article.thumbnail && (
-              <img src={article.thumbnail} alt={article.title} className="article-image" />
+            {article.image_url && (
+              <img src={article.image_url} alt={article.title} className="article-image" />
             )}
-            <div className="article-extract">{article.extract}</div>
+            <div className="article-extract">{article.summary}</div>
             {article.url && (
               <a href={article.url} className="article-link" target="_blank" rel="noreferrer">
                 Read more on Wikipedia
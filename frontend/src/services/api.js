@@ -74,4 +74,6 @@ export const articleApi = {
   like: (articleId) => api.post(`/articles/${articleId}/like/`),
 };
 
+// Named export too: AuthContext and Home import { api }
+export { api };
 export default api;
@@ -15,6 +15,22 @@ python manage.py migrate
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
-# Start Gunicorn
-echo "Starting Gunicorn with project: $PROJECT_NAME.wsgi:application"
-gunicorn $PROJECT_NAME.wsgi:application --bind 0.0.0.0:8000
+# Worker metric snapshots from a previous run would be summed into /metrics
+if [ -n "$ARTICLES_METRICS_DIR" ]; then
+    rm -f "$ARTICLES_METRICS_DIR"/*.json
+fi
+
+# Workers memory-map the shared embedding index; export a first generation if there is none
+if [ -n "$ARTICLES_VECTOR_INDEX_DIR" ] && [ ! -f "$ARTICLES_VECTOR_INDEX_DIR/index.json" ]; then
+    echo "Exporting embedding index..."
+    python manage.py export_embeddings
+fi
+
+# Start Gunicorn (SERVER_MODE=asgi runs uvicorn workers for the async search view)
+if [ "$SERVER_MODE" = "asgi" ]; then
+    echo "Starting Gunicorn (ASGI) with project: $PROJECT_NAME.asgi:application"
+    gunicorn $PROJECT_NAME.asgi:application --bind 0.0.0.0:8000 -k uvicorn.workers.UvicornWorker
+else
+    echo "Starting Gunicorn with project: $PROJECT_NAME.wsgi:application"
+    gunicorn $PROJECT_NAME.wsgi:application --bind 0.0.0.0:8000
+fi
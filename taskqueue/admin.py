@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from .models import Task
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'created_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'dedup_key')
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+class TaskQueueConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'taskqueue'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        # Registers each app's @task functions, so web processes can enqueue
+        # and workers can run them
+        autodiscover_modules('tasks')
@@ -0,0 +1,49 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from taskqueue.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run background task workers until interrupted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.TASKQUEUE_CONCURRENCY,
+                            help="Worker threads in this process (they share its embedding index)")
+        parser.add_argument('--poll-interval', type=float, default=settings.TASKQUEUE_POLL_INTERVAL,
+                            help="Seconds an idle worker waits before checking for due tasks again")
+        parser.add_argument('--burst', action='store_true',
+                            help="Exit once no task is due instead of waiting for more")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write("Stopping after the current tasks...")
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        workers = [
+            Worker(index, stop, poll_interval=options['poll_interval'], burst=options['burst'])
+            for index in range(max(1, options['concurrency']))
+        ]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} workers")
+        # join() with a timeout so signals are still handled in the main thread
+        while any(worker.is_alive() for worker in workers):
+            for worker in workers:
+                worker.join(timeout=0.5)
+
+        processed = sum(worker.processed for worker in workers)
+        failed = sum(worker.failed for worker in workers)
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {processed} tasks succeeded, {failed} failed or retried in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,47 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """A unit of background work, claimed by `manage.py run_workers`.
+
+    Successful tasks are deleted; failed ones stay for inspection. At most
+    one queued task may hold a given dedup_key.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    dedup_key = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField()
+    # Not claimed before this time (retries are pushed back by their backoff)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'], condition=models.Q(status='queued'), name='task_queued_dedup_key_uniq'
+            ),
+        ]
+        indexes = [
+            # Workers claim due tasks in run_at order
+            models.Index(fields=['run_at'], condition=models.Q(status='queued'), name='task_queued_run_at_idx'),
+            # ...and reclaim running ones whose worker went away
+            models.Index(fields=['locked_at'], condition=models.Q(status='running'), name='task_running_locked_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
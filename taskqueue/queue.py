@@ -0,0 +1,170 @@
+"""Enqueue, claim and settle tasks stored in the taskqueue_task table.
+
+Workers claim with ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of
+them can poll the same table without blocking on each other or handing
+out a task twice.
+"""
+import json
+import logging
+import random
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import Task
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task, payload=None, dedup_key=None, delay=0):
+    """Queue ``task`` (a @task function or its name) to run with ``payload``.
+
+    Returns the new task's id, or None when a queued task already holds
+    ``dedup_key`` (or when TASKQUEUE_EAGER runs it inline instead). The
+    row is written in the caller's transaction, so it is only visible to
+    workers once that commits.
+    """
+    name = getattr(task, 'task_name', task)
+    spec = get_task(name)
+    payload = payload or {}
+    if settings.TASKQUEUE_EAGER:
+        transaction.on_commit(lambda: spec.fn(**payload))
+        return None
+
+    now = timezone.now()
+    table = Task._meta.db_table
+    with connection.cursor() as cursor:
+        # The partial unique index on dedup_key (queued rows only) turns a duplicate into a no-op
+        cursor.execute(
+            f"INSERT INTO {table} (name, payload, dedup_key, status, attempts, max_attempts, "
+            "run_at, locked_by, last_error, created_at) "
+            "VALUES (%s, %s, %s, %s, 0, %s, %s, '', '', %s) ON CONFLICT DO NOTHING RETURNING id",
+            [
+                name, json.dumps(payload), dedup_key, Task.QUEUED,
+                spec.max_attempts or settings.TASKQUEUE_MAX_ATTEMPTS,
+                now + timedelta(seconds=delay), now,
+            ],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def claim(worker, limit=1):
+    """Mark up to ``limit`` due tasks as running by ``worker`` and return them.
+
+    Running tasks locked longer than TASKQUEUE_LOCK_TIMEOUT ago are assumed
+    abandoned by a dead worker and are claimed again (live workers keep
+    their locks fresh, see keep_locked()).
+    """
+    now = timezone.now()
+    table = Task._meta.db_table
+    return list(Task.objects.raw(
+        f"UPDATE {table} SET status = %s, locked_at = %s, locked_by = %s, attempts = attempts + 1 "
+        f"WHERE id IN (SELECT id FROM {table} "
+        "WHERE (status = %s AND run_at <= %s) OR (status = %s AND locked_at < %s) "
+        "ORDER BY run_at, id LIMIT %s FOR UPDATE SKIP LOCKED) "
+        "RETURNING *",
+        [
+            Task.RUNNING, now, worker, Task.QUEUED, now, Task.RUNNING,
+            now - timedelta(seconds=settings.TASKQUEUE_LOCK_TIMEOUT), limit,
+        ],
+    ))
+
+
+def extend_lock(task):
+    """Push back the reclaim deadline of a task its worker is still running"""
+    return Task.objects.filter(pk=task.pk, status=Task.RUNNING, locked_by=task.locked_by).update(
+        locked_at=timezone.now()
+    )
+
+
+@contextmanager
+def keep_locked(task, interval=None):
+    """Refresh ``task``'s lock from a helper thread while the block runs.
+
+    Without it a task running longer than TASKQUEUE_LOCK_TIMEOUT would be
+    reclaimed and run a second time alongside the first. A dead worker
+    stops refreshing, so its tasks are still reclaimed after the timeout.
+    """
+    interval = interval or settings.TASKQUEUE_LOCK_TIMEOUT / 3
+    done = threading.Event()
+
+    def refresh():
+        try:
+            while not done.wait(interval):
+                try:
+                    extend_lock(task)
+                except Exception:
+                    logger.exception("Extending the lock of task %s failed", task.pk)
+        finally:
+            # The helper thread's own connection, opened on its first refresh
+            connection.close()
+
+    thread = threading.Thread(target=refresh, name=f"taskqueue-lock-{task.pk}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def backoff(attempts, base):
+    """Seconds before retry number ``attempts``: exponential, capped, with jitter"""
+    delay = min(base * 2 ** (attempts - 1), settings.TASKQUEUE_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def complete(task):
+    Task.objects.filter(pk=task.pk).delete()
+
+
+def fail(task, error, retry_backoff=None):
+    """Requeue ``task`` after a backoff, or mark it failed once out of attempts"""
+    if task.attempts >= task.max_attempts:
+        logger.error("Task %s (%s) failed after %d attempts: %s", task.pk, task.name, task.attempts, error)
+        Task.objects.filter(pk=task.pk).update(status=Task.FAILED, locked_at=None, last_error=error)
+        return
+
+    delay = backoff(task.attempts, retry_backoff or settings.TASKQUEUE_RETRY_BACKOFF)
+    logger.warning("Task %s (%s) attempt %d failed, retrying in %.0fs: %s",
+                   task.pk, task.name, task.attempts, delay, error.splitlines()[-1] if error else '')
+    try:
+        with transaction.atomic():
+            Task.objects.filter(pk=task.pk).update(
+                status=Task.QUEUED, locked_at=None, last_error=error,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        # A duplicate was queued while this one ran; it will do the same work
+        complete(task)
+
+
+def run(task):
+    """Execute a claimed task and settle it; returns True on success"""
+    try:
+        spec = get_task(task.name)
+    except KeyError:
+        # Possibly enqueued by a newer release than this worker runs
+        fail(task, f"Unknown task {task.name!r}")
+        return False
+
+    if task.attempts > task.max_attempts:
+        # Claimed again after its worker died on the final attempt
+        fail(task, task.last_error or "Abandoned by its worker")
+        return False
+
+    try:
+        with keep_locked(task):
+            spec.fn(**task.payload)
+    except Exception:
+        fail(task, traceback.format_exc(), spec.retry_backoff)
+        return False
+    complete(task)
+    return True
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+_tasks = {}
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    fn: Callable
+    # None means the TASKQUEUE_MAX_ATTEMPTS / TASKQUEUE_RETRY_BACKOFF defaults
+    max_attempts: Optional[int] = None
+    retry_backoff: Optional[float] = None
+
+
+def task(name=None, max_attempts=None, retry_backoff=None):
+    """Register a function as a background task.
+
+    The function is called with the enqueued payload as keyword arguments,
+    at least once: it may run again after a worker dies mid-task, so it
+    must be idempotent. Defaults to the name "<module>.<function>".
+    """
+    def decorator(fn):
+        spec = TaskSpec(name or f"{fn.__module__}.{fn.__qualname__}", fn, max_attempts, retry_backoff)
+        _tasks[spec.name] = spec
+        fn.task_name = spec.name
+        return fn
+    return decorator
+
+
+def get_task(name):
+    """Return the TaskSpec registered as ``name`` (KeyError if unknown)"""
+    return _tasks[name]
@@ -0,0 +1,134 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Task
+from .registry import task
+
+calls = []
+
+
+@task(max_attempts=2, retry_backoff=1.0)
+def flaky(fail=True):
+    calls.append(fail)
+    if fail:
+        raise RuntimeError("upstream down")
+
+
+@task()
+def slow(seconds):
+    time.sleep(seconds)
+
+
+@override_settings(TASKQUEUE_EAGER=False)
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_dedup_key_keeps_one_queued_copy(self):
+        first = queue.enqueue(flaky, {'fail': False}, dedup_key='flaky')
+        self.assertIsNotNone(first)
+        self.assertIsNone(queue.enqueue(flaky, {'fail': False}, dedup_key='flaky'))
+        self.assertEqual(Task.objects.filter(dedup_key='flaky').count(), 1)
+
+        # Once claimed the key is free again, so a change made meanwhile is not lost
+        self.assertEqual([t.pk for t in queue.claim('w1')], [first])
+        self.assertIsNotNone(queue.enqueue(flaky, {'fail': False}, dedup_key='flaky'))
+
+    def test_retry_with_backoff_then_failed(self):
+        queue.enqueue(flaky)
+        [claimed] = queue.claim('w1')
+        before = timezone.now()
+        with self.assertLogs('taskqueue.queue', 'WARNING'):
+            self.assertFalse(queue.run(claimed))
+
+        retried = Task.objects.get(pk=claimed.pk)
+        self.assertEqual((retried.status, retried.attempts), (Task.QUEUED, 1))
+        # First retry waits 0.5-1x the task's 1s backoff
+        self.assertGreaterEqual(retried.run_at, before + timedelta(seconds=0.5))
+        self.assertIn('upstream down', retried.last_error)
+        self.assertEqual(queue.claim('w1'), [])
+
+        Task.objects.filter(pk=claimed.pk).update(run_at=timezone.now())
+        [claimed] = queue.claim('w1')
+        with self.assertLogs('taskqueue.queue', 'ERROR'):
+            self.assertFalse(queue.run(claimed))
+        failed = Task.objects.get(pk=claimed.pk)
+        self.assertEqual((failed.status, failed.attempts), (Task.FAILED, 2))
+        self.assertEqual(calls, [True, True])
+        self.assertEqual(queue.claim('w1'), [])
+
+    def test_success_deletes_task(self):
+        queue.enqueue(flaky, {'fail': False})
+        [claimed] = queue.claim('w1')
+        self.assertTrue(queue.run(claimed))
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKQUEUE_LOCK_TIMEOUT=60)
+    def test_abandoned_task_reclaimed(self):
+        queue.enqueue(flaky, {'fail': False})
+        [claimed] = queue.claim('dead-worker')
+        self.assertEqual(queue.claim('w2'), [])
+
+        Task.objects.filter(pk=claimed.pk).update(locked_at=timezone.now() - timedelta(seconds=61))
+        [reclaimed] = queue.claim('w2')
+        self.assertEqual((reclaimed.pk, reclaimed.locked_by, reclaimed.attempts), (claimed.pk, 'w2', 2))
+
+
+@override_settings(TASKQUEUE_EAGER=False)
+class ConcurrentClaimTests(TransactionTestCase):
+    """Claims from separate connections (no TestCase transaction to share)"""
+
+    def test_concurrent_claims_skip_locked_rows(self):
+        ids = {queue.enqueue(flaky, {'fail': False}) for _ in range(6)}
+        first_claimed = threading.Event()
+        second_done = threading.Event()
+        claimed = {}
+
+        def first():
+            try:
+                with transaction.atomic():
+                    claimed['first'] = {t.pk for t in queue.claim('w1', limit=3)}
+                    first_claimed.set()
+                    # Hold the row locks until the other worker has claimed
+                    second_done.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=first)
+        thread.start()
+        first_claimed.wait(5)
+        started = time.monotonic()
+        claimed['second'] = {t.pk for t in queue.claim('w2', limit=6)}
+        second_done.set()
+        thread.join()
+
+        # The second claim neither waited for the locked rows nor took them
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(len(claimed['first']), 3)
+        self.assertFalse(claimed['first'] & claimed['second'])
+        self.assertEqual(claimed['first'] | claimed['second'], ids)
+
+    @override_settings(TASKQUEUE_LOCK_TIMEOUT=0.3)
+    def test_running_task_keeps_its_lock(self):
+        queue.enqueue(slow, {'seconds': 0.6})
+        [claimed] = queue.claim('w1')
+        stolen = []
+
+        def other_worker():
+            try:
+                time.sleep(0.45)
+                stolen.extend(queue.claim('w2'))
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        self.assertTrue(queue.run(claimed))
+        thread.join()
+        self.assertEqual(stolen, [])
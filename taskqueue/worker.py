@@ -0,0 +1,52 @@
+import logging
+import os
+import socket
+import threading
+
+from django.db import close_old_connections, connection
+
+from . import queue
+
+logger = logging.getLogger(__name__)
+
+
+class Worker(threading.Thread):
+    """Claims and runs tasks one at a time until ``stop`` is set.
+
+    Each worker thread has its own database connection. With ``burst`` it
+    exits as soon as it finds no due task instead of polling.
+    """
+
+    def __init__(self, index, stop, poll_interval=1.0, burst=False):
+        super().__init__(name=f"taskqueue-worker-{index}", daemon=True)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+        self.stop = stop
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.processed = 0
+        self.failed = 0
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                # Same housekeeping Django does around each request
+                close_old_connections()
+                try:
+                    tasks = queue.claim(self.worker_id)
+                except Exception:
+                    logger.exception("Claiming tasks failed")
+                    tasks = []
+                    if self.burst:
+                        break
+                if not tasks:
+                    if self.burst:
+                        break
+                    self.stop.wait(self.poll_interval)
+                    continue
+                for task in tasks:
+                    if queue.run(task):
+                        self.processed += 1
+                    else:
+                        self.failed += 1
+        finally:
+            connection.close()
@@ -0,0 +1,89 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from common.cache import DjangoCacheBackend, LocalTTLCache
+
+
+class TokenCache:
+    """token -> (user, token) in a per-process TTL+LRU tier, optionally backed by a shared cache.
+
+    Keys are hashed so a dump of the shared cache does not reveal credentials.
+    Deleting a token or deactivating a user invalidates both tiers in the
+    process that made the change; other processes drop their local copy
+    when its LOCAL_TTL expires. Invalidation runs from model signals, so
+    bulk changes (``User.objects.filter(...).update(is_active=False)``,
+    queryset deletes of tokens) are only seen once the entry expires from
+    both tiers (see AUTH_TOKEN_CACHE).
+    """
+
+    def __init__(self, local_ttl=30, max_entries=10000, shared_alias=None, shared_ttl=300):
+        self.local = LocalTTLCache(ttl=local_ttl, max_entries=max_entries)
+        self.shared = (
+            DjangoCacheBackend(ttl=shared_ttl, alias=shared_alias, key_prefix='authtoken')
+            if shared_alias else None
+        )
+
+    @staticmethod
+    def _key(token_key):
+        return hashlib.sha256(token_key.encode()).hexdigest()
+
+    def get(self, token_key):
+        key = self._key(token_key)
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def set(self, token_key, value):
+        key = self._key(token_key)
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def delete(self, token_key):
+        key = self._key(token_key)
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def stats(self):
+        return self.local.stats()
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    """Return the process-wide TokenCache, creating it on first use"""
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                config = getattr(settings, 'AUTH_TOKEN_CACHE', {})
+                _token_cache = TokenCache(
+                    local_ttl=config.get('LOCAL_TTL', 30),
+                    max_entries=config.get('MAX_ENTRIES', 10000),
+                    shared_alias=config.get('SHARED_ALIAS') or None,
+                    shared_ttl=config.get('SHARED_TTL', 300),
+                )
+    return _token_cache
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the Token + User query for recently seen tokens"""
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        # Raises AuthenticationFailed for unknown tokens and inactive users
+        user, token = super().authenticate_credentials(key)
+        cache.set(key, (user, token))
+        return user, token
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import get_token_cache
+
+
+def _forget_tokens(keys):
+    # After commit, so a concurrent request cannot re-cache the old row
+    transaction.on_commit(lambda: [get_token_cache().delete(key) for key in keys])
+
+
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    _forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_user_tokens(sender, instance, created=False, update_fields=None, **kwargs):
+    # New users have no tokens yet; logins only touch last_login, which cached users do not need fresh
+    if created or (update_fields is not None and set(update_fields) == {'last_login'}):
+        return
+    _forget_tokens(list(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True)))
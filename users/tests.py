@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import authentication
+from .models import User
+
+
+@override_settings(AUTH_TOKEN_CACHE={'LOCAL_TTL': 30, 'MAX_ENTRIES': 100, 'SHARED_ALIAS': ''})
+class CachedTokenAuthenticationTests(TestCase):
+    """Token lookups are cached, and dropped when the token or its user changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', email='reader@example.com', password='pw')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        patch = mock.patch.object(authentication, '_token_cache', None)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def profile(self):
+        return self.client.get('/api/users/profile/')
+
+    def test_repeat_requests_skip_the_lookup(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.profile().status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.profile().status_code, 200)
+
+    def test_deleted_token_rejected(self):
+        self.assertEqual(self.profile().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            Token.objects.filter(pk=self.token.pk).get().delete()
+        self.assertEqual(self.profile().status_code, 401)
+
+    def test_deactivated_user_rejected(self):
+        self.assertEqual(self.profile().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.profile().status_code, 401)
+
+    def test_login_keeps_cached_entry(self):
+        self.assertEqual(self.profile().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.user.save(update_fields=['last_login'])
+        self.assertEqual(callbacks, [])
+
+    def test_bulk_update_waits_for_expiry(self):
+        # Documented limit: queryset updates send no signals
+        self.assertEqual(self.profile().status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.profile().status_code, 200)
+        authentication.get_token_cache().local.clear()
+        self.assertEqual(self.profile().status_code, 401)